@@ -88,11 +88,13 @@ setuptools.setup(
     ],
     install_requires=[
         "filelock",
+        "posix_ipc; sys_platform != 'win32'",
         "inputs",
         "PySide2",
         "pyautogui",
         "pytest",
         "pandas",
+        "numpy",
         "sklearn",
         "opencv-python",
         "psutil"
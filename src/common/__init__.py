@@ -13,3 +13,6 @@ Shared functions, classes, constants and other objects.
 from .utils import *
 from .logger import *
 from . import data_manager as dm
+from .message_queue import MessageQueue
+from .histogram import Histogram
+from .scheduler import Scheduler
@@ -12,16 +12,379 @@ instance of the manager on import.
 
 import sys as _sys
 import os as _os
+import json as _json
+import time as _time
+import threading as _threading
+import struct as _struct
+import typing as _typing
+import mmap as _mmap
+import zlib as _zlib
+import functools as _functools
+import numpy as _np
 from multiprocessing import shared_memory as _shm
 from .logger import Log as _Log
+from .stats import Stats as _Stats, TimedLock as _TimedLock
+from .locks import new_lock as _new_lock, NamedSemaphore as _NamedSemaphore, process_exists as _process_exists, \
+    DEFAULT_LOCK_TYPE as _DEFAULT_LOCK_TYPE, SEMAPHORES_SUPPORTED as _SEMAPHORES_SUPPORTED, \
+    unlink_semaphore as _unlink_semaphore
 from .utils import TRANSMISSION_DICT as _TRANSMISSION_DICT, CONTROL_DICT as _CONTROL_DICT, \
-    COMMON_LOCKS_DIR as _LOCKS_DIR, RECEIVED_DICT as _RECEIVED_DICT
-from filelock import FileLock as _FileLock
+    RECEIVED_DICT as _RECEIVED_DICT, ReadMode as _ReadMode, STRUCT_BYTE_ORDER as _BYTE_ORDER, \
+    build_schema as _build_schema
 
 # Declare shared memory names
 _TRANSMISSION_NAME = "transmission"
 _RECEIVED_NAME = "received"
 _CONTROL_NAME = "control"
+_RECEIVED_HISTORY_NAME = "received_history"
+
+# Declare how many records of the received data are kept in the history
+_RECEIVED_HISTORY_CAPACITY = 10000
+
+# Declare the types of locks guarding each shared memory segment
+_TRANSMISSION_LOCK_TYPE = _DEFAULT_LOCK_TYPE
+_RECEIVED_LOCK_TYPE = _DEFAULT_LOCK_TYPE
+_CONTROL_LOCK_TYPE = _DEFAULT_LOCK_TYPE
+
+# Declare the key prefixes of the control segment's stripes - groups of keys written independently, each guarded by a
+# separate lock (the remaining keys are guarded by the segment's main lock)
+_CONTROL_STRIPES = ("manual_", "autonomous_")
+
+# Declare the read modes of each shared memory segment
+_TRANSMISSION_READ_MODE = _ReadMode.DOUBLE_BUFFER
+_RECEIVED_READ_MODE = _ReadMode.SEQLOCK
+_CONTROL_READ_MODE = _ReadMode.SEQLOCK
+
+# Declare whether to collect the access statistics of each segment (reads, writes and lock waits) - costs nothing if
+# disabled, since the segments are only instrumented if enabled
+_COLLECT_STATS = False
+
+# Declare the directory to persist the control and the received segments in (as memory-mapped files, which survive the
+# restarts of the application), for example `LOG_DIR` or a tmpfs path like "/dev/shm", or None to not persist them - the
+# transmission segment is never persisted, to not drive the thrusters with the values from before the restart
+_PERSISTENCE_DIR = None
+
+# Declare how many times a sequence-locked read is retried before falling back to a locked read
+_SEQLOCK_RETRIES = 100
+
+# Declare how often (in seconds) to check for changes if waiting for them can't be signalled via semaphores
+_CHANGE_POLL_INTERVAL = 0.01
+
+# Declare the maximum number of threads (across all processes) waiting for changes of a single segment at once
+_MAX_WAITERS = 16
+
+# Declare the layout of each segment's header - the number of threads waiting for changes and the slots of the waiting
+# threads (owning process id and a waiting flag), followed by the sequence counter of each stripe
+_WAITERS = _struct.Struct(_BYTE_ORDER + "Q")
+_WAITER_SLOT = _struct.Struct(_BYTE_ORDER + "II")
+_SEQUENCE = _struct.Struct(_BYTE_ORDER + "Q")
+_WAITERS_OFFSET = 0
+_WAITER_SLOTS_OFFSET = _WAITERS_OFFSET + _WAITERS.size
+_HEADER_SIZE = _WAITER_SLOTS_OFFSET + _MAX_WAITERS * _WAITER_SLOT.size
+
+# Declare the layout of each key's version stamp (version of the segment when the key was last written)
+_STAMP = _struct.Struct(_BYTE_ORDER + "Q")
+
+# Declare the layout of each history's header (number of records ever appended) and each record's timestamp
+_HEAD = _struct.Struct(_BYTE_ORDER + "Q")
+_TIMESTAMP_FORMAT = "d"
+_TIMESTAMP_KEY = "timestamp"
+
+
+def _join_versions(versions: tuple) -> _typing.Union[int, tuple]:
+    """
+    Helper function used to represent the versions of all stripes of a segment as a single version.
+
+    :param versions: Version of each stripe
+    :return: The only version if the segment isn't striped, all versions otherwise
+    """
+    return versions[0] if len(versions) == 1 else versions
+
+
+class _FileMemory:
+    """
+    Class representing a memory-mapped file, used instead of the shared memory to persist the data across restarts.
+
+    Mirrors the interface of :class:`multiprocessing.shared_memory.SharedMemory` - it raises `FileExistsError` if
+    created when the file already exists, and exposes the mapped memory via `buf`. The file is only removed once
+    unlinked, and the operating system writes the changes back to it in the background (and on a crash of the
+    application).
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create or open the file and map it
+        * name - a getter to retrieve the path to the file
+        * size - a getter to retrieve the size of the mapped memory
+        * buf - a getter to retrieve the mapped memory
+        * unlink - a method to remove the file
+
+    Usage
+    -----
+
+    The memory should be created if the file doesn't exist, or opened otherwise::
+
+        try:
+            memory = _FileMemory(path, create=True, size=size)
+        except FileExistsError:
+            memory = _FileMemory(path)
+    """
+
+    def __init__(self, path: str, create: bool = False, size: int = 0):
+        """
+        Standard constructor.
+
+        :param path: Path to the file
+        :param create: Whether to create a new file (of the given size) or open an existing one
+        :param size: Size of the new file (in bytes)
+        :raises: FileExistsError, FileNotFoundError, ValueError
+        """
+        self._path = path
+
+        fd = _os.open(path, _os.O_RDWR | (_os.O_CREAT | _os.O_EXCL if create else 0), 0o600)
+        try:
+            if create:
+                _os.ftruncate(fd, size)
+            self._size = _os.fstat(fd).st_size
+
+            # Raise error early if the file was left empty (the application was terminated while creating it)
+            if not self._size:
+                raise ValueError(f"Memory file \"{path}\" is empty - remove it to start from the initial values")
+            self._mmap = _mmap.mmap(fd, self._size)
+        finally:
+            _os.close(fd)
+
+        self._buf = memoryview(self._mmap)
+
+    @property
+    def name(self) -> str:
+        """
+        Getter for the path to the file.
+        """
+        return self._path
+
+    @property
+    def size(self) -> int:
+        """
+        Getter for the size of the mapped memory (in bytes).
+        """
+        return self._size
+
+    @property
+    def buf(self) -> memoryview:
+        """
+        Getter for the mapped memory.
+        """
+        return self._buf
+
+    def unlink(self):
+        """
+        Method used to remove the file - the memory stays mapped until the processes using it are terminated.
+        """
+        _os.remove(self._path)
+
+
+class _KeySet:
+    """
+    Class representing a pre-compiled collection of keys of a shared memory segment.
+
+    The keys are ordered by their offsets, and the keys stored next to each other (within the same stripe) are merged
+    into runs, each with a single layout. This means reading or writing contiguous keys is a single unpack or pack
+    operation.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to validate the keys and build the runs
+        * keys - a getter to retrieve the keys in the order of the values
+        * stripes - a getter to retrieve the stripes of the keys
+        * unpack - a method to read the values
+        * prepare - a method to pack the values of each run, without writing them
+        * pack - a method to write the packed values and their version stamps
+
+    Usage
+    -----
+
+    The key sets should be retrieved from the memory segment once, and re-used across the calls::
+
+        key_set = memory_obj.key_set(("key_1", "key_2"))
+        data = memory_obj.get_many(key_set)
+    """
+    __slots__ = "_keys", "_stripes", "_runs"
+
+    def __init__(self, name: str, lookup: dict, keys: _typing.Iterable[str]):
+        """
+        Standard constructor.
+
+        :param name: Name of the memory object
+        :param lookup: Dictionary of offsets, layouts, stamp offsets and stripes of each key
+        :param keys: Keys to include
+        :raises: KeyError
+        """
+        if unknown := set(keys) - lookup.keys():
+            raise KeyError(f"{unknown} not found in {name} shared memory - remember to add the keys to the data "
+                           "manager!")
+
+        # Build the runs of contiguous keys - offset, formats, stamp offset, index of the first and past the last value,
+        # and the stripe
+        self._keys = tuple(sorted(set(keys), key=lambda k: lookup[k][0]))
+        self._stripes = tuple(sorted({lookup[key][3] for key in self._keys}))
+        runs = list()
+        for index, key in enumerate(self._keys):
+            offset, item, stamp, stripe = lookup[key]
+            if runs and runs[-1][5] == stripe and runs[-1][0] + _struct.calcsize(_BYTE_ORDER + runs[-1][1]) == offset:
+                runs[-1][1] += item.format[1:]
+                runs[-1][4] += 1
+            else:
+                runs.append([offset, item.format[1:], stamp, index, index + 1, stripe])
+
+        # Pre-compile the layouts of the values and the stamps of each run
+        self._runs = tuple((offset, _struct.Struct(_BYTE_ORDER + formats), stamp,
+                            _struct.Struct(_BYTE_ORDER + "Q" * (end - start)), start, end, stripe)
+                           for offset, formats, stamp, start, end, stripe in runs)
+
+    @property
+    def keys(self) -> _typing.Tuple[str, ...]:
+        """
+        Getter for the keys, in the order of the values (order of the keys within the memory).
+        """
+        return self._keys
+
+    @property
+    def stripes(self) -> _typing.Tuple[int, ...]:
+        """
+        Getter for the indices of the stripes the keys belong to, in ascending order.
+        """
+        return self._stripes
+
+    def unpack(self, buf: memoryview, base: int = 0) -> tuple:
+        """
+        Method used to read the values.
+
+        :param buf: Buffer of the memory segment
+        :param base: Offset of the frame to read (non-zero for the second buffer of double-buffered segments)
+        :return: Values in the order of the keys
+        """
+        if len(self._runs) == 1:
+            return self._runs[0][1].unpack_from(buf, base + self._runs[0][0])
+        return tuple(value for offset, layout, *_ in self._runs for value in layout.unpack_from(buf, base + offset))
+
+    def prepare(self, values: tuple) -> tuple:
+        """
+        Method used to pack the values of each run, so that the invalid values are detected before any of them is
+        written.
+
+        :param values: Values in the order of the keys
+        :raises: struct.error
+        :return: Packed values of each run
+        """
+        return tuple(layout.pack(*values[start:end]) for _, layout, _, _, start, end, _ in self._runs)
+
+    def pack(self, buf: memoryview, packed: tuple, versions: dict, base: int = 0):
+        """
+        Method used to write the packed values (see :func:`prepare`) and stamp them with the versions of their stripes.
+
+        :param buf: Buffer of the memory segment
+        :param packed: Packed values of each run
+        :param versions: Dictionary mapping each stripe to the version to stamp its values with
+        :param base: Offset of the frame to write (non-zero for the second buffer of double-buffered segments)
+        """
+        for (offset, layout, stamp, stamps, start, end, stripe), data in zip(self._runs, packed):
+            buf[base + offset:base + offset + layout.size] = data
+            stamps.pack_into(buf, base + stamp, *(versions[stripe],) * (end - start))
+
+
+class _Accessor:
+    """
+    Class representing a pre-compiled access point to a single key of a shared memory segment.
+
+    The offset and the layout of the key are resolved once on creation, so each access is a direct memory read or
+    write, without any key lookups, validation or logging.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to resolve the key's offset and layout
+        * key - a getter to retrieve the accessed key
+        * get - a method to read the value
+        * set - a method to write the value
+
+    Usage
+    -----
+
+    The accessors should be retrieved from the memory segment once, and re-used in the hot loops::
+
+        accessor = memory_obj.accessor("key")
+        while True:
+            value = accessor.get()
+    """
+    __slots__ = "_memory", "_key", "_buf", "_offset", "_sequence", "_unpack", "_key_set", "_frames", "_seqlock", \
+        "_double_buffered"
+
+    def __init__(self, memory: "_Memory", key: str, offset: int, item: _struct.Struct, stripe: int):
+        """
+        Standard constructor.
+
+        :param memory: Memory segment to access
+        :param key: Key to access
+        :param offset: Offset of the value
+        :param item: Layout of the value
+        :param stripe: Index of the stripe the key belongs to
+        """
+        self._memory = memory
+        self._key = key
+        self._buf = memory._buf
+        self._offset = offset
+        self._sequence = _HEADER_SIZE + stripe * _SEQUENCE.size
+        self._unpack = item.unpack_from
+        self._key_set = memory.key_set((key,))
+        self._frames = memory._frames
+
+        # The direct reads are disabled if the statistics are collected, so that each read is counted
+        self._seqlock = memory._read_mode == _ReadMode.SEQLOCK and not memory.stats
+        self._double_buffered = memory._read_mode == _ReadMode.DOUBLE_BUFFER and not memory.stats
+
+    @property
+    def key(self) -> str:
+        """
+        Getter for the accessed key.
+        """
+        return self._key
+
+    def get(self):
+        """
+        Method used to read the value, using the segment's read mode.
+
+        In the `SEQLOCK` and `DOUBLE_BUFFER` modes, the first attempt is made directly, and only if it fails the
+        standard (retrying) read is used.
+
+        :return: Value stored under the key
+        """
+        if self._seqlock:
+            sequence, = _SEQUENCE.unpack_from(self._buf, self._sequence)
+            value, = self._unpack(self._buf, self._offset)
+            if not sequence & 1 and _SEQUENCE.unpack_from(self._buf, self._sequence)[0] == sequence:
+                return value
+        elif self._double_buffered:
+            sequence, = _SEQUENCE.unpack_from(self._buf, self._sequence)
+            value, = self._unpack(self._buf, self._frames[sequence >> 1 & 1] + self._offset)
+            if _SEQUENCE.unpack_from(self._buf, self._sequence)[0] <= (sequence | 1) + 1:
+                return value
+        return self._memory._read(lambda base, _: self._unpack(self._buf, base + self._offset), self._key_set.keys)[0]
+
+    def set(self, value):
+        """
+        Method used to write the value.
+
+        :param value: Value to be inserted
+        :raises: ValueError
+        """
+        self._memory._write(self._key_set, (value,))
 
 
 class _Memory:
@@ -30,15 +393,71 @@ class _Memory:
 
     Provides a getter and a setter methods to modify the data indirectly.
 
+    Each segment has a fixed binary layout, described by a schema mapping the keys to struct formats. The layout is
+    pre-compiled on creation, so reading or writing the whole segment is a single unpack or pack operation.
+
+    Each segment also stores a sequence counter before the data, which is incremented before and after every write. In
+    the `SEQLOCK` read mode, readers don't acquire the lock - they retry if the counter was odd (write in progress) or
+    changed while reading, which means the writers are never blocked by the readers.
+
+    The keys can also be split into stripes by their prefixes, each stripe guarded by a separate lock and sequence
+    counter, so that the writers of different stripes don't block each other. The readers check the counters of all
+    stripes, so the snapshots are still consistent across the stripes. The version of a striped segment is a tuple of
+    the versions of each stripe.
+
+    The header is followed by a version stamp of each key, storing the version in which the key was last written. This
+    allows the readers to fetch only the keys changed since the version they last read.
+
+    In the `DOUBLE_BUFFER` read mode, the stamps and the data (a frame) are stored twice. The writers fill in the back
+    frame (copying the front frame first, unless all values are overwritten) and then swap the frames by incrementing
+    the sequence counter, so that the front frame is selected by the counter. The readers always read the latest
+    complete frame, and only retry if the frame they were reading was swapped back and re-written in the meantime.
+
+    The sequence counter also serves as the segment's version (incremented by each write), which allows the processes
+    to block until the data changes, instead of polling it. Each waiting thread claims a slot in the header (under the
+    main lock), and is woken up by the writers via the slot's named semaphore. If the semaphores aren't supported by the
+    system (or all `_MAX_WAITERS` slots are taken), the version is polled every `_CHANGE_POLL_INTERVAL` seconds instead.
+
+    The segment can also be persisted in a memory-mapped file instead of the shared memory, so that the data survives
+    the restarts of the application (the file is named after the segment's layout, so changing the layout starts from
+    the initial values again).
+
+    If enabled, the segment collects its access statistics (see :class:`Stats`) - the locks are wrapped to measure the
+    time spent waiting for them, and the reads and writes are replaced with the counting ones. The direct reads of the
+    accessors are disabled as well, so that every read is counted.
+
     Functions
     ---------
 
     The following list shortly summarises each function:
 
         * __init__ - a constructor to create or fetch the shared memory objects
-        * __getitem___ - a getter controlling access to the shared memory via locks
+        * __getitem___ - a getter controlling access to the shared memory via locks or sequence counter
         * __getitem___ - a setter controlling access to the shared memory via locks
-        * update - a setter controlling access to multiple items at once, using a dictionary
+        * __getattr__ - a getter retrieving the values as attributes
+        * __setattr__ - a setter modifying the values as attributes
+        * schema - a getter to retrieve the mapping of keys to struct formats
+        * stats - a getter to retrieve the access statistics of the segment
+        * layout - a getter to retrieve the pre-compiled binary layout of the data
+        * accessor - a getter retrieving a pre-compiled access point to a single key
+        * key_set - a getter retrieving a pre-compiled collection of keys
+        * version - a getter to retrieve the number of writes made to the segment
+        * wait_for_change - a method blocking until the version is different than the given one
+        * get_all - a getter retrieving a consistent snapshot of all items at once
+        * get_changed - a getter retrieving a consistent snapshot of the items changed since a given version
+        * get_many - a getter retrieving a consistent snapshot of the selected items
+        * get_bytes - a getter copying a consistent snapshot of all items, in their binary layout, into a buffer
+        * set_many - a setter controlling access to multiple items at once, using a dictionary
+        * update - an alias of `set_many`
+        * unlink - a method to remove the segment, its locks, its waiting semaphores and its statistics once no longer
+          needed
+        * _claim_waiter_slot - a helper method to find or claim the waiting slot of the current thread
+        * _waiter_semaphore - a helper method to open the semaphore of a waiting slot
+        * _notify - a helper method to wake up the threads waiting for changes
+        * _read - a helper method to read the data using the segment's read mode
+        * _write - a helper method to write the data under the lock, updating the sequence counter
+        * _counted_read - a helper method to read the data, counting the read in the statistics
+        * _counted_write - a helper method to write the data, counting the write in the statistics
 
     Usage
     -----
@@ -46,9 +465,36 @@ class _Memory:
     You should access the memory by calling the `__getitem__` and `__setitem__` methods::
 
         memory_obj["key"] = "value"
+
+    Alternatively, the values can be accessed as attributes, or via pre-compiled accessors (fastest - no per-call key
+    lookups or logging)::
+
+        memory_obj.key = "value"
+        accessor = memory_obj.accessor("key")
+        accessor.set("value")
+
+    The values must match the segment's schema, which by default is built from the types of the initial values.
+
+    To react to the changes of the data, remember the version before reading the data and wait for a newer one::
+
+        version = memory_obj.version
+        data = memory_obj.get_all()
+        ...
+        memory_obj.wait_for_change(version)
+
+    To only process the changed values, pass the version returned by the previous call (or None to get all values)::
+
+        changes, version = memory_obj.get_changed(version)
+
+    To send the data elsewhere without converting it, copy the snapshots into a re-used buffer, and decode them on the
+    other side with the segment's layout::
+
+        buffer = bytearray(memory_obj.layout.size)
+        sock.sendall(memory_obj.get_bytes(buffer))
     """
 
-    def __init__(self, name: str, data: dict, lock):
+    def __init__(self, name: str, data: dict, lock, read_mode: _ReadMode = _ReadMode.LOCKED, schema: dict = None,
+                 stripes: dict = None, stats: bool = False, persistence_dir: str = None):
         """
         Standard constructor.
 
@@ -56,27 +502,135 @@ class _Memory:
 
         :param name: Name of the memory object
         :param data: Dictionary of values to store
-        :param lock: Named lock instance
+        :param lock: Named lock instance, guarding the keys not belonging to any other stripe and the waiting slots
+        :param read_mode: Mode in which the data is read
+        :param schema: Dictionary of struct formats of the values, built from the types of the values if not provided
+        :param stripes: Dictionary of key prefixes and named lock instances guarding the keys starting with them
+        :param stats: Whether to collect the access statistics of the segment
+        :param persistence_dir: Directory to persist the data in (as a memory-mapped file), or None to not persist it
+        :raises: ValueError
         """
         self._name = name
         self._data = data
         self._lock = lock
+        self._read_mode = read_mode
+
+        # Assign each key to the stripe of its longest matching prefix, or the main stripe (guarded by the main lock)
+        stripes = stripes or dict()
+        self._locks = (lock, *stripes.values())
+        prefixes = sorted(enumerate(stripes, start=1), key=lambda stripe: -len(stripe[1]))
+        self._stripes = tuple(next((index for index, prefix in prefixes if key.startswith(prefix)), 0) for key in data)
+        if stripes and read_mode == _ReadMode.DOUBLE_BUFFER:
+            raise ValueError(f"Shared memory \"{name}\" can't be both striped and double-buffered")
+
+        # Remember the accessors of each key and the key sets of each collection of keys (created lazily)
+        self._accessors = dict()
+        self._key_sets = dict()
+
+        # Remember the waiting slots claimed by each thread, and the semaphores of each slot (opened lazily)
+        self._claimed_waiter_slots = dict()
+        self._waiter_semaphores = dict()
+
+        self._schema = _build_schema(name, data, schema)
+
+        # Pre-compile the layout of the sequence counters, the stamps and the whole data, placing the stamps and the
+        # data after the header and the counters
+        self._sequences = _struct.Struct(_BYTE_ORDER + "Q" * len(self._locks))
+        self._stamps = _struct.Struct(_BYTE_ORDER + "Q" * len(data))
+        self._struct = _struct.Struct(_BYTE_ORDER + "".join(self._schema.values()))
+        self._stamps_offset = _HEADER_SIZE + self._sequences.size
+        self._offset = self._stamps_offset + self._stamps.size
 
-        # Create a mapping dictionary which remembers positions of keys for faster access
-        self._lookup = {k: i for i, k in enumerate(data)}
+        # Remember the relative offsets of the frames (stamps and data), the second one only used if double-buffered
+        self._frame_size = self._stamps.size + self._struct.size
+        self._frames = (0, self._frame_size) if read_mode == _ReadMode.DOUBLE_BUFFER else (0, 0)
+        self._size = self._stamps_offset + self._frames[1] + self._frame_size
+
+        # Remember the offset and layout of each key, the offset of its stamp and its stripe for faster access
+        self._lookup = dict()
+        offset = self._offset
+        for index, (key, item_format) in enumerate(self._schema.items()):
+            item = _struct.Struct(_BYTE_ORDER + item_format)
+            self._lookup[key] = offset, item, self._stamps_offset + index * _STAMP.size, self._stripes[index]
+            offset += item.size
+
+        # Persist the data in a file named after the layout, so that the data is never restored into a different layout
+        if persistence_dir:
+            fingerprint = _zlib.crc32(repr((self._size, self._schema, read_mode.name, len(self._locks))).encode())
+            path = _os.path.join(persistence_dir, f"{name}_{fingerprint:08x}.mem")
+            new_memory = _functools.partial(_FileMemory, path)
+        else:
+            new_memory = _functools.partial(_shm.SharedMemory, name)
 
         # Create a shared memory object to store the data or fetch the existing one
         try:
-            self._shm = _shm.ShareableList(tuple(v for v in data.values()), name=name)
+            self._shm = new_memory(create=True, size=self._size)
+            self._buf = self._shm.buf
+            _WAITERS.pack_into(self._buf, _WAITERS_OFFSET, 0)
+            for offset in range(_WAITER_SLOTS_OFFSET, _HEADER_SIZE, _WAITER_SLOT.size):
+                _WAITER_SLOT.pack_into(self._buf, offset, 0, 0)
+            self._sequences.pack_into(self._buf, _HEADER_SIZE, *(0 for _ in self._locks))
+            for base in set(self._frames):
+                self._stamps.pack_into(self._buf, self._stamps_offset + base, *(0 for _ in data))
+                self._struct.pack_into(self._buf, self._offset + base, *data.values())
             _Log.info(f"Successfully created shared memory \"{name}\" with a total of {len(data)} keys")
         except FileExistsError:
-            self._shm = _shm.ShareableList(name=name)
+            self._shm = new_memory()
+            self._buf = self._shm.buf
+
+        # Raise error early if the existing memory was created with a different layout
+        if self._shm.size < self._size:
+            raise ValueError(f"Shared memory \"{name}\" is too small for its schema ({self._shm.size} < {self._size})")
+
+        # Only instrument the locks, the reads and the writes if collecting the statistics, so that they cost nothing
+        # otherwise
+        self._stats = None
+        if stats:
+            self._stats = _Stats(name + "_stats", {key: item.size for key, (_, item, *_) in self._lookup.items()})
+            self._all_keys = tuple(self._schema)
+            self._locks = tuple(_TimedLock(lock, self._stats) for lock in self._locks)
+            self._lock = self._locks[0]
+            self._read, self._write = self._counted_read, self._counted_write
+
+    def __getattr__(self, key: str):
+        """
+        Getter function to retrieve data from shared memory as attributes.
+
+        Only called if no other attribute with the given name exists. The private (underscored) attributes are never
+        treated as keys.
+
+        :param key: Key to access
+        :raises: AttributeError
+        :return: Value stored under the key
+        """
+        if key.startswith("_"):
+            raise AttributeError(f"{type(self).__name__} object has no attribute {key}")
+
+        try:
+            return self.accessor(key).get()
+        except KeyError:
+            raise AttributeError(f"{key} not found - remember to add the key to the data manager!")
+
+    def __setattr__(self, key: str, value):
+        """
+        Setter function to modify the data in shared memory as attributes.
+
+        The private (underscored) attributes are never treated as keys.
+
+        :param key: Key to access
+        :param value: Value to be inserted
+        :raises: ValueError
+        """
+        if not key.startswith("_") and key in self._lookup:
+            self.accessor(key).set(value)
+        else:
+            super().__setattr__(key, value)
 
     def __getitem__(self, key: str):
         """
         Getter function to retrieve data from shared memory.
 
-        Uses locks and the original dictionary passed in the constructor to safely access the data.
+        Uses the segment's read mode and the original dictionary passed in the constructor to safely access the data.
 
         :param key: Key to access
         :raises: KeyError
@@ -88,10 +642,8 @@ class _Memory:
         if key not in self._lookup:
             raise KeyError(f"{key} not found - remember to add the key to the data manager!")
 
-        self._lock.acquire()
-        value = self._shm[self._lookup[key]]
-        self._lock.release()
-        return value
+        offset, item, *_ = self._lookup[key]
+        return self._read(lambda base, _: item.unpack_from(self._buf, base + offset), key)[0]
 
     def __setitem__(self, key: str, value):
         """
@@ -101,7 +653,7 @@ class _Memory:
 
         :param key: Key to access
         :param value: Value to be inserted
-        :raises: KeyError
+        :raises: KeyError, ValueError
         """
         _Log.debug(f"Setting {key} to {value} in {self._name} shared memory")
 
@@ -109,40 +661,616 @@ class _Memory:
         if key not in self._lookup:
             raise KeyError(f"{key} not found - remember to add the key to the data manager!")
 
-        self._lock.acquire()
-        self._shm[self._lookup[key]] = value
-        self._lock.release()
+        self._write(self.key_set((key,)), (value,))
+
+    @property
+    def schema(self) -> dict:
+        """
+        Getter for the schema of the segment (mapping of keys to struct formats).
+        """
+        return self._schema
+
+    @property
+    def stats(self) -> _typing.Optional[_Stats]:
+        """
+        Getter for the access statistics of the segment, or None if they are not collected.
+        """
+        return self._stats
+
+    @property
+    def layout(self) -> _struct.Struct:
+        """
+        Getter for the pre-compiled binary layout of the data (values of all keys, in the order of the schema).
+        """
+        return self._struct
+
+    def accessor(self, key: str) -> _Accessor:
+        """
+        Getter for the pre-compiled access point to a single key.
+
+        The accessors are created once per key, and then re-used.
+
+        :param key: Key to access
+        :raises: KeyError
+        :return: Accessor of the key
+        """
+        try:
+            return self._accessors[key]
+        except KeyError:
+            if key not in self._lookup:
+                raise KeyError(f"{key} not found - remember to add the key to the data manager!")
+            offset, item, _, stripe = self._lookup[key]
+            self._accessors[key] = _Accessor(self, key, offset, item, stripe)
+            return self._accessors[key]
+
+    def key_set(self, keys: _typing.Iterable[str]) -> _KeySet:
+        """
+        Getter for the pre-compiled collection of keys.
+
+        The key sets are created once per collection of keys (in given order), and then re-used.
+
+        :param keys: Keys to include
+        :raises: KeyError
+        :return: Key set of the keys
+        """
+        keys = tuple(keys)
+        try:
+            return self._key_sets[keys]
+        except KeyError:
+            self._key_sets[keys] = _KeySet(self._name, self._lookup, keys)
+            return self._key_sets[keys]
+
+    @property
+    def version(self) -> _typing.Union[int, tuple]:
+        """
+        Getter for the version of the data - number of writes made to the segment (including any write in progress), or
+        a tuple of the numbers of writes made to each stripe if the segment is striped.
+        """
+        sequences = self._sequences.unpack_from(self._buf, _HEADER_SIZE)
+        return _join_versions(tuple((sequence + 1) // 2 for sequence in sequences))
+
+    def wait_for_change(self, since: _typing.Union[int, tuple], timeout: float = None) -> _typing.Union[int, tuple]:
+        """
+        Function used to block until the version of the data is different than the given one.
+
+        Returns immediately if the version is already different. The waiting process doesn't use the CPU, and is woken
+        up as soon as the data is written.
+
+        :param since: Version to compare against
+        :param timeout: Maximum time to wait (in seconds), or None to wait indefinitely
+        :return: Current version (same as `since` on timeout)
+        """
+        deadline = None if timeout is None else _time.monotonic() + timeout
+
+        while True:
+            if (version := self.version) != since:
+                return version
+            remaining = None if deadline is None else deadline - _time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return version
+
+            # Register as a waiting thread (unless still registered from a previous call) under the main lock
+            self._lock.acquire()
+            try:
+                slot = self._claim_waiter_slot()
+                if slot and not _WAITER_SLOT.unpack_from(self._buf, slot)[1]:
+                    waiters, = _WAITERS.unpack_from(self._buf, _WAITERS_OFFSET)
+                    _WAITERS.pack_into(self._buf, _WAITERS_OFFSET, waiters + 1)
+                    _WAITER_SLOT.pack_into(self._buf, slot, _os.getpid(), 1)
+            finally:
+                self._lock.release()
+
+            # Re-check the version after registering - the writers only wake up the threads registered before they
+            # finished writing, and the registration is left in place if the version already changed
+            if self.version != since:
+                continue
+
+            # Spurious wake-ups (releases left over from previous registrations) simply re-check the version
+            if slot:
+                self._waiter_semaphore(slot).acquire(remaining)
+            else:
+                _time.sleep(_CHANGE_POLL_INTERVAL if remaining is None else min(remaining, _CHANGE_POLL_INTERVAL))
 
     def get_all(self) -> dict:
         """
         Function used to read multiple data entries in shared memory, and return them as a dictionary.
 
+        The entries are guaranteed to be a consistent snapshot (never a mix of values from before and after a write).
+
         :return: Dictionary of stored values
         """
         _Log.debug(f"Getting all data from {self._name} shared memory")
+        values = self._read(lambda base, _: self._struct.unpack_from(self._buf, self._offset + base))
+        return dict(zip(self._schema, values))
 
-        self._lock.acquire()
-        data = {key: self._shm[self._lookup[key]] for key in self._data}
-        self._lock.release()
-        return data
+    def get_changed(self, since: _typing.Union[int, tuple, None]) -> _typing.Tuple[dict, _typing.Union[int, tuple]]:
+        """
+        Function used to read the data entries changed since the given version, and return them as a dictionary.
 
-    def update(self, data: dict):
+        The entries are guaranteed to be a consistent snapshot, and the returned version should be passed to the next
+        call, to only retrieve the entries changed in between the calls.
+
+        :param since: Version returned by the previous call, or None to retrieve all entries
+        :return: Dictionary of changed values and the version of the snapshot
         """
-        Function used to modify multiple data entries in shared memory, using a dictionary
+        _Log.debug(f"Getting data changed since version {since} from {self._name} shared memory")
 
-        :param data: Data to update
+        stamps, values, sequences = self._read(lambda base, sequences: (
+            self._stamps.unpack_from(self._buf, self._stamps_offset + base),
+            self._struct.unpack_from(self._buf, self._offset + base),
+            sequences
+        ))
+
+        # The version of the snapshot excludes any write in progress
+        version = _join_versions(tuple(sequence >> 1 for sequence in sequences))
+        if since is None:
+            return dict(zip(self._schema, values)), version
+
+        # Compare the stamps against the versions of their stripes
+        since = since if isinstance(since, tuple) else (since,)
+        return {key: value for key, value, stamp, stripe in zip(self._schema, values, stamps, self._stripes)
+                if stamp > since[stripe]}, version
+
+    def get_many(self, keys: _typing.Union[_typing.Iterable[str], _KeySet]) -> dict:
+        """
+        Function used to read the selected data entries in shared memory, and return them as a dictionary.
+
+        The entries are guaranteed to be a consistent snapshot. Passing a pre-compiled key set avoids any per-call
+        validation of the keys.
+
+        :param keys: Keys to read, or a key set
         :raises: KeyError
+        :return: Dictionary of stored values
+        """
+        key_set = keys if isinstance(keys, _KeySet) else self.key_set(keys)
+        return dict(zip(key_set.keys, self._read(lambda base, _: key_set.unpack(self._buf, base), key_set.keys)))
+
+    def get_bytes(self, buffer: _typing.Union[bytearray, memoryview] = None) -> memoryview:
+        """
+        Function used to copy a consistent snapshot of all data entries, in their binary layout, into a buffer.
+
+        Nothing is unpacked or logged, so with a re-used buffer no objects are created per value - the returned view can
+        be sent as it is (for example via `socket.sendall`), and decoded on the other side with :attr:`layout`.
+
+        :param buffer: Buffer of at least `layout.size` bytes to copy into, a new one is created if not provided
+        :raises: ValueError
+        :return: View of the copied snapshot within the buffer
+        """
+        view = memoryview(bytearray(self._struct.size) if buffer is None else buffer)[:self._struct.size]
+        if len(view) < self._struct.size:
+            raise ValueError(f"Buffer too small for {self._name} shared memory ({len(view)} < {self._struct.size})")
+
+        def _copy(base: int, _):
+            view[:] = self._buf[self._offset + base:self._offset + base + self._struct.size]
+
+        self._read(_copy)
+        return view
+
+    def set_many(self, data: dict):
+        """
+        Function used to modify multiple data entries in shared memory, using a dictionary.
+
+        The entries are written under a single lock acquisition, using the key set cached for the dictionary's keys
+        (the keys are only validated the first time they are used).
+
+        :param data: Data to update
+        :raises: KeyError, ValueError
         """
         _Log.debug(f"Updating {self._name} shared memory with multiple entries")
 
-        # Raise error early if any keys are not registered
-        if not set(data.keys()).issubset(set(self._data.keys())):
-            raise KeyError(f"{set(data.keys())} is not a subset of {set(self._data.keys())}")
+        key_set = self.key_set(data)
+        self._write(key_set, tuple(map(data.__getitem__, key_set.keys)))
+
+    def update(self, data: dict):
+        """
+        Function used to modify multiple data entries in shared memory, using a dictionary.
+
+        Same as :func:`set_many`.
+
+        :param data: Data to update
+        :raises: KeyError, ValueError
+        """
+        self.set_many(data)
+
+    def unlink(self):
+        """
+        Method used to remove the segment, its locks, the semaphores of its waiting slots and its statistics (if
+        collected) once no longer needed.
+
+        The processes which already opened the segment can still access it, but opening a segment with the same name
+        creates a new one, with the initial values.
+        """
+        self._shm.unlink()
+        for lock in self._locks:
+            lock.unlink()
+        for index in range(_MAX_WAITERS):
+            _unlink_semaphore(f"{self._name}_changed_{index}")
+        if self._stats:
+            self._stats.unlink()
+
+    def _claim_waiter_slot(self) -> _typing.Optional[int]:
+        """
+        Helper method used to find the waiting slot claimed by the current thread, or claim a new one.
+
+        Slots owned by the processes which no longer exist are claimed again. Must be called under the lock.
+
+        :return: Offset of the slot, or None if the slots aren't supported or are all taken
+        """
+        if not _SEMAPHORES_SUPPORTED:
+            return None
+
+        # Identify the thread by the process id as well, since forked processes inherit the claimed slots
+        pid = _os.getpid()
+        thread = pid, _threading.get_ident()
+        if thread in self._claimed_waiter_slots:
+            return self._claimed_waiter_slots[thread]
+
+        for offset in range(_WAITER_SLOTS_OFFSET, _HEADER_SIZE, _WAITER_SLOT.size):
+            owner, waiting = _WAITER_SLOT.unpack_from(self._buf, offset)
+            if owner and _process_exists(owner):
+                continue
+
+            # Make sure a slot abandoned while waiting is no longer counted
+            if waiting:
+                waiters, = _WAITERS.unpack_from(self._buf, _WAITERS_OFFSET)
+                _WAITERS.pack_into(self._buf, _WAITERS_OFFSET, waiters - 1)
+
+            _WAITER_SLOT.pack_into(self._buf, offset, pid, 0)
+            self._claimed_waiter_slots[thread] = offset
+            return offset
+
+        _Log.warning(f"All {_MAX_WAITERS} waiting slots of {self._name} shared memory are taken, polling instead")
+        self._claimed_waiter_slots[thread] = None
+        return None
+
+    def _waiter_semaphore(self, offset: int) -> _NamedSemaphore:
+        """
+        Helper method used to open (or retrieve the already opened) semaphore of the waiting slot.
+
+        :param offset: Offset of the slot
+        :return: Named semaphore of the slot
+        """
+        if offset not in self._waiter_semaphores:
+            index = (offset - _WAITER_SLOTS_OFFSET) // _WAITER_SLOT.size
+            self._waiter_semaphores[offset] = _NamedSemaphore(f"{self._name}_changed_{index}")
+        return self._waiter_semaphores[offset]
+
+    def _read(self, getter: _typing.Callable, keys: _typing.Union[str, tuple] = None):
+        """
+        Helper method used to read the data using the segment's read mode.
+
+        In the `SEQLOCK` mode, the read is retried until the sequence counters are even and unchanged, which means no
+        writes happened while reading. In the `DOUBLE_BUFFER` mode, the front frame is read, and the read is only
+        retried if the frame was swapped back and written into while reading. After `_SEQLOCK_RETRIES` failed attempts,
+        the locks are used instead, which also repairs the counters if a writer was terminated in the middle of a write
+        (except in the `DOUBLE_BUFFER` mode, where the incomplete write never reached the front frame).
+
+        :param getter: Function reading the data from the shared memory, given the offset of the frame and the values
+            of the sequence counters (as read before reading the data)
+        :param keys: Key or keys read, or None if all keys are read (only used by the statistics)
+        :return: Value returned by the getter
+        """
+        if self._read_mode == _ReadMode.SEQLOCK:
+            for _ in range(_SEQLOCK_RETRIES):
+                sequences = self._sequences.unpack_from(self._buf, _HEADER_SIZE)
+                if not any(map((1).__and__, sequences)):
+                    value = getter(0, sequences)
+                    if self._sequences.unpack_from(self._buf, _HEADER_SIZE) == sequences:
+                        return value
+
+                # Yield to the writer before retrying
+                _time.sleep(0)
+
+            _Log.debug(f"Falling back to a locked read of {self._name} shared memory")
 
+        elif self._read_mode == _ReadMode.DOUBLE_BUFFER:
+            for _ in range(_SEQLOCK_RETRIES):
+                sequence, = _SEQUENCE.unpack_from(self._buf, _HEADER_SIZE)
+                value = getter(self._frames[sequence >> 1 & 1], (sequence,))
+
+                # The frame is only written into again by the write after the next one
+                if _SEQUENCE.unpack_from(self._buf, _HEADER_SIZE)[0] <= (sequence | 1) + 1:
+                    return value
+
+                # Yield to the writer before retrying
+                _time.sleep(0)
+
+            _Log.debug(f"Falling back to a locked read of {self._name} shared memory")
+
+        # Acquire the locks in a fixed order to avoid dead locks with the writers of multiple stripes
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            sequences = list(self._sequences.unpack_from(self._buf, _HEADER_SIZE))
+            for stripe, sequence in enumerate(sequences):
+                if sequence & 1 and self._read_mode != _ReadMode.DOUBLE_BUFFER:
+                    _Log.warning(f"Repairing the sequence counter of {self._name} shared memory after an incomplete "
+                                 "write")
+                    sequences[stripe] += 1
+                    _SEQUENCE.pack_into(self._buf, _HEADER_SIZE + stripe * _SEQUENCE.size, sequences[stripe])
+            return getter(self._frames[sequences[0] >> 1 & 1], tuple(sequences))
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def _write(self, key_set: _KeySet, values: tuple):
+        """
+        Helper method used to write the data under the locks of the written stripes, marking the write with the
+        sequence counters, stamping the written keys with the new versions, and waking up the processes waiting for
+        changes.
+
+        The values are packed before the locks are acquired, so invalid values are rejected before any of them is
+        written. The counters are odd while the data is being written. If a previous writer was terminated mid-write
+        (leaving a counter odd), the counter is left odd rather than incremented. In the `DOUBLE_BUFFER` mode, the data
+        is written into the back frame, which becomes the front frame once the counter is incremented - so the
+        incomplete write is discarded instead, advancing the counter past it so that the last complete write stays in
+        the front frame, and the back frame is rebuilt from it.
+
+        :param key_set: Keys to write
+        :param values: Values in the order of the keys
+        :raises: ValueError
+        """
+        try:
+            packed = key_set.prepare(values)
+        except _struct.error as e:
+            raise ValueError(f"Failed to write to {self._name} shared memory - {e}")
+
+        for stripe in key_set.stripes:
+            self._locks[stripe].acquire()
+
+        sequences = dict()
+        for stripe in key_set.stripes:
+            offset = _HEADER_SIZE + stripe * _SEQUENCE.size
+            sequence, = _SEQUENCE.unpack_from(self._buf, offset)
+            if sequence & 1 and self._read_mode == _ReadMode.DOUBLE_BUFFER:
+                _Log.warning(f"Discarding an incomplete write to {self._name} shared memory")
+                sequence += 2
+            sequences[stripe] = sequence + 1 | 1
+            _SEQUENCE.pack_into(self._buf, offset, sequences[stripe])
+        versions = {stripe: (sequence + 1) // 2 for stripe, sequence in sequences.items()}
+
+        try:
+            base = 0
+            if self._read_mode == _ReadMode.DOUBLE_BUFFER:
+                base, front = self._frames[versions[0] & 1], self._frames[versions[0] - 1 & 1]
+
+                # Bring the back frame up to date with the front frame, unless all values are overwritten anyway
+                if len(key_set.keys) < len(self._schema):
+                    self._buf[self._stamps_offset + base:self._stamps_offset + base + self._frame_size] = \
+                        self._buf[self._stamps_offset + front:self._stamps_offset + front + self._frame_size]
+
+            key_set.pack(self._buf, packed, versions, base)
+        finally:
+            for stripe, sequence in sequences.items():
+                _SEQUENCE.pack_into(self._buf, _HEADER_SIZE + stripe * _SEQUENCE.size, sequence + 1)
+            for stripe in reversed(key_set.stripes):
+                self._locks[stripe].release()
+            self._notify()
+
+    def _notify(self):
+        """
+        Helper method used to wake up the threads waiting for changes, after the data was written.
+
+        The waiting threads are unregistered under the main lock, and then woken up via their slots' semaphores. The
+        threads register before re-checking the version, so any thread missed here sees the new version instead.
+        """
+        if not _WAITERS.unpack_from(self._buf, _WAITERS_OFFSET)[0]:
+            return
+
+        slots = list()
         self._lock.acquire()
-        for key, value in data.items():
-            self._shm[self._lookup[key]] = value
-        self._lock.release()
+        try:
+            _WAITERS.pack_into(self._buf, _WAITERS_OFFSET, 0)
+            for offset in range(_WAITER_SLOTS_OFFSET, _HEADER_SIZE, _WAITER_SLOT.size):
+                owner, waiting = _WAITER_SLOT.unpack_from(self._buf, offset)
+                if waiting:
+                    _WAITER_SLOT.pack_into(self._buf, offset, owner, 0)
+                    slots.append(offset)
+        finally:
+            self._lock.release()
+
+        for offset in slots:
+            self._waiter_semaphore(offset).release()
+
+    def _counted_read(self, getter: _typing.Callable, keys: _typing.Union[str, tuple] = None):
+        """
+        Helper method used to read the data (see :func:`_read`), counting the read in the statistics.
+
+        Replaces :func:`_read` if the statistics are collected.
+
+        :param getter: Function reading the data from the shared memory
+        :param keys: Key or keys read, or None if all keys are read
+        :return: Value returned by the getter
+        """
+        value = _Memory._read(self, getter)
+        self._stats.count(self._all_keys if keys is None else (keys,) if isinstance(keys, str) else keys, False)
+        return value
+
+    def _counted_write(self, key_set: _KeySet, values: tuple):
+        """
+        Helper method used to write the data (see :func:`_write`), counting the write in the statistics.
+
+        Replaces :func:`_write` if the statistics are collected.
+
+        :param key_set: Keys to write
+        :param values: Values in the order of the keys
+        :raises: ValueError
+        """
+        _Memory._write(self, key_set, values)
+        self._stats.count(key_set.keys, True)
+
+
+class _History:
+    """
+    Class representing a shared memory segment storing the history of some data.
+
+    The history is a fixed-capacity ring buffer of timestamped records, each record storing all values (laid out
+    according to the schema, like in :class:`_Memory`). The header stores the number of records ever appended, which
+    is incremented after each record is fully written.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create or fetch the shared memory objects
+        * capacity - a getter to retrieve the maximum number of records stored
+        * head - a getter to retrieve the number of records ever appended
+        * view - a getter to retrieve the whole ring buffer as a NumPy array
+        * append - a method to add a record to the history
+        * window - a method to retrieve the most recent records as a NumPy array
+        * unlink - a method to remove the segment once no longer needed
+        * _offset - a helper method to calculate the offset of a record
+
+    Usage
+    -----
+
+    A single process should append the records, without using any locks::
+
+        history_obj.append({"key": "value"})
+
+    Any process can then read the most recent records, as a NumPy structured array with a field for each key and the
+    "timestamp" field::
+
+        records = history_obj.window(100)
+        values = records["key"]
+
+    .. warning::
+
+        The returned arrays are views of the shared memory wherever possible, which means the records will be
+        overwritten once the buffer wraps around. Copy the arrays to keep the values for longer.
+    """
+
+    def __init__(self, name: str, data: dict, capacity: int, schema: dict = None):
+        """
+        Standard constructor.
+
+        Builds a shared memory object or fetches it if it already exists.
+
+        :param name: Name of the memory object
+        :param data: Dictionary of initial values, used to fill in the values missing from the first record
+        :param capacity: Maximum number of records stored
+        :param schema: Dictionary of struct formats of the values, built from the types of the values if not provided
+        :raises: ValueError
+        """
+        self._name = name
+        self._data = data
+        self._capacity = capacity
+        self._schema = _build_schema(name, data, schema)
+
+        # Pre-compile the layout of each record - the timestamp followed by the values
+        self._record = _struct.Struct(_BYTE_ORDER + _TIMESTAMP_FORMAT + "".join(self._schema.values()))
+        self._dtype = _np.dtype([(_TIMESTAMP_KEY, _BYTE_ORDER + _TIMESTAMP_FORMAT)]
+                                + [(key, _BYTE_ORDER + item_format) for key, item_format in self._schema.items()])
+        self._size = _HEAD.size + self._record.size * capacity
+
+        # Create a shared memory object to store the data or fetch the existing one
+        try:
+            self._shm = _shm.SharedMemory(name, create=True, size=self._size)
+            _HEAD.pack_into(self._shm.buf, 0, 0)
+            _Log.info(f"Successfully created shared memory \"{name}\" with a total of {capacity} records")
+        except FileExistsError:
+            self._shm = _shm.SharedMemory(name)
+
+        # Raise error early if the existing memory was created with a different layout
+        if self._shm.size < self._size:
+            raise ValueError(f"Shared memory \"{name}\" is too small for its schema ({self._shm.size} < {self._size})")
+
+        self._buf = self._shm.buf
+        self._records = _np.ndarray((capacity,), dtype=self._dtype, buffer=self._buf, offset=_HEAD.size)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Getter for the maximum number of records stored.
+        """
+        return self._capacity
+
+    @property
+    def head(self) -> int:
+        """
+        Getter for the number of records ever appended (the newest record is at `(head - 1) % capacity`).
+        """
+        return _HEAD.unpack_from(self._buf)[0]
+
+    @property
+    def view(self) -> _np.ndarray:
+        """
+        Getter for the whole ring buffer, as a NumPy structured array (view of the shared memory).
+        """
+        return self._records
+
+    def append(self, data: dict, timestamp: float = None):
+        """
+        Function used to add a record to the history.
+
+        The values missing from the data are copied from the previous record. Nothing is logged, as the records are
+        appended at a high rate.
+
+        .. warning::
+
+            Only a single process should be appending the records at a time.
+
+        :param data: Values to store
+        :param timestamp: Time of the record (UNIX time), current time if not provided
+        :raises: KeyError, ValueError
+        """
+        head = self.head
+
+        # Fill in the missing values, raising error early if any keys are not registered
+        if data.keys() != self._schema.keys():
+            if not data.keys() <= self._schema.keys():
+                raise KeyError(f"{set(data.keys())} is not a subset of {set(self._schema.keys())}")
+            if head:
+                previous = dict(zip(self._schema, self._record.unpack_from(self._buf, self._offset(head - 1))[1:]))
+            else:
+                previous = self._data
+            data = {key: data.get(key, previous[key]) for key in self._schema}
+
+        try:
+            self._record.pack_into(self._buf, self._offset(head), _time.time() if timestamp is None else timestamp,
+                                   *(data[key] for key in self._schema))
+        except _struct.error as e:
+            raise ValueError(f"Failed to append to {self._name} shared memory - {e}")
+
+        # Publish the record only after it's been fully written
+        _HEAD.pack_into(self._buf, 0, head + 1)
+
+    def window(self, count: int) -> _np.ndarray:
+        """
+        Function used to retrieve the most recent records, from the oldest to the newest.
+
+        The records are a view of the shared memory, unless the window wraps around the end of the ring buffer, in
+        which case they are copied.
+
+        :param count: Maximum number of records to retrieve
+        :return: NumPy structured array of the records
+        """
+        head = self.head
+        count = min(count, head, self._capacity)
+        start, end = (head - count) % self._capacity, head % self._capacity
+
+        if start < end or not count:
+            return self._records[start:start + count]
+        return _np.concatenate((self._records[start:], self._records[:end]))
+
+    def unlink(self):
+        """
+        Method used to remove the segment once no longer needed.
+
+        The processes which already opened the segment can still access it, but opening a segment with the same name
+        creates a new, empty one.
+        """
+        self._shm.unlink()
+
+    def _offset(self, index: int) -> int:
+        """
+        Helper function used to calculate the offset of a record.
+
+        :param index: Index of the record (not wrapped)
+        :return: Offset of the record within the shared memory
+        """
+        return _HEAD.size + (index % self._capacity) * self._record.size
 
 
 class _DataManager:
@@ -163,6 +1291,10 @@ class _DataManager:
         * __init__ - a constructor to create or fetch the shared memory objects
         * transmission - a getter controlling access to the transmission data shared memory
         * control - a setter controlling access to the control data shared memory
+        * received_history - a getter controlling access to the history of the received data shared memory
+        * get_stats - a getter retrieving the access statistics of the segments
+        * dump_stats - a method to dump the access statistics of the segments as JSON
+        * unlink - a method to remove the segments once no longer needed
 
     Usage
     -----
@@ -172,23 +1304,41 @@ class _DataManager:
         from ..common import data_manager as dm
         transmission = dm.transmission
         control = dm.control
+
+    A separate set of segments (for example for the tests) can be created by prefixing their names::
+
+        segments = type(dm)("test_", persistence_dir=None)
+        ...
+        segments.unlink()
     """
 
-    def __init__(self):
+    def __init__(self, prefix: str = "", persistence_dir: _typing.Optional[str] = _PERSISTENCE_DIR):
         """
         Standard constructor
 
         Fetches or creates the locks and the memory segments.
+
+        :param prefix: Prefix of the names of the locks and the segments
+        :param persistence_dir: Directory to persist the control and the received segments in, or None to not persist
+            them
         """
         # Create or fetch named locks
-        self._transmission_lock = _FileLock(_os.path.join(_LOCKS_DIR, _TRANSMISSION_NAME + ".lock"))
-        self._control_lock = _FileLock(_os.path.join(_LOCKS_DIR, _CONTROL_NAME + ".lock"))
-        self._received_lock = _FileLock(_os.path.join(_LOCKS_DIR, _RECEIVED_NAME + ".lock"))
+        self._transmission_lock = _new_lock(prefix + _TRANSMISSION_NAME, _TRANSMISSION_LOCK_TYPE)
+        self._control_lock = _new_lock(prefix + _CONTROL_NAME, _CONTROL_LOCK_TYPE)
+        self._received_lock = _new_lock(prefix + _RECEIVED_NAME, _RECEIVED_LOCK_TYPE)
+        self._control_stripe_locks = {stripe: _new_lock(prefix + _CONTROL_NAME + "_" + stripe.rstrip("_"),
+                                                        _CONTROL_LOCK_TYPE) for stripe in _CONTROL_STRIPES}
 
         # Create shared memory objects to store the data, these will be read-only exposed via class properties
-        self._transmission = _Memory(_TRANSMISSION_NAME, _TRANSMISSION_DICT, self._transmission_lock)
-        self._control = _Memory(_CONTROL_NAME, _CONTROL_DICT, self._control_lock)
-        self._received = _Memory(_RECEIVED_NAME, _RECEIVED_DICT, self._received_lock)
+        self._transmission = _Memory(prefix + _TRANSMISSION_NAME, _TRANSMISSION_DICT, self._transmission_lock,
+                                     _TRANSMISSION_READ_MODE, stats=_COLLECT_STATS)
+        self._control = _Memory(prefix + _CONTROL_NAME, _CONTROL_DICT, self._control_lock, _CONTROL_READ_MODE,
+                                stripes=self._control_stripe_locks, stats=_COLLECT_STATS,
+                                persistence_dir=persistence_dir)
+        self._received = _Memory(prefix + _RECEIVED_NAME, _RECEIVED_DICT, self._received_lock, _RECEIVED_READ_MODE,
+                                 stats=_COLLECT_STATS, persistence_dir=persistence_dir)
+        self._received_history = _History(prefix + _RECEIVED_HISTORY_NAME, _RECEIVED_DICT,
+                                          _RECEIVED_HISTORY_CAPACITY)
 
     @property
     def transmission(self) -> _Memory:
@@ -217,11 +1367,52 @@ class _DataManager:
         """
         return self._control
 
+    @property
+    def received_history(self) -> _History:
+        """
+        Getter for the history of the received data memory segment
+
+        :return: Received data history memory segment
+        """
+        return self._received_history
+
+    def get_stats(self) -> dict:
+        """
+        Function used to retrieve the access statistics of the segments collecting them.
+
+        :return: Dictionary mapping the names of the segments to their statistics (empty if not collected)
+        """
+        segments = {_TRANSMISSION_NAME: self._transmission, _CONTROL_NAME: self._control,
+                    _RECEIVED_NAME: self._received}
+        return {name: segment.stats.get() for name, segment in segments.items() if segment.stats}
+
+    def dump_stats(self, path: str = None) -> str:
+        """
+        Function used to dump the access statistics of the segments as JSON.
+
+        :param path: Path to the file to save the statistics in, or None to only return them
+        :return: JSON-encoded statistics
+        """
+        data = _json.dumps(self.get_stats(), indent=4)
+        if path:
+            with open(path, "w") as f:
+                f.write(data)
+        return data
+
+    def unlink(self):
+        """
+        Function used to remove the segments (including their locks and statistics) once no longer needed (see
+        :func:`_Memory.unlink`).
+        """
+        for segment in (self._transmission, self._control, self._received, self._received_history):
+            segment.unlink()
+
 
 # Create some type hinting variables for PyInspections
 transmission: _Memory
 control: _Memory
 received: _Memory
+received_history: _History
 
 
 # Override the module to be the class object instead
@@ -0,0 +1,230 @@
+"""
+Histogram
+=========
+
+Module storing an implementation of a histogram of integer values (for example latencies in nanoseconds), used to
+summarise the timing measurements without keeping each sample.
+
+The histogram is of a fixed size, so it can also be kept in a provided buffer (for example a shared memory segment).
+"""
+import struct as _struct
+import typing as _typing
+
+# Declare the default number of bits of each value's mantissa kept by the buckets - the relative error of the recorded
+# values is at most 1 / 2 ** bits (12.5% by default)
+DEFAULT_PRECISION = 3
+
+# Declare the percentiles included in the summaries
+PERCENTILES = {"p50": 50, "p90": 90, "p99": 99, "p999": 99.9}
+
+# Declare the number of magnitudes (powers of two) of the recorded values
+_MAGNITUDES = 64
+
+# Declare the indices of the totals (the number of values, their sum and the largest value), stored before the buckets
+_COUNT, _TOTAL, _MAX = range(3)
+_TOTALS = 3
+
+# Declare the format of the totals and the buckets
+_FORMAT = "q"
+
+
+class Histogram:
+    """
+    Class representing a histogram of non-negative integer values, with logarithmic buckets.
+
+    Each power of two is split into `2 ** precision` linear sub-buckets, so the relative error of the recorded values is
+    bounded regardless of their magnitude (like in the HDR histograms), and recording a value is a few integer
+    operations.
+
+    The totals and the buckets are stored as native 64-bit integers, in a new buffer or the provided one. A histogram
+    kept in the shared memory should only be recorded into by a single process (and thread).
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create the buckets
+        * size - a static method to calculate the size (in bytes) of the buffer needed by a histogram
+        * count - a getter to retrieve the number of recorded values
+        * max - a getter to retrieve the largest recorded value
+        * record - a method to record a value
+        * merge - a method to add the values recorded by another histogram
+        * percentile - a method to retrieve the (approximate) value at the given percentile
+        * buckets - a method to retrieve the non-empty buckets
+        * summary - a method to retrieve the count, mean, maximum and percentiles of the values
+        * reset - a method to remove all recorded values
+        * release - a method to release the views of the buffer
+        * _index - a helper method to calculate the bucket of a value
+        * _bounds - a helper method to calculate the range of values of a bucket
+
+    Usage
+    -----
+
+    The values should be recorded as they are measured, and summarised when needed::
+
+        histogram = Histogram()
+        histogram.record(latency)
+        print(histogram.summary())
+
+    To keep the histogram in the shared memory, the buffer should be provided::
+
+        shm = SharedMemory(name, create=True, size=Histogram.size())
+        histogram = Histogram(buffer=shm.buf)
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, buffer: memoryview = None):
+        """
+        Standard constructor.
+
+        :param precision: Number of bits of each value's mantissa kept by the buckets
+        :param buffer: Buffer to store the histogram in (at least `size(precision)` bytes), or None to create a new one
+        :raises: ValueError
+        """
+        size = self.size(precision)
+        if buffer is None:
+            buffer = bytearray(size)
+        elif len(buffer) < size:
+            raise ValueError(f"Buffer too small for the histogram ({len(buffer)} < {size})")
+
+        self._precision = precision
+        self._sub_buckets = 1 << precision
+        self._buffer = memoryview(buffer)[:size]
+        self._data = self._buffer.cast(_FORMAT)
+        self._counts = self._data[_TOTALS:]
+
+    @staticmethod
+    def size(precision: int = DEFAULT_PRECISION) -> int:
+        """
+        Function used to calculate the size of the buffer needed by a histogram.
+
+        :param precision: Number of bits of each value's mantissa kept by the buckets
+        :return: Size of the buffer (in bytes)
+        """
+        return _struct.calcsize(_FORMAT) * (_TOTALS + (1 << precision) * _MAGNITUDES)
+
+    @property
+    def count(self) -> int:
+        """
+        Getter for the number of recorded values.
+        """
+        return self._data[_COUNT]
+
+    @property
+    def max(self) -> int:
+        """
+        Getter for the largest recorded value (0 if none were recorded).
+        """
+        return self._data[_MAX]
+
+    def record(self, value: int):
+        """
+        Method used to record a value (negative values are recorded as 0).
+
+        :param value: Value to record
+        """
+        value = max(int(value), 0)
+        self._counts[self._index(value)] += 1
+        self._data[_COUNT] += 1
+        self._data[_TOTAL] += value
+        if value > self._data[_MAX]:
+            self._data[_MAX] = value
+
+    def merge(self, other: "Histogram"):
+        """
+        Method used to add the values recorded by another histogram (of the same precision).
+
+        :param other: Histogram to merge
+        :raises: ValueError
+        """
+        if other._precision != self._precision:
+            raise ValueError(f"Can't merge histograms of different precisions "
+                             f"({other._precision} != {self._precision})")
+
+        for index, count in enumerate(other._counts):
+            if count:
+                self._counts[index] += count
+        self._data[_COUNT] += other._data[_COUNT]
+        self._data[_TOTAL] += other._data[_TOTAL]
+        self._data[_MAX] = max(self._data[_MAX], other._data[_MAX])
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Method used to retrieve the (approximate) value at the given percentile.
+
+        :param percentile: Percentile between 0 and 100
+        :return: Upper bound of the bucket containing the percentile (capped by the largest value), or 0 if empty
+        """
+        count, largest = self._data[_COUNT], self._data[_MAX]
+        if not count:
+            return 0
+
+        target = max(percentile / 100 * count, 1)
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self._bounds(index)[1] - 1, largest)
+        return largest
+
+    def buckets(self) -> _typing.Dict[int, int]:
+        """
+        Method used to retrieve the non-empty buckets.
+
+        :return: Dictionary mapping the upper bound (exclusive) of each non-empty bucket to its number of values
+        """
+        return {self._bounds(index)[1]: count for index, count in enumerate(self._counts) if count}
+
+    def summary(self, scale: float = 1) -> dict:
+        """
+        Method used to retrieve the count, mean, maximum and percentiles of the recorded values.
+
+        :param scale: Divisor of the values (for example 1000 to convert nanoseconds to microseconds)
+        :return: Dictionary of the statistics
+        """
+        count, total, largest = self._data[_COUNT], self._data[_TOTAL], self._data[_MAX]
+        return {
+            "count": count,
+            "mean": round(total / count / scale, 3) if count else 0,
+            "max": round(largest / scale, 3),
+            **{name: round(self.percentile(percentile) / scale, 3) for name, percentile in PERCENTILES.items()}
+        }
+
+    def reset(self):
+        """
+        Method used to remove all recorded values.
+        """
+        self._buffer[:] = bytes(len(self._buffer))
+
+    def release(self):
+        """
+        Method used to release the views of the buffer, so that the provided buffer (for example a shared memory
+        segment) can be closed. The histogram can't be used afterwards.
+        """
+        self._counts.release()
+        self._data.release()
+        self._buffer.release()
+
+    def _index(self, value: int) -> int:
+        """
+        Helper method used to calculate the bucket of a value.
+
+        The values up to `2 ** (precision + 1)` have their own buckets, the larger values share the buckets with the
+        values of the same magnitude and the same most significant bits.
+
+        :param value: Non-negative value
+        :return: Index of the bucket
+        """
+        shift = max(value.bit_length() - self._precision - 1, 0)
+        return shift * self._sub_buckets + (value >> shift)
+
+    def _bounds(self, index: int) -> _typing.Tuple[int, int]:
+        """
+        Helper method used to calculate the range of values of a bucket.
+
+        :param index: Index of the bucket
+        :return: Lowest (inclusive) and highest (exclusive) value of the bucket
+        """
+        shift = max(index // self._sub_buckets - 1, 0)
+        mantissa = index - shift * self._sub_buckets
+        return mantissa << shift, (mantissa + 1) << shift
@@ -0,0 +1,399 @@
+"""
+Locks
+=====
+
+Module storing implementations of the inter-process locks used to guard the shared memory segments.
+
+The file-based locks are portable, but each acquisition costs several system calls and filesystem round-trips. The
+semaphore-based locks use named POSIX semaphores which live in shared memory, and are uncontended in a single atomic
+operation. They require the optional `posix_ipc` package - without it, the file-based locks are used instead.
+"""
+import os as _os
+import mmap as _mmap
+import struct as _struct
+import time as _time
+import psutil as _psutil
+from .logger import Log as _Log
+from .utils import LockType as _LockType, COMMON_LOCKS_DIR as _LOCKS_DIR, STRUCT_BYTE_ORDER as _BYTE_ORDER
+from filelock import FileLock as _FileLock
+
+try:
+    import posix_ipc as _posix_ipc
+except ImportError:
+    _posix_ipc = None
+
+# Declare the prefix of the named semaphores, to avoid clashing with other applications
+_SEMAPHORE_PREFIX = "/ncl_rovers_"
+
+# Declare how often (in seconds) to check if the holder of a lock is still running, while waiting for the lock
+_OWNER_CHECK_INTERVAL = 0.1
+
+# Declare how long (in seconds) a lock can stay held without a recorded holder before it's considered abandoned - its
+# holder terminated between acquiring the semaphore and recording itself, or between clearing the record and releasing
+_UNOWNED_TIMEOUT = 1
+
+# Declare the layout of each lock's owner record (id of the process holding the lock, or 0 if none)
+_OWNER = _struct.Struct(_BYTE_ORDER + "q")
+
+# Named semaphores are only supported with the `posix_ipc` package, and only used if the waits can time out
+SEMAPHORES_SUPPORTED = _posix_ipc is not None and _posix_ipc.SEMAPHORE_TIMEOUT_SUPPORTED
+
+# Select the fastest lock supported by the operating system
+DEFAULT_LOCK_TYPE = _LockType.SEMAPHORE if SEMAPHORES_SUPPORTED else _LockType.FILE
+
+
+def process_exists(pid: int) -> bool:
+    """
+    Function used to check if a process with the given id is running.
+
+    The terminated processes not yet reaped by their parents (zombies) are not considered running.
+
+    :param pid: Process id
+    :return: True if the process exists, False otherwise
+    """
+    try:
+        return _psutil.Process(pid).status() != _psutil.STATUS_ZOMBIE
+    except _psutil.NoSuchProcess:
+        return False
+    except _psutil.AccessDenied:
+        return True
+
+
+def _open_semaphore(name: str, value: int) -> "_posix_ipc.Semaphore":
+    """
+    Helper function used to create a named semaphore or open it if it already exists.
+
+    :param name: Full name of the semaphore
+    :param value: Initial value of the semaphore (ignored if it already exists)
+    :return: Semaphore object
+    """
+    try:
+        semaphore = _posix_ipc.Semaphore(name, _posix_ipc.O_CREX, initial_value=value)
+        _Log.info(f"Successfully created semaphore \"{name}\"")
+        return semaphore
+    except _posix_ipc.ExistentialError:
+        return _posix_ipc.Semaphore(name)
+
+
+def unlink_semaphore(name: str):
+    """
+    Function used to remove a named semaphore, if it exists.
+
+    The processes which already opened the semaphore can still use it, but opening a semaphore with the same name
+    creates a new one.
+
+    :param name: Name of the semaphore
+    """
+    if _posix_ipc is None:
+        return
+    try:
+        _posix_ipc.unlink_semaphore(_SEMAPHORE_PREFIX + name)
+    except _posix_ipc.ExistentialError:
+        pass
+
+
+class FileLock:
+    """
+    Lock class backed by a lock file.
+
+    The locks are released by the operating system when the holding process is terminated. Each process opens its own
+    lock file object, since the forked processes can't use the ones inherited from their parents.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to remember the path of the lock file
+        * acquire - a method to acquire the lock (blocking)
+        * release - a method to release the lock
+        * unlink - a method to remove the lock file
+        * __enter__ - a method to acquire the lock within the context manager
+        * __exit__ - a method to release the lock within the context manager
+
+    Usage
+    -----
+
+    The lock should be used the same way as any other lock::
+
+        lock = FileLock("name")
+        lock.acquire()
+        ...
+        lock.release()
+    """
+
+    def __init__(self, name: str):
+        """
+        Standard constructor.
+
+        :param name: Name of the lock
+        """
+        self._path = _os.path.join(_LOCKS_DIR, name + ".lock")
+        self._pid = None
+        self._lock = None
+
+    def acquire(self):
+        """
+        Method used to acquire the lock, opening the lock file first if not opened by the current process yet.
+        """
+        if self._pid != _os.getpid():
+            self._lock, self._pid = _FileLock(self._path), _os.getpid()
+        self._lock.acquire()
+
+    def release(self):
+        """
+        Method used to release the lock.
+        """
+        self._lock.release()
+
+    def unlink(self):
+        """
+        Method used to remove the lock file, once the lock is no longer needed.
+        """
+        try:
+            _os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class SemaphoreLock:
+    """
+    Lock class backed by a named POSIX semaphore.
+
+    Each process opening a lock with the same name shares the same semaphore, so the locks don't have to be passed to
+    the child processes. The id of the holding process is recorded in a small named shared memory segment next to the
+    semaphore.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create or open the named semaphore and the owner record
+        * name - a getter to retrieve the name of the lock
+        * owner - a getter to retrieve the id of the process holding the lock
+        * acquire - a method to acquire the lock (blocking)
+        * release - a method to release the lock
+        * unlink - a method to remove the named semaphore, the owner record and the take-over lock file
+        * __enter__ - a method to acquire the lock within the context manager
+        * __exit__ - a method to release the lock within the context manager
+        * _take_over - a private method to take the lock over from its terminated holder
+
+    Usage
+    -----
+
+    The lock should be used the same way as any other lock::
+
+        lock = SemaphoreLock("name")
+        lock.acquire()
+        ...
+        lock.release()
+
+    .. warning::
+
+        Unlike the file-based locks, the semaphores are not released by the operating system when the holding process
+        is terminated. To avoid a dead lock, the waiting processes take the lock over once its recorded holder no
+        longer exists - a holder which is merely slow keeps the lock, however long it takes. A lock held without any
+        recorded holder for `_UNOWNED_TIMEOUT` seconds is taken over as well, since its holder must have terminated
+        right after acquiring the semaphore or right before releasing it.
+    """
+
+    def __init__(self, name: str):
+        """
+        Standard constructor.
+
+        Creates the named semaphore and the owner record, or opens them if they already exist.
+
+        :param name: Name of the lock
+        """
+        self._name = _SEMAPHORE_PREFIX + name
+        self._semaphore = _open_semaphore(self._name, 1)
+        self._takeover_lock = FileLock(name + ".takeover")
+
+        memory = _posix_ipc.SharedMemory(self._name + "_owner", _posix_ipc.O_CREAT, size=_OWNER.size)
+        self._owner = _mmap.mmap(memory.fd, _OWNER.size)
+        memory.close_fd()
+
+    @property
+    def name(self) -> str:
+        """
+        Getter for the name of the semaphore.
+        """
+        return self._name
+
+    @property
+    def owner(self) -> int:
+        """
+        Getter for the id of the process holding the lock, or 0 if it's not held (or the holder didn't record itself
+        yet).
+        """
+        return _OWNER.unpack_from(self._owner)[0]
+
+    def acquire(self):
+        """
+        Method used to acquire the lock.
+
+        Every `_OWNER_CHECK_INTERVAL` seconds of waiting, checks if the holder of the lock is still running, and takes
+        the lock over if it's not, or if no holder was recorded for `_UNOWNED_TIMEOUT` seconds.
+        """
+        unowned_since = None
+        while True:
+            try:
+                self._semaphore.acquire(_OWNER_CHECK_INTERVAL)
+                break
+            except _posix_ipc.BusyError:
+                owner = self.owner
+                if owner:
+                    unowned_since = None
+                    if not process_exists(owner) and self._take_over(owner):
+                        break
+                elif unowned_since is None:
+                    unowned_since = _time.monotonic()
+                elif _time.monotonic() - unowned_since >= _UNOWNED_TIMEOUT and self._take_over(owner):
+                    break
+
+        _OWNER.pack_into(self._owner, 0, _os.getpid())
+
+    def release(self):
+        """
+        Method used to release the lock.
+
+        Releasing a lock not held by the current process is logged and ignored, so that the semaphore is never
+        released more than once.
+        """
+        if self.owner != _os.getpid():
+            _Log.warning(f"Lock \"{self._name}\" is not held by the current process")
+            return
+
+        _OWNER.pack_into(self._owner, 0, 0)
+        self._semaphore.release()
+
+    def unlink(self):
+        """
+        Method used to remove the named semaphore, the owner record and the take-over lock file, once the lock is no
+        longer needed.
+
+        The processes which already opened the lock can still use it, but opening a lock with the same name creates a
+        new one.
+        """
+        try:
+            _posix_ipc.unlink_semaphore(self._name)
+        except _posix_ipc.ExistentialError:
+            pass
+        try:
+            _posix_ipc.unlink_shared_memory(self._name + "_owner")
+        except _posix_ipc.ExistentialError:
+            pass
+        self._takeover_lock.unlink()
+
+    def _take_over(self, owner: int) -> bool:
+        """
+        Helper method used to take the lock over from its terminated holder.
+
+        The waiting processes take the lock over one at a time (under a file lock), so only the first one to find the
+        holder terminated becomes the new holder - the others find the new holder running and keep waiting.
+
+        :param owner: Id of the terminated process which held the lock, or 0 if the holder wasn't recorded
+        :return: True if the lock was taken over, False if another process already took it over
+        """
+        with self._takeover_lock:
+            if self.owner != owner:
+                return False
+
+            if owner:
+                _Log.warning(f"Taking over lock \"{self._name}\" from terminated process {owner}")
+            else:
+                _Log.warning(f"Taking over lock \"{self._name}\" held without a recorded holder")
+            _OWNER.pack_into(self._owner, 0, _os.getpid())
+            return True
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class NamedSemaphore:
+    """
+    Counting semaphore class backed by a named POSIX semaphore.
+
+    Used to signal events between the processes - the waiting processes acquire the semaphore, and the signalling
+    process releases it once per each waiting process.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create or open the named semaphore
+        * acquire - a method to wait for the semaphore, with an optional timeout
+        * release - a method to release the semaphore (multiple times)
+
+    Usage
+    -----
+
+    The semaphore should be shared by using the same name in each process::
+
+        semaphore = NamedSemaphore("name")
+        if semaphore.acquire(timeout=1):
+            ...
+    """
+
+    def __init__(self, name: str):
+        """
+        Standard constructor.
+
+        Creates the named semaphore (initially 0) or opens it if it already exists.
+
+        :param name: Name of the semaphore
+        """
+        self._name = _SEMAPHORE_PREFIX + name
+        self._semaphore = _open_semaphore(self._name, 0)
+
+    def acquire(self, timeout: float = None) -> bool:
+        """
+        Method used to wait for the semaphore.
+
+        :param timeout: Maximum time to wait (in seconds), or None to wait indefinitely
+        :return: True if acquired, False on timeout
+        """
+        try:
+            self._semaphore.acquire(timeout)
+            return True
+        except _posix_ipc.BusyError:
+            return False
+
+    def release(self, count: int = 1):
+        """
+        Method used to release the semaphore.
+
+        :param count: Number of times to release the semaphore
+        """
+        for _ in range(count):
+            self._semaphore.release()
+
+
+def new_lock(name: str, lock_type: _LockType = DEFAULT_LOCK_TYPE):
+    """
+    Function used to create (or fetch) a named inter-process lock of the given type.
+
+    :param name: Name of the lock
+    :param lock_type: Type of the lock to create
+    :raises: ValueError
+    :return: New lock object, exposing `acquire` and `release` methods
+    """
+    if lock_type == _LockType.FILE:
+        return FileLock(name)
+    elif lock_type == _LockType.SEMAPHORE:
+        return SemaphoreLock(name)
+    else:
+        raise ValueError(f"Unsupported lock type - {lock_type}")
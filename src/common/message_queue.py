@@ -0,0 +1,244 @@
+"""
+Message queue
+=============
+
+Module storing an implementation of a shared memory message queue, used to stream discrete events between processes.
+
+Unlike the data manager's segments, which only keep the latest values, the queue keeps every record until it's consumed,
+so the events written faster than they are read are not lost.
+
+The queue is lock-free for a single producer and a single consumer. Python can't atomically reserve the records in the
+shared memory, so multiple producers are serialised with a named lock instead - the consumer still never takes it.
+"""
+import struct as _struct
+import typing as _typing
+from multiprocessing import shared_memory as _shm
+from .logger import Log as _Log
+from .utils import STRUCT_BYTE_ORDER as _BYTE_ORDER, build_schema as _build_schema
+
+# Declare the layout of the cursors - number of records ever pushed (head) and ever popped (tail)
+_CURSOR = _struct.Struct(_BYTE_ORDER + "Q")
+
+# Declare the offsets of the cursors, placed in separate cache lines so that the producers and the consumer don't
+# invalidate each other's caches
+_CACHE_LINE_SIZE = 64
+_HEAD_OFFSET = 0
+_TAIL_OFFSET = _CACHE_LINE_SIZE
+_HEADER_SIZE = 2 * _CACHE_LINE_SIZE
+
+
+class MessageQueue:
+    """
+    Class representing a shared memory ring-buffer queue of fixed-size records.
+
+    Each record stores all values, laid out according to the schema (like the data manager's segments). The producers
+    write the records first and then advance the head cursor, the consumer reads the records first and then advances
+    the tail cursor. This means a single producer and a single consumer never block each other - no locks are used.
+
+    If a lock is provided, the producers are serialised with it, allowing multiple producers. The consumer still doesn't
+    use the lock, but there must only ever be a single consumer.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create or fetch the shared memory object
+        * __len__ - a method to retrieve the number of records waiting in the queue
+        * name - a getter to retrieve the name of the queue
+        * capacity - a getter to retrieve the maximum number of records waiting in the queue
+        * push - a method to add a record to the queue
+        * push_many - a method to add multiple records to the queue at once
+        * pop - a method to remove and return the oldest record from the queue
+        * pop_many - a method to remove and return multiple oldest records from the queue at once
+        * _values - a helper method to convert a record into values in the order of the schema
+        * _offset - a helper method to calculate the offset of a record
+
+    Usage
+    -----
+
+    Each process should create the queue with the same name and initial values, which are also used to fill in the
+    values missing from the pushed records::
+
+        queue = MessageQueue("events", {"button": 0, "pressed": False}, capacity=1024)
+        queue.push({"button": 3, "pressed": True})
+
+    The consumer should then pop the records in batches::
+
+        for record in queue.pop_many():
+            ...
+
+    If multiple processes push to the queue, each of them should pass the same named lock::
+
+        queue = MessageQueue("events", {"button": 0, "pressed": False}, capacity=1024, lock=new_lock("events"))
+
+    .. warning::
+
+        The queue rejects the records once it's full - check the values returned by `push` and `push_many`. Pushing to
+        the same queue from multiple processes (or threads) at once without a lock corrupts the queue.
+    """
+
+    def __init__(self, name: str, data: dict, capacity: int, lock=None, schema: dict = None):
+        """
+        Standard constructor.
+
+        Builds a shared memory object or fetches it if it already exists.
+
+        :param name: Name of the memory object
+        :param data: Dictionary of initial values, used to fill in the values missing from the records
+        :param capacity: Maximum number of records waiting in the queue
+        :param lock: Named lock instance serialising the producers, or None if there is only a single producer
+        :param schema: Dictionary of struct formats of the values, built from the types of the values if not provided
+        :raises: ValueError
+        """
+        self._name = name
+        self._data = data
+        self._capacity = capacity
+        self._lock = lock
+        self._schema = _build_schema(name, data, schema)
+        self._keys = tuple(self._schema)
+
+        # Pre-compile the layout of each record
+        self._record = _struct.Struct(_BYTE_ORDER + "".join(self._schema.values()))
+        self._size = _HEADER_SIZE + self._record.size * capacity
+
+        # Create a shared memory object to store the records or fetch the existing one
+        try:
+            self._shm = _shm.SharedMemory(name, create=True, size=self._size)
+            _CURSOR.pack_into(self._shm.buf, _HEAD_OFFSET, 0)
+            _CURSOR.pack_into(self._shm.buf, _TAIL_OFFSET, 0)
+            _Log.info(f"Successfully created message queue \"{name}\" with a capacity of {capacity} records")
+        except FileExistsError:
+            self._shm = _shm.SharedMemory(name)
+
+        # Raise error early if the existing memory was created with a different layout
+        if self._shm.size < self._size:
+            raise ValueError(f"Shared memory \"{name}\" is too small for its schema ({self._shm.size} < {self._size})")
+
+        self._buf = self._shm.buf
+
+    def __len__(self) -> int:
+        """
+        Method used to retrieve the number of records waiting in the queue.
+
+        :return: Number of records
+        """
+        return _CURSOR.unpack_from(self._buf, _HEAD_OFFSET)[0] - _CURSOR.unpack_from(self._buf, _TAIL_OFFSET)[0]
+
+    @property
+    def name(self) -> str:
+        """
+        Getter for the name of the queue.
+        """
+        return self._name
+
+    @property
+    def capacity(self) -> int:
+        """
+        Getter for the maximum number of records waiting in the queue.
+        """
+        return self._capacity
+
+    def push(self, data: dict) -> bool:
+        """
+        Function used to add a record to the queue.
+
+        :param data: Values to store
+        :raises: KeyError, ValueError
+        :return: True if pushed, False if the queue is full
+        """
+        return self.push_many((data,)) == 1
+
+    def push_many(self, records: _typing.Iterable[dict]) -> int:
+        """
+        Function used to add multiple records to the queue at once.
+
+        The records are published together, once all of them are written. If the queue fills up, the remaining records
+        are rejected. Nothing is logged, as the records are pushed at a high rate.
+
+        :param records: Collection of values to store
+        :raises: KeyError, ValueError
+        :return: Number of records pushed
+        """
+        if self._lock:
+            self._lock.acquire()
+
+        head, = _CURSOR.unpack_from(self._buf, _HEAD_OFFSET)
+        count = 0
+        try:
+            free = self._capacity - head + _CURSOR.unpack_from(self._buf, _TAIL_OFFSET)[0]
+            for data in records:
+                if count >= free:
+                    break
+                self._record.pack_into(self._buf, self._offset(head + count), *self._values(data))
+                count += 1
+        except _struct.error as e:
+            raise ValueError(f"Failed to push to {self._name} message queue - {e}")
+        finally:
+
+            # Publish the records written before any error
+            _CURSOR.pack_into(self._buf, _HEAD_OFFSET, head + count)
+            if self._lock:
+                self._lock.release()
+
+        return count
+
+    def pop(self) -> _typing.Optional[dict]:
+        """
+        Function used to remove and return the oldest record from the queue.
+
+        :return: Dictionary of values, or None if the queue is empty
+        """
+        records = self.pop_many(1)
+        return records[0] if records else None
+
+    def pop_many(self, count: int = None) -> _typing.List[dict]:
+        """
+        Function used to remove and return multiple oldest records from the queue at once.
+
+        The records are unpacked in (at most two) contiguous blocks, and released back to the producers together.
+
+        :param count: Maximum number of records to pop, or None to pop all waiting records
+        :return: List of dictionaries of values, from the oldest to the newest
+        """
+        tail, = _CURSOR.unpack_from(self._buf, _TAIL_OFFSET)
+        waiting = _CURSOR.unpack_from(self._buf, _HEAD_OFFSET)[0] - tail
+        count = waiting if count is None else min(count, waiting)
+        if count <= 0:
+            return list()
+
+        # Split the records into the block up to the end of the ring buffer, and the block wrapped around to its start
+        first = min(count, self._capacity - tail % self._capacity)
+        start, end = self._offset(tail), _HEADER_SIZE + (count - first) * self._record.size
+        values = list(self._record.iter_unpack(self._buf[start:start + first * self._record.size]))
+        if first < count:
+            values += self._record.iter_unpack(self._buf[_HEADER_SIZE:end])
+
+        # Release the records only after they've been read
+        _CURSOR.pack_into(self._buf, _TAIL_OFFSET, tail + count)
+        return [dict(zip(self._keys, record)) for record in values]
+
+    def _values(self, data: dict) -> _typing.Iterable:
+        """
+        Helper function used to convert a record into values in the order of the schema.
+
+        The values missing from the record are taken from the initial values.
+
+        :param data: Values to store
+        :raises: KeyError
+        :return: Values in the order of the schema
+        """
+        if data.keys() == self._schema.keys():
+            return map(data.__getitem__, self._keys)
+        if not data.keys() <= self._schema.keys():
+            raise KeyError(f"{set(data.keys())} is not a subset of {set(self._schema.keys())}")
+        return (data.get(key, self._data[key]) for key in self._keys)
+
+    def _offset(self, index: int) -> int:
+        """
+        Helper function used to calculate the offset of a record.
+
+        :param index: Index of the record (not wrapped)
+        :return: Offset of the record within the shared memory
+        """
+        return _HEADER_SIZE + (index % self._capacity) * self._record.size
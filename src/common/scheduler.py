@@ -0,0 +1,185 @@
+"""
+Scheduler
+=========
+
+Module storing an implementation of a fixed-rate scheduler of the periodic loops.
+
+The ticks are scheduled at absolute deadlines (a multiple of the period from the start), rather than by sleeping for
+the period after each iteration, so the time spent within the iterations and the oversleeping don't accumulate.
+"""
+import asyncio as _asyncio
+import time as _time
+import typing as _typing
+from .histogram import Histogram as _Histogram
+
+# Declare the time (in seconds) before each deadline spent busy-waiting instead of sleeping, to not oversleep
+_SPIN_DURATION = 0.0002
+
+
+class Scheduler:
+    """
+    Class representing a fixed-rate scheduler of a periodic loop.
+
+    Each call to `wait` blocks until the next deadline. If the deadline already passed (the iteration took longer than
+    the period), the overrun is recorded and the missed ticks are skipped, so the loop doesn't burst to catch up.
+
+    The jitter (how late each tick was woken up) and the overruns (how late the iterations finished) are recorded in
+    histograms, in nanoseconds.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to set the rate and create the histograms
+        * rate - a getter to retrieve the rate of the ticks
+        * period - a getter to retrieve the time between the ticks
+        * wait - a method to block until the next tick
+        * wait_async - a coroutine to wait (without blocking the event loop) until the next tick
+        * reset - a method to restart the schedule from now and clear the statistics
+        * stats - a method to retrieve the timing statistics of the ticks
+        * _advance - a helper method to count a tick and calculate the time left until its deadline
+        * _reached - a helper method to record the jitter of a reached deadline and schedule the next one
+
+    Usage
+    -----
+
+    The scheduler should be waited on once per iteration of the loop::
+
+        scheduler = Scheduler(50)
+        while True:
+            scheduler.wait()
+            ...
+
+    Within an event loop, the coroutine should be awaited instead::
+
+        await scheduler.wait_async()
+
+    The timing statistics can then be retrieved from the process running the loop::
+
+        print(scheduler.stats())
+    """
+
+    def __init__(self, rate: float):
+        """
+        Standard constructor.
+
+        :param rate: Number of ticks per second
+        :raises: ValueError
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+
+        self._rate = rate
+        self._period = 1 / rate
+        self._jitter = _Histogram()
+        self._overruns = _Histogram()
+        self._ticks = 0
+        self._missed = 0
+        self._deadline = None
+
+    @property
+    def rate(self) -> float:
+        """
+        Getter for the number of ticks per second.
+        """
+        return self._rate
+
+    @property
+    def period(self) -> float:
+        """
+        Getter for the time (in seconds) between the ticks.
+        """
+        return self._period
+
+    def wait(self):
+        """
+        Method used to block until the next tick.
+
+        The first call returns immediately and starts the schedule. Each next call sleeps until the deadline (and
+        busy-waits for the last `_SPIN_DURATION` seconds), or returns immediately if the deadline already passed.
+        """
+        remaining = self._advance()
+        if remaining is None:
+            return
+
+        if remaining > _SPIN_DURATION:
+            _time.sleep(remaining - _SPIN_DURATION)
+        while (now := _time.perf_counter()) < self._deadline:
+            pass
+
+        self._reached(now)
+
+    async def wait_async(self):
+        """
+        Coroutine used to wait until the next tick, without blocking the event loop.
+
+        Behaves like `wait`, but without busy-waiting - the precision is limited by the event loop's clock.
+        """
+        remaining = self._advance()
+        if remaining is None:
+            return
+
+        await _asyncio.sleep(remaining)
+        self._reached(_time.perf_counter())
+
+    def reset(self):
+        """
+        Method used to restart the schedule (the next call to `wait` returns immediately) and clear the statistics.
+        """
+        self._jitter.reset()
+        self._overruns.reset()
+        self._ticks = 0
+        self._missed = 0
+        self._deadline = None
+
+    def stats(self) -> dict:
+        """
+        Method used to retrieve the timing statistics of the ticks.
+
+        :return: Dictionary of the number of ticks, overruns and skipped ticks, and the jitter and overrun summaries in
+            microseconds
+        """
+        return {
+            "rate": self._rate,
+            "ticks": self._ticks,
+            "overruns": self._overruns.count,
+            "missed": self._missed,
+            "jitter_us": self._jitter.summary(scale=1000),
+            "overrun_us": self._overruns.summary(scale=1000)
+        }
+
+    def _advance(self) -> _typing.Optional[float]:
+        """
+        Helper method used to count a tick and calculate the time left until its deadline.
+
+        If the deadline already passed, the overrun is recorded and the missed ticks are skipped.
+
+        :return: Time (in seconds) left until the deadline, or None if the tick is due immediately
+        """
+        now = _time.perf_counter()
+        self._ticks += 1
+
+        if self._deadline is None:
+            self._deadline = now + self._period
+            return None
+
+        if now >= self._deadline:
+            self._overruns.record((now - self._deadline) * 1e9)
+
+            # Skip the missed ticks and schedule the next one in phase with the original schedule
+            missed = int((now - self._deadline) / self._period)
+            self._missed += missed
+            self._deadline += (missed + 1) * self._period
+            return None
+
+        return self._deadline - now
+
+    def _reached(self, now: float):
+        """
+        Helper method used to record how late the deadline was reached, and schedule the next one.
+
+        :param now: Time (from `time.perf_counter`) the deadline was reached at
+        """
+        self._jitter.record((now - self._deadline) * 1e9)
+        self._deadline += self._period
@@ -0,0 +1,283 @@
+"""
+Stats
+=====
+
+Module storing an implementation of the access statistics of the shared memory segments.
+
+The statistics are kept in shared memory as well, with a separate slot for each process, so that any process can see
+which processes access which segments (and keys), and how long they wait for the segments' locks.
+"""
+import os as _os
+import time as _time
+import numpy as _np
+import psutil as _psutil
+from multiprocessing import shared_memory as _shm
+from .logger import Log as _Log
+from .locks import new_lock as _new_lock
+from .utils import STRUCT_BYTE_ORDER as _BYTE_ORDER
+
+# Declare the statistics collected for each segment (all of them) and each key (only the reads, writes and bytes)
+FIELDS = ("reads", "writes", "bytes_read", "bytes_written", "lock_acquisitions", "lock_wait_total_ns",
+          "lock_wait_max_ns")
+KEY_FIELDS = FIELDS[:4]
+
+# Declare the indices of the statistics within each row of the counters
+_READS, _WRITES, _BYTES_READ, _BYTES_WRITTEN, _LOCK_ACQUISITIONS, _LOCK_WAIT_TOTAL, _LOCK_WAIT_MAX = range(len(FIELDS))
+
+# Declare the maximum number of processes collecting the statistics of a single segment at once
+_MAX_PROCESSES = 32
+
+# Declare the type of the process ids and the counters
+_DTYPE = _np.dtype(_BYTE_ORDER + "i8")
+
+
+class TimedLock:
+    """
+    Lock wrapper used to count the lock acquisitions and the time spent waiting for them.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to wrap the lock
+        * acquire - a method to acquire the lock, measuring the wait
+        * release - a method to release the lock
+        * unlink - a method to remove the lock
+
+    Usage
+    -----
+
+    The wrapper should be used instead of the lock::
+
+        lock = TimedLock(lock, stats)
+    """
+    __slots__ = "_lock", "_stats"
+
+    def __init__(self, lock, stats: "Stats"):
+        """
+        Standard constructor.
+
+        :param lock: Lock to wrap
+        :param stats: Statistics to count the acquisitions in
+        """
+        self._lock = lock
+        self._stats = stats
+
+    def acquire(self):
+        """
+        Method used to acquire the lock, counting the time spent waiting for it.
+        """
+        start = _time.perf_counter_ns()
+        self._lock.acquire()
+        self._stats.count_lock(_time.perf_counter_ns() - start)
+
+    def release(self):
+        """
+        Method used to release the lock.
+        """
+        self._lock.release()
+
+    def unlink(self):
+        """
+        Method used to remove the lock.
+        """
+        self._lock.unlink()
+
+
+class Stats:
+    """
+    Class representing the access statistics of a shared memory segment.
+
+    Each process claims a slot (under a named lock, once) and then only updates the counters within its own slot, so the
+    processes never contend over the statistics. The counters of the threads of a single process are not synchronised
+    and may be slightly under-counted.
+
+    The increments of each collection of keys are pre-computed (for all counters of a slot), so counting an access is a
+    single NumPy addition.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create or fetch the shared memory object
+        * name - a getter to retrieve the name of the statistics
+        * count - a method to count a read or a write of the keys
+        * count_lock - a method to count a lock acquisition
+        * get - a method to retrieve the statistics of all processes and their totals
+        * reset - a method to zero all counters
+        * unlink - a method to remove the statistics and their lock once no longer needed
+        * _counters - a helper method to retrieve (or claim) the slot of the current process
+        * _to_dict - a helper method to convert the counters of a slot into a dictionary
+
+    Usage
+    -----
+
+    The statistics should be updated by the segment's read and write methods::
+
+        stats.count(("key_1", "key_2"), written=False)
+
+    And can then be read from any process::
+
+        data = stats.get()
+        mean_wait = data["total"]["segment"]["lock_wait_total_ns"] / data["total"]["segment"]["lock_acquisitions"]
+    """
+
+    def __init__(self, name: str, sizes: dict):
+        """
+        Standard constructor.
+
+        Builds a shared memory object or fetches it if it already exists.
+
+        :param name: Name of the memory object
+        :param sizes: Dictionary of the sizes (in bytes) of each key's value
+        :raises: ValueError
+        """
+        self._name = name
+        self._keys = tuple(sizes)
+        self._sizes = sizes
+        self._lock = _new_lock(name)
+
+        # Remember the pre-computed increments of each collection of keys, and the slot of each process (claimed lazily)
+        self._increments = dict()
+        self._slots = dict()
+
+        # Each slot stores the owning process id, and a row of counters for the whole segment followed by each key
+        shape = _MAX_PROCESSES, len(self._keys) + 1, len(FIELDS)
+        size = _DTYPE.itemsize * (_MAX_PROCESSES + int(_np.prod(shape)))
+
+        # Create a shared memory object to store the statistics or fetch the existing one
+        try:
+            self._shm = _shm.SharedMemory(name, create=True, size=size)
+            _Log.info(f"Successfully created statistics \"{name}\" of {len(self._keys)} keys")
+        except FileExistsError:
+            self._shm = _shm.SharedMemory(name)
+
+        # Raise error early if the existing memory was created with a different layout
+        if self._shm.size < size:
+            raise ValueError(f"Shared memory \"{name}\" is too small for its schema ({self._shm.size} < {size})")
+
+        self._pids = _np.ndarray((_MAX_PROCESSES,), dtype=_DTYPE, buffer=self._shm.buf)
+        self._all_counters = _np.ndarray(shape, dtype=_DTYPE, buffer=self._shm.buf, offset=self._pids.nbytes)
+
+    @property
+    def name(self) -> str:
+        """
+        Getter for the name of the statistics.
+        """
+        return self._name
+
+    def count(self, keys: tuple, written: bool):
+        """
+        Method used to count a read or a write of the keys, and the bytes transferred.
+
+        :param keys: Keys accessed
+        :param written: Whether the keys were written (or read)
+        """
+        try:
+            increments = self._increments[keys, written]
+        except KeyError:
+            accesses, transferred = (_WRITES, _BYTES_WRITTEN) if written else (_READS, _BYTES_READ)
+            indices = [self._keys.index(key) + 1 for key in keys]
+            increments = _np.zeros((len(self._keys) + 1, len(FIELDS)), dtype=_DTYPE)
+            increments[[0, *indices], accesses] = 1
+            increments[indices, transferred] = [self._sizes[key] for key in keys]
+            increments[0, transferred] = increments[indices, transferred].sum()
+            self._increments[keys, written] = increments
+
+        counters = self._counters()
+        counters += increments
+
+    def count_lock(self, wait: int):
+        """
+        Method used to count a lock acquisition of the segment.
+
+        :param wait: Time spent waiting for the lock (in nanoseconds)
+        """
+        counters = self._counters()[0]
+        counters[_LOCK_ACQUISITIONS] += 1
+        counters[_LOCK_WAIT_TOTAL] += wait
+        if wait > counters[_LOCK_WAIT_MAX]:
+            counters[_LOCK_WAIT_MAX] = wait
+
+    def get(self) -> dict:
+        """
+        Method used to retrieve the statistics of all processes (including the finished ones) and their totals.
+
+        :return: Dictionary of the total statistics, and the statistics of each process (by process id)
+        """
+        pids, counters = self._pids.copy(), self._all_counters.copy()
+        claimed = counters[pids != 0]
+
+        # The maximum wait is the maximum of all processes, the remaining statistics are summed
+        total = claimed.sum(axis=0)
+        total[:, _LOCK_WAIT_MAX] = claimed[:, :, _LOCK_WAIT_MAX].max(axis=0, initial=0)
+
+        return {
+            "total": self._to_dict(total),
+            "processes": {int(pid): self._to_dict(counters[slot]) for slot, pid in enumerate(pids) if pid}
+        }
+
+    def reset(self):
+        """
+        Method used to zero all counters, keeping the slots claimed.
+        """
+        self._all_counters[:] = 0
+
+    def unlink(self):
+        """
+        Method used to remove the statistics and their lock once no longer needed.
+
+        The processes which already opened the statistics can still count into them, but opening the statistics with
+        the same name creates new, zeroed ones.
+        """
+        self._shm.unlink()
+        self._lock.unlink()
+
+    def _counters(self) -> _np.ndarray:
+        """
+        Helper method used to retrieve the counters of the current process, claiming a slot if needed.
+
+        Slots owned by the processes which no longer exist are only claimed again if there are no free slots. If all
+        slots are taken, the counters are kept in the process' memory (and not visible to other processes).
+
+        :return: Counters of the segment and each key
+        """
+        pid = _os.getpid()
+        try:
+            return self._slots[pid]
+        except KeyError:
+            pass
+
+        self._lock.acquire()
+        try:
+            pids = self._pids.tolist()
+            slot = next((slot for slot, owner in enumerate(pids) if not owner), None)
+            if slot is None:
+                slot = next((slot for slot, owner in enumerate(pids) if not _psutil.pid_exists(owner)), None)
+
+            if slot is None:
+                _Log.warning(f"All {_MAX_PROCESSES} slots of {self._name} statistics are taken, not sharing them")
+                self._slots[pid] = _np.zeros(self._all_counters.shape[1:], dtype=_DTYPE)
+            else:
+                self._all_counters[slot] = 0
+                self._pids[slot] = pid
+                self._slots[pid] = self._all_counters[slot]
+        finally:
+            self._lock.release()
+
+        return self._slots[pid]
+
+    def _to_dict(self, counters: _np.ndarray) -> dict:
+        """
+        Helper method used to convert the counters of a slot into a dictionary.
+
+        :param counters: Counters of the segment and each key
+        :return: Dictionary of the statistics of the whole segment and each key
+        """
+        return {
+            "segment": dict(zip(FIELDS, counters[0].tolist())),
+            "keys": {key: dict(zip(KEY_FIELDS, counters[index, :len(KEY_FIELDS)].tolist()))
+                     for index, key in enumerate(self._keys, start=1)}
+        }
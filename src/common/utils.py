@@ -5,6 +5,7 @@ Common Utils
 Standard utils module storing common to the package classes, functions, constants, and other objects.
 """
 import os as _os
+import enum as _enum
 import psutil as _psutil
 import typing as _typing
 
@@ -27,7 +28,7 @@ GUI_LOADING_DIR = _os.path.join(ASSETS_DIR, "gui_loading")
 COMMON_LOGGER_DIR = _os.path.join(ASSETS_DIR, "common_logger")
 COMMON_LOCKS_DIR = _os.path.join(ASSETS_DIR, "common_locks")
 
-# Declare shared memory data mappings
+# Declare shared memory data mappings (the types of the values determine the binary layout of the memory)
 TRANSMISSION_DICT = {
     "T_HFP": 0,
     "T_HFS": 0,
@@ -43,18 +44,18 @@ TRANSMISSION_DICT = {
 }
 CONTROL_DICT = {
     "mode": 0,
-    "manual_yaw": 0,
-    "manual_pitch": 0,
-    "manual_roll": 0,
-    "manual_sway": 0,
-    "manual_surge": 0,
-    "manual_heave": 0,
-    "autonomous_yaw": 0,
-    "autonomous_pitch": 0,
-    "autonomous_roll": 0,
-    "autonomous_sway": 0,
-    "autonomous_surge": 0,
-    "autonomous_heave": 0
+    "manual_yaw": 0.0,
+    "manual_pitch": 0.0,
+    "manual_roll": 0.0,
+    "manual_sway": 0.0,
+    "manual_surge": 0.0,
+    "manual_heave": 0.0,
+    "autonomous_yaw": 0.0,
+    "autonomous_pitch": 0.0,
+    "autonomous_roll": 0.0,
+    "autonomous_sway": 0.0,
+    "autonomous_surge": 0.0,
+    "autonomous_heave": 0.0
 }
 RECEIVED_DICT = {
     "A_O": False,
@@ -63,6 +64,55 @@ RECEIVED_DICT = {
     "S_I": 0
 }
 
+# Declare the struct formats of the values of each type, used to build the binary layouts of the shared memory
+STRUCT_FORMATS = {bool: "?", int: "q", float: "d"}
+
+# Declare the byte order of the binary layouts - standard sizes and no padding, making them platform-independent
+STRUCT_BYTE_ORDER = "<"
+
+
+class LockType(_enum.Enum):
+    """
+    Enumeration for different types of inter-process locks guarding the shared memory segments.
+
+    The semaphore-based locks are only supported on POSIX systems with the `posix_ipc` package installed, the file-based
+    locks work everywhere.
+    """
+    FILE = 0
+    SEMAPHORE = 1
+
+
+class ReadMode(_enum.Enum):
+    """
+    Enumeration for different ways of reading the shared memory segments.
+
+    Locked reads acquire the segment's lock, sequence-locked reads retry on concurrent writes instead of locking.
+    Double-buffered segments are written into a back buffer which is then swapped with the front one, so the readers
+    always read the latest complete frame, without retrying on a concurrent write.
+    """
+    LOCKED = 0
+    SEQLOCK = 1
+    DOUBLE_BUFFER = 2
+
+
+def build_schema(name: str, data: dict, schema: _typing.Optional[dict] = None) -> dict:
+    """
+    Builds the schema (mapping of keys to struct formats) from the types of the initial values, unless provided.
+
+    :param name: Name of the shared memory object
+    :param data: Dictionary of values to store
+    :param schema: Dictionary of struct formats of the values, or None
+    :raises: ValueError
+    :return: Schema mapping the keys to struct formats
+    """
+    try:
+        schema = schema or {key: STRUCT_FORMATS[type(value)] for key, value in data.items()}
+    except KeyError as e:
+        raise ValueError(f"Can't build the schema of {name} shared memory - unsupported type {e}")
+    if schema.keys() != data.keys():
+        raise ValueError(f"Schema of {name} shared memory doesn't match the data keys")
+    return schema
+
 
 def get_processes(pid: int) -> _typing.List[_typing.Type[_psutil.Process]]:
     """
@@ -9,4 +9,9 @@ Communication tools handling the interaction (data exchange) between the surface
 """
 from .utils import *
 from .connection import Connection
+from .engine import ConnectionEngine, Endpoint, AsyncConnection
+from .datagram import ControlChannel
+from .channels import Multiplexer
+from .metrics import ConnectionMetrics
+from .simulator import RovSimulator
 from .stream import VideoStream
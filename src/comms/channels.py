@@ -0,0 +1,142 @@
+"""
+Channels
+========
+
+Module storing an implementation of the channels multiplexed over the framed protocol.
+
+The transfers of all channels share the connection with the transmission data, so a large transfer sent at once would
+delay the transmission data (and the control transfers) until it's fully sent. Instead, the transfers are queued by
+their channel, and only a limited number of bytes (`CHANNEL_BUDGET`) of the telemetry and bulk transfers is sent with
+each exchange, in chunks of at most `CHANNEL_CHUNK_SIZE` bytes, so the transmission data is never queued behind more
+than the budget.
+"""
+import collections as _collections
+import typing as _typing
+from .utils import Channel as _Channel, FrameType as _FrameType, CHANNEL_CHUNK_SIZE as _CHANNEL_CHUNK_SIZE, \
+    CHANNEL_BUDGET as _CHANNEL_BUDGET
+from .protocol import CHUNK_HEADER as _CHUNK_HEADER, SEQUENCE_RANGE as _SEQUENCE_RANGE, encode_frame as _encode_frame
+
+
+class Multiplexer:
+    """
+    Class representing the queues of the transfers of each channel, and the scheduler of their chunks.
+
+    The channels are served in the order of their priority (see :class:`Channel`) - the control transfers are always
+    sent whole (in chunks), and the telemetry and bulk transfers fill the remaining budget of the exchange, a channel
+    only being served once the channels before it have nothing waiting. The transfers of the same channel are sent in
+    the order they were queued.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create the queues
+        * pending - a getter to retrieve the number of queued bytes
+        * put - a method to queue a transfer
+        * pop - a method to retrieve the chunk frames to send with the next exchange
+        * rewind - a method to re-send the partially sent transfers from the start
+        * stats - a method to retrieve the counts of the queued and the sent transfers of each channel
+
+    Usage
+    -----
+
+    The transfers should be queued at any time::
+
+        multiplexer.put(Channel.BULK, data)
+
+    And the frames sent after the transmission data of each exchange::
+
+        sock.sendall(b"".join(multiplexer.pop()))
+    """
+
+    def __init__(self, chunk_size: int = _CHANNEL_CHUNK_SIZE, budget: int = _CHANNEL_BUDGET):
+        """
+        Standard constructor.
+
+        :param chunk_size: Maximum size of a chunk (in bytes)
+        :param budget: Maximum number of bytes of the telemetry and bulk transfers sent with each exchange
+        :raises: ValueError
+        """
+        if chunk_size < 1 or budget < 1:
+            raise ValueError(f"Chunk size and budget must be positive, got {chunk_size} and {budget}")
+
+        self._chunk_size = chunk_size
+        self._budget = budget
+
+        # Initialise the queue of each channel - the transfers' ids, data, and the number of bytes already sent
+        self._queues = {channel: _collections.deque() for channel in _Channel}
+        self._transfers = dict.fromkeys(_Channel, 0)
+        self._pending = 0
+        self._counts = {channel: dict.fromkeys(("queued", "sent", "sent_bytes"), 0) for channel in _Channel}
+
+    @property
+    def pending(self) -> int:
+        """
+        Getter for the number of queued bytes not sent yet.
+        """
+        return self._pending
+
+    def put(self, channel: _Channel, data: bytes):
+        """
+        Method used to queue a transfer.
+
+        :param channel: Channel to send the transfer over
+        :param data: Data to transfer
+        """
+        self._queues[channel].append([self._transfers[channel], memoryview(data), 0])
+        self._transfers[channel] = (self._transfers[channel] + 1) % _SEQUENCE_RANGE
+        self._pending += len(data)
+        self._counts[channel]["queued"] += 1
+
+    def pop(self) -> _typing.List[bytes]:
+        """
+        Method used to retrieve the chunk frames to send with the next exchange.
+
+        All chunks of the control transfers are retrieved, followed by the chunks of the other channels (in the order of
+        priority) until the budget is used.
+
+        :return: List of the chunk frames, in the order they should be sent
+        """
+        frames = list()
+        budget = self._budget
+
+        for channel, queue in self._queues.items():
+            while queue and (budget or channel == _Channel.CONTROL):
+                transfer = queue[0]
+                identifier, data, offset = transfer
+                size = min(self._chunk_size, len(data) - offset)
+                if channel != _Channel.CONTROL:
+                    size = min(size, budget)
+                    budget -= size
+
+                last = offset + size == len(data)
+                frames.append(_encode_frame(_CHUNK_HEADER.pack(channel, identifier, last) + data[offset:offset + size],
+                                            _FrameType.CHUNK))
+                transfer[2] += size
+                self._pending -= size
+                self._counts[channel]["sent_bytes"] += size
+
+                if last:
+                    queue.popleft()
+                    self._counts[channel]["sent"] += 1
+
+        return frames
+
+    def rewind(self):
+        """
+        Method used to re-send the partially sent transfers from the start (for example over a new connection, where
+        their first chunks were never received).
+        """
+        for queue in self._queues.values():
+            if queue:
+                self._pending += queue[0][2]
+                queue[0][2] = 0
+
+    def stats(self) -> dict:
+        """
+        Method used to retrieve the counts of the queued and the sent transfers of each channel.
+
+        :return: Dictionary of the counts of each channel (by name), and the number of queued bytes
+        """
+        return {**{channel.name: dict(counts) for channel, counts in self._counts.items()}, "pending": self._pending}
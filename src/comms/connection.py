@@ -3,14 +3,37 @@ Connection
 ==========
 
 Module storing an implementation of a socket-based connection with the ROV.
+
+The data is exchanged by a long-lived communication process, which is started once and kept running between the
+connections. Each new connection's socket is passed to the process (as a duplicated file descriptor), so reconnecting
+doesn't pay for starting a new process.
+
+The connection is considered lost if the server doesn't reply within `HEARTBEAT_TIMEOUT` seconds. The transmission data
+is then zeroed (failsafe), so that the stale values are never sent once the connection is re-established, and the
+connection is re-established by a watchdog thread.
 """
 import socket as _socket
+import struct as _struct
 import json as _json
+import queue as _queue
 import multiprocessing as _mp
 import threading as _threading
-from .utils import ConnectionStatus as _ConnectionStatus
+import time as _time
+import typing as _typing
+from multiprocessing import reduction as _reduction
+from .utils import ConnectionStatus as _ConnectionStatus, ConnectionProtocol as _ConnectionProtocol, \
+    FrameType as _FrameType, KEYFRAME_INTERVAL as _KEYFRAME_INTERVAL, KEEPALIVE_INTERVAL as _KEEPALIVE_INTERVAL, \
+    SEQUENCE_KEY as _SEQUENCE_KEY, HEARTBEAT_TIMEOUT as _HEARTBEAT_TIMEOUT, RECONNECT_DELAY as _RECONNECT_DELAY, \
+    RECONNECT_DELAY_MAX as _RECONNECT_DELAY_MAX, Channel as _Channel
+from .protocol import FrameDecoder as _FrameDecoder, new_frame_buffer as _new_frame_buffer, \
+    encode_frame as _encode_frame, SEQUENCE_RANGE as _SEQUENCE_RANGE, ChunkAssembler as _ChunkAssembler
+from .channels import Multiplexer as _Multiplexer
+from .metrics import ConnectionMetrics as _ConnectionMetrics
 from ..common import data_manager as _dm
-from ..common import Log as _Log
+from ..common import Log as _Log, Scheduler as _Scheduler, TRANSMISSION_DICT as _TRANSMISSION_DICT
+
+# Declare the maximum number of bytes received at once
+_RECEIVE_SIZE = 4096
 
 
 class Connection:
@@ -27,11 +50,23 @@ class Connection:
         * __init__ - a constructor to create and initialise socket and process related constructs
         * status - a getter to retrieve current connection status
         * connected - a getter to check if the communication is still happening
+        * stats - a method to retrieve the round-trip times and the rate of the exchanges
+        * send - a method to queue a transfer over one of the multiplexed channels
+        * receive - a method to retrieve a transfer received over the multiplexed channels
         * connect - a method used to connect with the ROV (spawns separate thread)
         * _connect - a method used to connect with the ROV
         * disconnect - a method used to disconnect with the ROV
         * reconnect - a helper method used to disconnect and connect in one step
+        * close - a method used to disconnect and stop the communication process
+        * _disconnect - a private method used to disconnect with the ROV (without stopping the watchdog)
+        * _watch - a private method which re-establishes the lost connections (watchdog)
+        * _serve - a private method which receives the connected sockets and communicates over each of them
+        * _failsafe - a private method which zeroes the transmission data and marks the connection as lost
         * _communicate - a private method which does the actual communication with the ROV (send and recv)
+        * _send_changes - a private method which waits for and sends the changed transmission data (delta mode)
+        * _send_transfers - a private method which sends the chunks of the queued transfers
+        * _receive - a private method which receives a single JSON dictionary
+        * _receive_frames - a private method which receives at least one complete frame and decodes the frames
         * _new_socket - a private method which re-initialises the socket
         * _new_process - a private method which re-initialises the process
         * _cleanup - a private method used to (attempt to) clean-up the resources
@@ -44,26 +79,69 @@ class Connection:
         connection = Connection()
         connection.connect()
 
-    While working, the code should check if the communication is happening, to detect when it stops::
+    To send the transmission data in its binary layout instead of JSON, or to exchange the data in frames (if supported
+    by the ROV), pass the protocol::
+
+        connection = Connection(protocol=ConnectionProtocol.FRAMED)
+
+    To only send the transmission data once it changes (and only the changed values), enable the delta mode::
+
+        connection = Connection(protocol=ConnectionProtocol.FRAMED, delta=True)
+
+    By default, the data is exchanged as fast as the server replies (or, in the delta mode, as the data changes). To
+    exchange the data at a fixed rate instead, pass the rate in Hz::
+
+        connection = Connection(rate=50)
+
+    Each exchange (sending the data and receiving the reply) is timed, and the round-trip times and the exchange rate
+    can be retrieved from any process::
+
+        connection.stats()["rtt_us"]["p50"]
+
+    To only time the replies which echo the sequence number of the sent data (the `SEQUENCE_KEY` value, if supported by
+    the ROV), enable the echo::
+
+        connection = Connection(echo=True)
+
+    In the `FRAMED` protocol, the transfers (for example logs or stills) can be sent and received over the multiplexed
+    channels (if supported by the ROV). The transmission data is sent first with each exchange, followed by the control
+    transfers and at most `CHANNEL_BUDGET` bytes of the other transfers, so the large transfers don't delay it::
+
+        connection.send(data, Channel.BULK)
+        channel, data = connection.receive(timeout=1)
+
+    Once connected, the connection is re-established whenever it's lost (the server disconnects, or doesn't reply within
+    the heartbeat timeout), until disconnected. The timeout can be adjusted to the expected round-trip time::
 
-        if not connection.connected():
-            connection.reconnect()
+        connection = Connection(heartbeat_timeout=0.5)
+
+    The liveness of the connection (whether the server replies) can be checked from any process::
+
+        connection.stats()["alive"]
 
     Once finished, to cleanup the resources, a disconnection should happen::
 
         connection.disconnect()
 
+    The communication process is kept running (idle) after disconnecting, to be reused by the next connection. To also
+    stop the process, close the connection instead::
+
+        connection.close()
+
     Note that the operating system should be capable of cleaning up any incorrectly closed sockets (upon
-    server-initiated disconnection, the sockets must (at least) go into the TIME_WAIT state), but the processes will not
-    be cleaned and persist as zombie processes.
+    server-initiated disconnection, the sockets must (at least) go into the TIME_WAIT state). The communication process
+    is a daemon, so it's terminated once the application exits, even if the connection wasn't closed.
 
     .. warning::
 
-        The calling functions must handle when the attempts to connect, disconnect etc. should be made, and detect when
-        the communication stops (for example by checking the status). This is NOT handled internally.
+        The watchdog only detects that the server stopped replying - the ROV must apply its own failsafe if the
+        transmission data stops arriving, since the zeroed data can't be sent over a lost connection.
     """
 
-    def __init__(self, ip: str = "localhost", *, port: int = 50000):
+    def __init__(self, ip: str = "localhost", *, port: int = 50000,
+                 protocol: _ConnectionProtocol = _ConnectionProtocol.JSON, delta: bool = False,
+                 rate: _typing.Optional[float] = None, echo: bool = False,
+                 heartbeat_timeout: float = _HEARTBEAT_TIMEOUT):
         """
         Standard constructor.
 
@@ -71,18 +149,61 @@ class Connection:
 
         :param ip: Ip of the server to connect to
         :param port: Port to connect to
+        :param protocol: Format of the transmission data sent to the server
+        :param delta: Whether to only send the transmission data changed since the last reply of the server
+        :param rate: Number of exchanges per second, or None to exchange the data as fast as possible
+        :param echo: Whether to send the sequence numbers, and only time the replies echoing them (JSON protocol only)
+        :param heartbeat_timeout: Maximum time to wait for the server's reply (in seconds) before the connection is lost
+        :raises: ValueError
         """
+        if delta and protocol == _ConnectionProtocol.BINARY:
+            raise ValueError("The delta mode requires the JSON or the FRAMED protocol")
+        if echo and protocol != _ConnectionProtocol.JSON:
+            raise ValueError("Echoing the sequence numbers requires the JSON protocol")
+        if rate is not None and rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        if heartbeat_timeout <= 0:
+            raise ValueError(f"Heartbeat timeout must be positive, got {heartbeat_timeout}")
+
         self._ip = ip
         self._port = port
+        self._protocol = protocol
+        self._delta = delta
+        self._rate = rate
+        self._echo = echo
+        self._heartbeat_timeout = heartbeat_timeout
         self._address = self._ip, self._port
 
+        # Initialise the metrics of the exchanges (shared with the communication process)
+        self._metrics = _ConnectionMetrics(f"connection_{self._port}")
+
+        # Initialise the queues of the sent and the received transfers (framed protocol only), and the multiplexer of
+        # the sent transfers (kept by the communication process between the connections)
+        framed = protocol == _ConnectionProtocol.FRAMED
+        self._outgoing = _mp.Queue() if framed else None
+        self._incoming = _mp.Queue() if framed else None
+        self._multiplexer = _Multiplexer()
+
         # Initialise the socket and the connection status
         self._socket = self._new_socket()
         self._status = _ConnectionStatus.DISCONNECTED
 
-        # Initialise the process for sending and receiving the data
+        # Initialise the pipe passing the connected sockets to the communication process, the number of the passed
+        # sockets, and the numbers of the finished and of the disconnected communications (shared with the process)
+        self._handles, self._process_handles = _mp.Pipe()
+        self._sessions = 0
+        self._finished = _mp.RawValue("Q", 0)
+        self._disconnected = _mp.RawValue("Q", 0)
+
+        # Initialise the process for sending and receiving the data (started with the first connection)
         self._process = self._new_process()
 
+        # Initialise the watchdog (started with the first connection), whether it should re-establish the connection,
+        # and the lock preventing the watchdog and the caller from connecting or disconnecting at the same time
+        self._watchdog = _threading.Thread(target=self._watch, daemon=True)
+        self._recover = False
+        self._lock = _threading.Lock()
+
     @property
     def status(self) -> _ConnectionStatus:
         """
@@ -93,14 +214,58 @@ class Connection:
     @property
     def connected(self) -> bool:
         """
-        Getter to check if the communication is happening.
+        Getter to check if the communication is happening (the process is communicating over the last passed socket,
+        which wasn't disconnected).
+        """
+        return self._process.is_alive() and max(self._finished.value, self._disconnected.value) < self._sessions
+
+    def stats(self) -> dict:
+        """
+        Method used to retrieve the metrics of the exchanges - the exchange rate and the round-trip times of the last
+        `METRICS_INTERVAL` seconds, and of all exchanges.
+
+        :return: Dictionary of the metrics (see :class:`ConnectionMetrics`)
+        """
+        return self._metrics.get()
+
+    def send(self, data: bytes, channel: _Channel = _Channel.BULK):
         """
-        return self._process.is_alive()
+        Method used to queue a transfer over one of the multiplexed channels (`FRAMED` protocol only).
+
+        The transfers queued while disconnected are sent once connected, and the transfer partially sent over a lost
+        connection is sent again from the start.
+
+        :param data: Data to transfer
+        :param channel: Channel to send the transfer over
+        :raises: ValueError
+        """
+        if self._outgoing is None:
+            raise ValueError("The channels require the FRAMED protocol")
+        self._outgoing.put((channel, data))
+
+    def receive(self, timeout: _typing.Optional[float] = 0) -> _typing.Optional[_typing.Tuple[_Channel, bytes]]:
+        """
+        Method used to retrieve a transfer received over the multiplexed channels (`FRAMED` protocol only).
+
+        :param timeout: Maximum time to wait for a transfer (in seconds), or None to wait indefinitely
+        :raises: ValueError
+        :return: Channel and data of the oldest received transfer, or None if nothing was received in time
+        """
+        if self._incoming is None:
+            raise ValueError("The channels require the FRAMED protocol")
+        try:
+            return self._incoming.get(timeout != 0, timeout)
+        except _queue.Empty:
+            return None
 
     def connect(self):
         """
-        Helper method used to connect in a non-blocking way (separate thread)
+        Helper method used to connect in a non-blocking way (separate thread), and start the watchdog.
         """
+        self._recover = True
+        if not self._watchdog.is_alive():
+            self._watchdog = _threading.Thread(target=self._watch, daemon=True)
+            self._watchdog.start()
         _threading.Thread(target=self._connect).start()
 
     def _connect(self):
@@ -111,46 +276,76 @@ class Connection:
 
             1. Set the status to `CONNECTING`
             2. Attempt to connect the client and the server sockets
-            3. Start the communication process
-            4. Set the status to `CONNECTED`
+            3. Start the communication process, unless it's already running
+            4. Pass the connected socket to the communication process
+            5. Set the status to `CONNECTED` (once the socket is counted, so the watchdog never sees it as lost)
 
         On errors, the status is set to `DISCONNECTED` and the cleanup function is called.
         """
-        if self._status != _ConnectionStatus.DISCONNECTED:
-            _Log.error(f"Can't' connect to {self._ip}:{self._port} - not disconnected (status is {self._status.name})")
-            return
-
-        _Log.info(f"Connecting to {self._ip}:{self._port}...")
-        self._status = _ConnectionStatus.CONNECTING
-        try:
-            self._socket.connect(self._address)
-            _Log.info(f"Connected to {self._ip}:{self._port}")
-            self._status = _ConnectionStatus.CONNECTED
-            self._process.start()
-        except (ConnectionError, OSError) as e:
-            _Log.error(f"Failed to connect to {self._ip}:{self._port} - {e}")
-            self._status = _ConnectionStatus.DISCONNECTED
-            self._cleanup(ignore_errors=True)
+        with self._lock:
+            if self._status != _ConnectionStatus.DISCONNECTED:
+                _Log.error(f"Can't' connect to {self._ip}:{self._port} - not disconnected "
+                           f"(status is {self._status.name})")
+                return
+
+            _Log.info(f"Connecting to {self._ip}:{self._port}...")
+            self._status = _ConnectionStatus.CONNECTING
+            try:
+                self._socket.connect(self._address)
+                if not self._process.is_alive():
+                    self._process = self._new_process()
+                    self._process.start()
+                _reduction.send_handle(self._handles, self._socket.fileno(), self._process.pid)
+                self._sessions += 1
+                _Log.info(f"Connected to {self._ip}:{self._port}")
+                self._status = _ConnectionStatus.CONNECTED
+            except (ConnectionError, OSError) as e:
+                _Log.error(f"Failed to connect to {self._ip}:{self._port} - {e}")
+                self._status = _ConnectionStatus.DISCONNECTED
+                self._cleanup(ignore_errors=True)
 
     def disconnect(self):
+        """
+        Method used to disconnect from the server, stop exchanging the data and stop re-establishing the connection.
+
+        See :func:`_disconnect` for more details.
+        """
+        self._recover = False
+        self._disconnect()
+
+    def _disconnect(self, lost: bool = False):
         """
         Method used to disconnect from the server and stop exchanging the data.
 
         Performs the cleanup and sets the status to `DISCONNECTED` on success, or leaves the status in its current state
-        on errors.
-        """
-        if self._status != _ConnectionStatus.CONNECTED:
-            _Log.error(f"Can't' disconnect from {self._ip}:{self._port} - not connected "
-                       f"(status is {self._status.name})")
-            return
+        on errors. The communication process stops communicating once the socket is shut down, and waits for the next
+        connection.
 
-        _Log.info(f"Disconnecting from {self._ip}:{self._port}...")
-        try:
-            self._cleanup()
-            _Log.info(f"Disconnected from {self._ip}:{self._port}")
-            self._status = _ConnectionStatus.DISCONNECTED
-        except (ConnectionError, OSError) as e:
-            _Log.error(f"Failed to disconnect from {self._ip}:{self._port} - {e}")
+        A lost connection is only disconnected if it's still lost once the lock is acquired, and the cleanup errors are
+        ignored (shutting down a socket reset by the server fails), so the status is always set to `DISCONNECTED`.
+
+        :param lost: Whether the connection is disconnected because it was lost (by the watchdog)
+        """
+        with self._lock:
+            if lost:
+                if self._status == _ConnectionStatus.CONNECTED and not self.connected:
+                    _Log.warning(f"Lost the connection to {self._ip}:{self._port}, reconnecting...")
+                    self._cleanup(ignore_errors=True)
+                    self._status = _ConnectionStatus.DISCONNECTED
+                return
+
+            if self._status != _ConnectionStatus.CONNECTED:
+                _Log.error(f"Can't' disconnect from {self._ip}:{self._port} - not connected "
+                           f"(status is {self._status.name})")
+                return
+
+            _Log.info(f"Disconnecting from {self._ip}:{self._port}...")
+            try:
+                self._cleanup()
+                _Log.info(f"Disconnected from {self._ip}:{self._port}")
+                self._status = _ConnectionStatus.DISCONNECTED
+            except (ConnectionError, OSError) as e:
+                _Log.error(f"Failed to disconnect from {self._ip}:{self._port} - {e}")
 
     def reconnect(self):
         """
@@ -160,54 +355,313 @@ class Connection:
         self.disconnect()
         self.connect()
 
-    def _communicate(self):
+    def close(self):
+        """
+        Method used to disconnect from the server (if connected), terminate the communication process and remove the
+        metrics. The connection can't be used afterwards.
+        """
+        self._recover = False
+        if self._status == _ConnectionStatus.CONNECTED:
+            self._disconnect()
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._metrics.close()
+        self._metrics.unlink()
+
+    def _watch(self):
+        """
+        Function used as a target for the watchdog thread - re-establishes the connection once it's lost, until
+        disconnected.
+
+        The connection is checked every `heartbeat_timeout` seconds. The failed attempts to connect are retried after
+        a delay, doubled after each failure (from `RECONNECT_DELAY` up to `RECONNECT_DELAY_MAX` seconds).
         """
-        Function used to exchange the data with the server.
+        delay = _RECONNECT_DELAY
 
-        Being a separate process, it is safe to let this function run in an infinite while loop, because to stop this
-        communication it is sufficient to stop (terminate) the process (OS-level interruption).
+        while self._recover:
+            _time.sleep(self._heartbeat_timeout)
 
-        Breaks the infinite loop on errors, leaving the calling code to accommodate for errors.
+            if self._status == _ConnectionStatus.CONNECTED and not self.connected and self._recover:
+                self._disconnect(lost=True)
+
+            if self._status == _ConnectionStatus.DISCONNECTED and self._recover:
+                self._connect()
+                if self._status == _ConnectionStatus.CONNECTED:
+                    delay = _RECONNECT_DELAY
+                else:
+                    _time.sleep(delay)
+                    delay = min(delay * 2, _RECONNECT_DELAY_MAX)
+
+    def _serve(self):
+        """
+        Function used to receive the connected sockets, and exchange the data over each of them until it's closed.
+
+        Being a separate process, it is safe to let this function run in an infinite while loop, because to stop it
+        it is sufficient to stop (terminate) the process (OS-level interruption). The shared memory segments and the
+        process' metrics are kept between the connections.
+
+        Once the communication stops, the failsafe is applied before the connection is reported as finished.
         """
         while True:
+            self._socket = _socket.socket(fileno=_reduction.recv_handle(self._process_handles))
+            self._socket.settimeout(self._heartbeat_timeout)
+            self._multiplexer.rewind()
             try:
-                _Log.debug("Fetching data for transmission")
-                data = _dm.transmission.get_all()
+                self._communicate()
+            finally:
+                self._socket.close()
+                self._failsafe()
+                self._finished.value += 1
+
+    def _failsafe(self):
+        """
+        Function used to zero the transmission data (so the thrusters aren't driven with the values from before the
+        connection was lost), and mark the connection as lost.
+        """
+        _dm.transmission.update(_TRANSMISSION_DICT)
+        self._metrics.expire()
+        _Log.info("Zeroed the transmission data (failsafe)")
+
+    def _communicate(self):
+        """
+        Function used to exchange the data with the server, until the socket is closed (by either side).
+
+        In the `BINARY` and `FRAMED` protocols, the transmission data is copied from the shared memory into a
+        pre-allocated buffer (the body of a pre-allocated frame in the `FRAMED` protocol) and sent as it is, so no
+        objects are created per value.
+
+        In the delta mode, only the data changed since the version replied to by the server is sent, once it changes.
+        See :func:`_send_changes` for more details.
+
+        If the rate is set, each exchange starts at the next tick of a fixed-rate scheduler, and the timing statistics
+        of the ticks are logged once the communication stops.
+
+        Each exchange is timed from sending the data until the reply is received, and recorded in the metrics. With the
+        echo enabled, only the replies echoing the sequence number of the sent data are recorded.
 
-                # Encode the transmission data as JSON and send the bytes to the server
-                _Log.debug(f"Sending transmission data - {data}")
-                self._socket.sendall(bytes(_json.dumps(data), encoding="utf-8"))
+        In the `FRAMED` protocol, the chunks of the queued transfers are sent after the transmission data. See
+        :func:`_send_transfers` for more details.
+
+        Breaks the infinite loop on errors, or if the server doesn't reply within the heartbeat timeout.
+        """
+        if self._protocol == _ConnectionProtocol.FRAMED:
+            buffer, body = _new_frame_buffer(_dm.transmission.layout.size, _FrameType.BINARY)
+        else:
+            buffer = body = bytearray(_dm.transmission.layout.size)
+        decoder = _FrameDecoder()
+        assembler = _ChunkAssembler()
+
+        # Remember the version of the data replied to by the server (None to send all data) and the last keyframe time
+        acknowledged, keyframe = None, 0.0
+        scheduler = _Scheduler(self._rate) if self._rate else None
+        sequence = 0
+
+        while True:
+            if scheduler:
+                scheduler.wait()
+
+            try:
+                sequence = (sequence + 1) % _SEQUENCE_RANGE
+                sent = _time.perf_counter_ns()
+
+                if self._delta:
+                    version, keyframe, sent = self._send_changes(acknowledged, keyframe, buffer, body, sequence)
+                elif self._protocol == _ConnectionProtocol.JSON:
+                    _Log.debug("Fetching data for transmission")
+                    data = _dm.transmission.get_all()
+                    if self._echo:
+                        data[_SEQUENCE_KEY] = sequence
+
+                    # Encode the transmission data as JSON and send the bytes to the server
+                    _Log.debug(f"Sending transmission data - {data}")
+                    self._socket.sendall(bytes(_json.dumps(data), encoding="utf-8"))
+                else:
+                    _dm.transmission.get_bytes(body)
+                    self._socket.sendall(buffer)
+
+                if self._protocol == _ConnectionProtocol.FRAMED:
+                    self._send_transfers()
 
                 _Log.debug("Receiving transmission data")
-                data = self._socket.recv(4096)
+                if self._protocol == _ConnectionProtocol.FRAMED:
+                    received = self._receive_frames(decoder, assembler)
+                else:
+                    received = self._receive()
 
-                # Exit if connection closed by server
-                if not data:
-                    _Log.info("Connection closed by server")
+                # Exit if connection closed by server or the data couldn't be decoded (any other reply is a heartbeat)
+                if received is None:
                     break
+                self._metrics.heartbeat()
+
+                # Record the round-trip time, removing the echoed sequence numbers from the received data
+                rtt = _time.perf_counter_ns() - sent
+                echoed = [data.pop(_SEQUENCE_KEY, None) for data in received if isinstance(data, dict)]
+                if not self._echo or sequence in echoed:
+                    self._metrics.record(rtt)
+
+                # The reply acknowledges the sent data, so the next changes are relative to it
+                if self._delta:
+                    acknowledged = version
+
+                # Only handle valid, non-empty data, skipping the data not matching the received segment's schema
+                for data in received:
+                    if data and isinstance(data, dict):
+                        _Log.debug(f"Received the following data - {data}")
+                        try:
+                            _dm.received.update(data)
+                            _dm.received_history.append(data)
+                        except (KeyError, ValueError, _struct.error) as e:
+                            _Log.error(f"Failed to store the following data: {data} - {e!r}")
+
+            except _socket.timeout:
+                _Log.warning(f"The server didn't reply within {self._heartbeat_timeout}s")
+                break
+            except (ConnectionError, OSError) as e:
+                if self._disconnected.value > self._finished.value:
+                    _Log.debug(f"Stopped communicating with the server after disconnecting - {e}")
+                else:
+                    _Log.error(f"An error occurred while communicating with the server - {e}")
+                break
 
-                try:
-                    data = _json.loads(data.decode("utf-8").strip())
-                except (UnicodeError, _json.JSONDecodeError) as e:
-                    _Log.debug(f"Failed to decode following data: {data} - {e}")
-                    break
+        if scheduler:
+            _Log.info(f"Communication timing statistics - {scheduler.stats()}")
 
-                # Only handle valid, non-empty data
-                if data and isinstance(data, dict):
-                    _Log.debug(f"Received the following data - {data}")
-                    _dm.received.update(data)
+    def _send_changes(self, acknowledged: _typing.Optional[int], keyframe: float, buffer: bytearray,
+                      body: memoryview, sequence: int) -> _typing.Tuple[int, float, int]:
+        """
+        Function used to wait for the transmission data to change, and send the changed values.
 
-            except (ConnectionError, OSError) as e:
-                _Log.error(f"An error occurred while communicating with the server - {e}")
+        The steps are as follows:
+
+            1. Send all values (keyframe) if nothing was acknowledged yet, or the last keyframe is `KEYFRAME_INTERVAL`
+               seconds old
+            2. Otherwise, wait (without polling) until the data changes, for at most `KEEPALIVE_INTERVAL` seconds -
+               unless the rate is set, in which case the scheduler already waited
+            3. Send the values changed since the acknowledged version - an empty update (keepalive) if none changed
+
+        In the `FRAMED` protocol, the keyframes are sent as (pre-allocated) binary frames, and the changes as JSON
+        frames.
+
+        :param acknowledged: Version of the data replied to by the server, or None if nothing was sent yet
+        :param keyframe: Time of the last keyframe (monotonic)
+        :param buffer: Pre-allocated buffer to send the keyframes from
+        :param body: View of the buffer to write the keyframes into
+        :param sequence: Sequence number of the sent data (sent in the JSON protocol, if the echo is enabled)
+        :raises: ConnectionError, OSError
+        :return: Version of the sent data, the time of the last keyframe, and the time the data was sent at (in
+            nanoseconds, for the round-trip time)
+        """
+        now = _time.monotonic()
+        if now - keyframe >= _KEYFRAME_INTERVAL:
+            acknowledged, keyframe = None, now
+        elif acknowledged is not None and not self._rate:
+            timeout = min(_KEEPALIVE_INTERVAL, keyframe + _KEYFRAME_INTERVAL - now)
+            _dm.transmission.wait_for_change(acknowledged, timeout)
+
+        data, version = _dm.transmission.get_changed(acknowledged)
+        sent = _time.perf_counter_ns()
+
+        if self._protocol == _ConnectionProtocol.JSON:
+            if self._echo:
+                data[_SEQUENCE_KEY] = sequence
+            self._socket.sendall(bytes(_json.dumps(data), encoding="utf-8"))
+        elif acknowledged is None:
+            _dm.transmission.layout.pack_into(body, 0, *data.values())
+            self._socket.sendall(buffer)
+        else:
+            self._socket.sendall(_encode_frame(bytes(_json.dumps(data), encoding="utf-8"), _FrameType.JSON))
+
+        return version, keyframe, sent
+
+    def _send_transfers(self):
+        """
+        Function used to queue the transfers passed to the process, and send the chunks of the current exchange.
+
+        All chunks of the control transfers are sent, followed by at most `CHANNEL_BUDGET` bytes of the telemetry and
+        the bulk transfers (see :class:`Multiplexer`).
+
+        :raises: ConnectionError, OSError
+        """
+        while True:
+            try:
+                self._multiplexer.put(*self._outgoing.get_nowait())
+            except _queue.Empty:
                 break
 
+        frames = self._multiplexer.pop()
+        if frames:
+            self._socket.sendall(b"".join(frames))
+
+    def _receive(self) -> _typing.Optional[list]:
+        """
+        Function used to receive a single chunk of data, expected to be a complete JSON dictionary.
+
+        :raises: ConnectionError, OSError
+        :return: List of the received data, or None if the connection was closed or the data couldn't be decoded
+        """
+        data = self._socket.recv(_RECEIVE_SIZE)
+
+        if not data:
+            _Log.info("Connection closed by server")
+            return None
+
+        try:
+            return [_json.loads(data.decode("utf-8").strip())]
+        except (UnicodeError, _json.JSONDecodeError) as e:
+            _Log.debug(f"Failed to decode following data: {data} - {e}")
+            return None
+
+    def _receive_frames(self, decoder: _FrameDecoder, assembler: _ChunkAssembler) -> _typing.Optional[list]:
+        """
+        Function used to receive the data until at least one data frame is complete, and decode the bodies of all
+        frames.
+
+        JSON bodies are decoded as dictionaries, binary bodies are decoded using the received segment's layout. Chunk
+        bodies are assembled into the transfers, which are passed to the `receive` method once complete.
+
+        :param decoder: Decoder buffering the incomplete frames between the calls
+        :param assembler: Assembler buffering the incomplete transfers between the calls
+        :raises: ConnectionError, OSError
+        :return: List of the received data, or None if the connection was closed or the data couldn't be decoded
+        """
+        received = list()
+
+        try:
+            while not received:
+                data = self._socket.recv(_RECEIVE_SIZE)
+
+                if not data:
+                    _Log.info("Connection closed by server")
+                    return None
+
+                for frame_type, body in decoder.feed(data):
+                    if frame_type == _FrameType.CHUNK:
+                        transfer = assembler.feed(body)
+                        if transfer:
+                            self._incoming.put(transfer)
+                    elif frame_type == _FrameType.JSON:
+                        received.append(_json.loads(body.decode("utf-8")))
+                    else:
+                        received.append(dict(zip(_dm.received.schema, _dm.received.layout.unpack(body))))
+
+            return received
+        except (ValueError, _struct.error) as e:
+            _Log.debug(f"Failed to decode the received frames - {e}")
+            return None
+
     def _new_socket(self) -> _socket.socket:
         """
         Function used as a default socket generator.
 
+        Nagle's algorithm is disabled, so the chunks sent after the transmission data aren't held back until the server
+        acknowledges it.
+
         :return: New, correctly configured socket object
         """
-        return _socket.socket()
+        sock = _socket.socket()
+        sock.setsockopt(_socket.IPPROTO_TCP, _socket.TCP_NODELAY, 1)
+        return sock
 
     def _new_process(self) -> _mp.Process:
         """
@@ -215,7 +669,7 @@ class Connection:
 
         :return: New, correctly configured process object
         """
-        return _mp.Process(target=self._communicate)
+        return _mp.Process(target=self._serve, daemon=True)
 
     def _cleanup(self, ignore_errors: bool = False):
         """
@@ -223,24 +677,21 @@ class Connection:
 
         The steps are as follows:
 
-            1. Terminate the process (if it's alive)
-            2. Create a new process
-            3. Shutdown and close the socket
-            4. Create a new socket
+            1. Shutdown and close the socket (which stops the process' communication)
+            2. Create a new socket
 
-        Errors can be optionally ignored with the `ignore_errors` flag.
+        Errors can be optionally ignored with the `ignore_errors` flag, in which case the socket is closed and created
+        again even if it couldn't be shut down.
 
         :param ignore_errors: Boolean determining whether the errors should be propagated or not
         """
+        self._disconnected.value = self._sessions
         try:
-            if self._process.is_alive():
-                self._process.terminate()
-            self._process = self._new_process()
             self._socket.shutdown(_socket.SHUT_RDWR)
-            self._socket.close()
-            self._socket = self._new_socket()
         except (ConnectionError, OSError) as e:
             if not ignore_errors:
                 raise e
             else:
                 _Log.debug(f"Connection ignoring the following error - {e}")
+        self._socket.close()
+        self._socket = self._new_socket()
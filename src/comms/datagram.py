@@ -0,0 +1,184 @@
+"""
+Datagram
+========
+
+Module storing an implementation of a UDP channel sending the transmission data (control values) to the ROV.
+
+The control values are latest-value-wins, so instead of the TCP connection (where a single lost segment delays all
+later values until it's re-sent), they can be sent as independent datagrams at a fixed rate. The ROV applies only the
+datagrams newer than the last applied one (see :class:`SequenceFilter`) and acknowledges them, and the lost datagrams
+are never re-sent, since the next datagram carries newer values anyway.
+"""
+import asyncio as _asyncio
+import random as _random
+import time as _time
+from .utils import ConnectionStatus as _ConnectionStatus, RECONNECT_DELAY as _RECONNECT_DELAY, \
+    RECONNECT_DELAY_MAX as _RECONNECT_DELAY_MAX, CONTROL_PORT as _CONTROL_PORT, CONTROL_RATE as _CONTROL_RATE, \
+    CONTROL_WINDOW as _CONTROL_WINDOW, CONTROL_TIMEOUT as _CONTROL_TIMEOUT
+from .protocol import AckWindow as _AckWindow, DATAGRAM_HEADER as _DATAGRAM_HEADER, SEQUENCE_RANGE as _SEQUENCE_RANGE
+from .engine import Endpoint as _Endpoint, ConnectionEngine as _ConnectionEngine
+from ..common import data_manager as _dm
+from ..common import Log as _Log, Scheduler as _Scheduler
+
+
+class _AckProtocol(_asyncio.DatagramProtocol):
+    """
+    Datagram protocol used to pass the received acknowledgements to the window.
+    """
+
+    def __init__(self, session: int, window: _AckWindow):
+        """
+        Standard constructor.
+
+        :param session: Session of the sent datagrams
+        :param window: Window of the datagrams waiting for the acknowledgement
+        """
+        self._session = session
+        self._window = window
+
+    def datagram_received(self, data: bytes, address: tuple):
+        """
+        Method used to acknowledge a datagram, ignoring the malformed acknowledgements and the ones of other sessions.
+
+        :param data: Received datagram
+        :param address: Address of the sender
+        """
+        if len(data) != _DATAGRAM_HEADER.size:
+            _Log.debug(f"Ignoring malformed acknowledgement from {address} - {data}")
+            return
+
+        session, sequence = _DATAGRAM_HEADER.unpack(data)
+        if session == self._session:
+            self._window.acknowledge(sequence, _time.perf_counter())
+
+    def error_received(self, exc: Exception):
+        """
+        Method used to log the errors reported by the operating system (for example when the port is unreachable).
+
+        :param exc: Reported error
+        """
+        _Log.debug(f"Control channel error - {exc}")
+
+
+class ControlChannel(_Endpoint):
+    """
+    Channel class used to send the transmission data to the ROV as UDP datagrams, served by a connection engine.
+
+    Each datagram carries the values laid out as in the transmission segment, prefixed by the channel's session (random
+    for each connection) and a sequence number. The status is `CONNECTED` while the ROV acknowledges the datagrams, and
+    `CONNECTING` if it didn't acknowledge any in the last `CONTROL_TIMEOUT` seconds. See :class:`Endpoint` for the API.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to register the channel with the engine
+        * serve - a coroutine which sends the datagrams until cancelled (ran by the engine)
+        * _communicate - a private coroutine which sends the datagrams at a fixed rate, and updates the status
+
+    Usage
+    -----
+
+    The channel should be served by the same engine as the connection receiving the data (which should not send the
+    transmission data any more)::
+
+        engine = ConnectionEngine()
+        connection = AsyncConnection(protocol=ConnectionProtocol.FRAMED, transmit=False, engine=engine)
+        channel = ControlChannel(engine=engine)
+        connection.connect()
+        channel.connect()
+    """
+
+    def __init__(self, ip: str = "localhost", *, port: int = _CONTROL_PORT, rate: float = _CONTROL_RATE,
+                 window: int = _CONTROL_WINDOW, engine: _ConnectionEngine = None):
+        """
+        Standard constructor.
+
+        :param ip: Ip of the server to send the datagrams to
+        :param port: Port to send the datagrams to
+        :param rate: Number of datagrams per second
+        :param window: Maximum number of datagrams waiting for the acknowledgement
+        :param engine: Engine to serve the channel, or None to create a new one
+        :raises: ValueError
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        if window < 1:
+            raise ValueError(f"Window size must be positive, got {window}")
+
+        self._rate = rate
+        self._window = window
+        super().__init__(ip, port, engine)
+
+    async def serve(self):
+        """
+        Coroutine used to open the channel and send the datagrams, re-opening it on errors.
+
+        Runs until cancelled by the engine. The delay between the attempts is doubled after each failed one (from
+        `RECONNECT_DELAY` up to `RECONNECT_DELAY_MAX` seconds), and reset once the ROV acknowledged any datagram.
+        """
+        loop = _asyncio.get_running_loop()
+        delay = _RECONNECT_DELAY
+
+        while True:
+            self.set_status(_ConnectionStatus.CONNECTING)
+            session = _random.getrandbits(32)
+            window = _AckWindow(self._window)
+
+            try:
+                transport, _ = await loop.create_datagram_endpoint(lambda: _AckProtocol(session, window),
+                                                                   remote_addr=(self._ip, self._port))
+            except OSError as e:
+                _Log.error(f"Failed to open the control channel to {self._ip}:{self._port} - {e}, retrying in "
+                           f"{delay}s")
+                await _asyncio.sleep(delay)
+                delay = min(delay * 2, _RECONNECT_DELAY_MAX)
+                continue
+
+            _Log.info(f"Opened the control channel to {self._ip}:{self._port} (session {session})")
+            try:
+                await self._communicate(transport, session, window)
+            except OSError as e:
+                _Log.error(f"An error occurred while sending the control datagrams - {e}")
+            finally:
+                transport.close()
+                _Log.info(f"Control channel statistics - {window.stats()}")
+
+            if window.last_acknowledged is not None:
+                delay = _RECONNECT_DELAY
+            _Log.info(f"Control channel to {self._ip}:{self._port} closed, re-opening in {delay}s")
+            await _asyncio.sleep(delay)
+            delay = min(delay * 2, _RECONNECT_DELAY_MAX)
+
+    async def _communicate(self, transport: _asyncio.DatagramTransport, session: int, window: _AckWindow):
+        """
+        Coroutine used to send the datagrams at a fixed rate, and update the status depending on the acknowledgements.
+
+        :param transport: Transport to send the datagrams with
+        :param session: Session of the datagrams
+        :param window: Window of the datagrams waiting for the acknowledgement
+        :raises: OSError
+        """
+        datagram = bytearray(_DATAGRAM_HEADER.size + _dm.transmission.layout.size)
+        body = memoryview(datagram)[_DATAGRAM_HEADER.size:]
+        scheduler = _Scheduler(self._rate)
+        sequence = 0
+
+        while True:
+            await scheduler.wait_async()
+            sequence = (sequence + 1) % _SEQUENCE_RANGE
+
+            _DATAGRAM_HEADER.pack_into(datagram, 0, session, sequence)
+            _dm.transmission.get_bytes(body)
+
+            # The transport may keep a reference to the unsent data, so the pre-allocated datagram is copied
+            now = _time.perf_counter()
+            transport.sendto(bytes(datagram))
+            window.sent(sequence, now)
+
+            acknowledged = window.last_acknowledged
+            if acknowledged is not None and now - acknowledged <= _CONTROL_TIMEOUT:
+                self.set_status(_ConnectionStatus.CONNECTED)
+            else:
+                self.set_status(_ConnectionStatus.CONNECTING)
@@ -0,0 +1,585 @@
+"""
+Engine
+======
+
+Module storing an asyncio-based implementation of the connections with the ROV (and any other endpoints).
+
+All connections registered with a single engine are served by one event loop, within one long-lived process, so
+connecting, disconnecting and reconnecting doesn't spawn any processes, and each connection reconnects by itself (with
+an exponential backoff) when it drops.
+"""
+import abc as _abc
+import asyncio as _asyncio
+import json as _json
+import multiprocessing as _mp
+import queue as _queue
+import struct as _struct
+import typing as _typing
+from .utils import ConnectionStatus as _ConnectionStatus, ConnectionProtocol as _ConnectionProtocol, \
+    FrameType as _FrameType, RECONNECT_DELAY as _RECONNECT_DELAY, RECONNECT_DELAY_MAX as _RECONNECT_DELAY_MAX, \
+    CONNECT_TIMEOUT as _CONNECT_TIMEOUT, DISCONNECT_TIMEOUT as _DISCONNECT_TIMEOUT, Channel as _Channel
+from .protocol import FrameDecoder as _FrameDecoder, new_frame_buffer as _new_frame_buffer, \
+    encode_frame as _encode_frame, ChunkAssembler as _ChunkAssembler
+from ..common import data_manager as _dm
+from ..common import Log as _Log, Scheduler as _Scheduler
+
+# Declare the maximum number of bytes received at once
+_RECEIVE_SIZE = 4096
+
+
+class ConnectionEngine:
+    """
+    Engine class used to serve multiple connections within a single event loop, in a separate, long-lived process.
+
+    The connections are enabled and disabled by the commands sent to the engine's process, and each enabled connection
+    is served by its own task. The tasks keep reconnecting until the connection is disabled.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create the commands pipe
+        * alive - a getter to check if the engine's process is running
+        * register - a method to register a connection (before the engine is started)
+        * start - a method to start the engine's process (if not running)
+        * stop - a method to stop the engine's process
+        * enable - a method to start serving a connection
+        * disable - a method to stop serving a connection, and wait until it's disconnected
+        * _run - a private method which runs the event loop (target of the process)
+        * _serve - a private coroutine which executes the commands until the process is terminated
+        * _finished - a private callback which handles the tasks stopped by unexpected errors
+
+    Usage
+    -----
+
+    The engine should be shared by all connections which should be served by a single process::
+
+        engine = ConnectionEngine()
+        rov = AsyncConnection(port=50000, engine=engine)
+        micro = AsyncConnection(port=50001, engine=engine)
+        rov.connect()
+        micro.connect()
+
+    The process is started when any connection connects, and keeps running (even with all connections disconnected)
+    until it's stopped::
+
+        engine.stop()
+    """
+
+    def __init__(self):
+        """
+        Standard constructor.
+        """
+        self._connections = list()
+        self._pipe, self._engine_pipe = _mp.Pipe()
+        self._process = None
+
+    @property
+    def alive(self) -> bool:
+        """
+        Getter to check if the engine's process is running.
+        """
+        return self._process is not None and self._process.is_alive()
+
+    def register(self, connection: "Endpoint") -> int:
+        """
+        Method used to register a connection to be served by the engine.
+
+        The connections are passed to the engine's process when it starts, so they must be registered before.
+
+        :param connection: Connection to register
+        :raises: ValueError
+        :return: Index of the connection, used to enable and disable it
+        """
+        if self.alive:
+            raise ValueError("Can't register a connection while the engine is running - stop it first")
+
+        self._connections.append(connection)
+        return len(self._connections) - 1
+
+    def start(self):
+        """
+        Method used to start the engine's process, unless it's already running.
+        """
+        if self.alive:
+            return
+
+        _Log.info(f"Starting the connection engine with {len(self._connections)} connection(s)")
+        self._process = _mp.Process(target=self._run, daemon=True)
+        self._process.start()
+
+    def stop(self):
+        """
+        Method used to stop the engine's process, closing all connections.
+        """
+        if self.alive:
+            _Log.info("Stopping the connection engine")
+            self._process.terminate()
+            self._process.join()
+
+        # Discard any confirmations which weren't waited for
+        while self._pipe.poll():
+            self._pipe.recv()
+
+    def enable(self, index: int):
+        """
+        Method used to start serving a connection (starting the engine if needed).
+
+        :param index: Index of the connection
+        """
+        self.start()
+        self._pipe.send((index, True))
+
+    def disable(self, index: int) -> bool:
+        """
+        Method used to stop serving a connection, and wait (for at most `DISCONNECT_TIMEOUT` seconds) until it's closed.
+
+        :param index: Index of the connection
+        :return: True if the engine confirmed the disconnection, False otherwise
+        """
+        if not self.alive:
+            return True
+
+        self._pipe.send((index, False))
+        while self._pipe.poll(_DISCONNECT_TIMEOUT):
+            if self._pipe.recv() == index:
+                return True
+        return False
+
+    def _run(self):
+        """
+        Function used to run the event loop, as a target for the engine's process.
+        """
+        try:
+            _asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def _serve(self):
+        """
+        Coroutine used to execute the commands - start a task serving each enabled connection, and cancel the task of
+        each disabled connection (confirming it once the connection is closed).
+
+        The commands are read as soon as the pipe is readable, without blocking the event loop.
+        """
+        loop = _asyncio.get_running_loop()
+        commands = _asyncio.Queue()
+        tasks = dict()
+
+        def _read_commands():
+            while self._engine_pipe.poll():
+                commands.put_nowait(self._engine_pipe.recv())
+
+        # Nothing is served after a restart until it's enabled again
+        for connection in self._connections:
+            connection.set_status(_ConnectionStatus.DISCONNECTED)
+
+        loop.add_reader(self._engine_pipe.fileno(), _read_commands)
+        while True:
+            index, enabled = await commands.get()
+            task = tasks.get(index)
+
+            if enabled:
+                if task is None or task.done():
+                    tasks[index] = loop.create_task(self._connections[index].serve())
+                    tasks[index].add_done_callback(lambda finished, i=index: self._finished(finished, i))
+                continue
+
+            if task is not None:
+                task.cancel()
+                await _asyncio.gather(task, return_exceptions=True)
+                del tasks[index]
+            self._connections[index].set_status(_ConnectionStatus.DISCONNECTED)
+            self._engine_pipe.send(index)
+
+    def _finished(self, task: _asyncio.Task, index: int):
+        """
+        Callback used to log the unexpected error which stopped a connection's task, and mark it as disconnected, so
+        that the calling code can connect it again.
+
+        :param task: Finished task
+        :param index: Index of the connection
+        """
+        if not task.cancelled() and task.exception() is not None:
+            _Log.error(f"Connection {index} stopped due to an unexpected error - {task.exception()!r}")
+            self._connections[index].set_status(_ConnectionStatus.DISCONNECTED)
+
+
+class Endpoint(_abc.ABC):
+    """
+    Abstract class representing an endpoint served by a connection engine.
+
+    Provides the same `connect`, `disconnect`, `reconnect`, `status` and `connected` API as :class:`Connection`, but
+    instead of a new thread and process per connection attempt, the endpoint is served by a coroutine within the
+    engine's process, which is also responsible for re-establishing the communication whenever it drops.
+
+    The status is kept in the shared memory, so it's updated by the engine's process and visible in the calling process.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to register the endpoint with the engine
+        * status - a getter to retrieve current connection status
+        * connected - a getter to check if the communication is still happening (or being re-established)
+        * connect - a method used to start connecting with the ROV (non-blocking)
+        * disconnect - a method used to disconnect with the ROV
+        * reconnect - a helper method used to disconnect and connect in one step
+        * set_status - a method used by the engine to update the status
+        * serve - an abstract coroutine which communicates with the ROV until cancelled (ran by the engine)
+
+    Usage
+    -----
+
+    The subclasses must implement the `serve` coroutine, and keep the status up to date.
+    """
+
+    def __init__(self, ip: str, port: int, engine: _typing.Optional[ConnectionEngine]):
+        """
+        Standard constructor.
+
+        Registers the endpoint with the engine (a new engine if not given), and sets the initial status of the
+        connection as `DISCONNECTED`.
+
+        :param ip: Ip of the server to connect to
+        :param port: Port to connect to
+        :param engine: Engine to serve the endpoint, or None to create a new one
+        :raises: ValueError
+        """
+        self._ip = ip
+        self._port = port
+        self._status = _mp.RawValue("b", _ConnectionStatus.DISCONNECTED.value)
+
+        self._engine = engine if engine is not None else ConnectionEngine()
+        self._index = self._engine.register(self)
+
+    @property
+    def status(self) -> _ConnectionStatus:
+        """
+        Getter for the connection status (always `DISCONNECTED` if the engine isn't running).
+        """
+        if not self._engine.alive:
+            return _ConnectionStatus.DISCONNECTED
+        return _ConnectionStatus(self._status.value)
+
+    @property
+    def connected(self) -> bool:
+        """
+        Getter to check if the communication is happening (or being re-established by the engine).
+        """
+        return self._engine.alive and self.status != _ConnectionStatus.DISCONNECTED
+
+    def connect(self):
+        """
+        Method used to start connecting to the server, without waiting for the connection.
+
+        The status is set to `CONNECTING` by the engine once it starts connecting, and to `CONNECTED` once connected.
+        """
+        if self.status != _ConnectionStatus.DISCONNECTED:
+            _Log.error(f"Can't' connect to {self._ip}:{self._port} - not disconnected (status is {self.status.name})")
+            return
+
+        _Log.info(f"Connecting to {self._ip}:{self._port}...")
+        self._engine.enable(self._index)
+
+    def disconnect(self):
+        """
+        Method used to disconnect from the server and stop exchanging the data.
+
+        Waits until the engine closes the connection, and leaves the status in its current state if it doesn't.
+        """
+        if not self._engine.alive:
+            _Log.error(f"Can't' disconnect from {self._ip}:{self._port} - engine not running")
+            return
+
+        _Log.info(f"Disconnecting from {self._ip}:{self._port}...")
+        if self._engine.disable(self._index):
+            _Log.info(f"Disconnected from {self._ip}:{self._port}")
+        else:
+            _Log.error(f"Failed to disconnect from {self._ip}:{self._port} - engine not responding")
+
+    def reconnect(self):
+        """
+        Method used to reconnect to the server (disconnect and connect).
+        """
+        _Log.info(f"Reconnecting to {self._ip}:{self._port}...")
+        self.disconnect()
+        self.connect()
+
+    def set_status(self, status: _ConnectionStatus):
+        """
+        Method used by the engine to update the connection status.
+
+        :param status: New status of the connection
+        """
+        self._status.value = status.value
+
+    @_abc.abstractmethod
+    async def serve(self):
+        """
+        Coroutine used to communicate with the server until cancelled by the engine.
+        """
+
+
+class AsyncConnection(Endpoint):
+    """
+    Connection class used as a two-way data exchange medium, served by a connection engine.
+
+    The data is exchanged by non-blocking coroutines within the engine's process, which also reconnects whenever the
+    connection drops - waiting `RECONNECT_DELAY` seconds after the first failed attempt, doubled after each next one (up
+    to `RECONNECT_DELAY_MAX` seconds). See :class:`Endpoint` for the API.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to register the connection with the engine
+        * receive - a method used to retrieve a transfer received over the multiplexed channels
+        * serve - a coroutine which connects, communicates and reconnects until cancelled (ran by the engine)
+        * _communicate - a private coroutine which does the actual communication with the ROV (send and recv)
+        * _send - a private coroutine which sends the transmission data
+        * _receive - a private coroutine which receives a single JSON dictionary
+        * _receive_frames - a private coroutine which receives at least one complete data frame and decodes the frames
+
+    Usage
+    -----
+
+    The connection should be created (and used) like the :class:`Connection`::
+
+        connection = AsyncConnection()
+        connection.connect()
+
+    Multiple connections can share an engine, to be served in one process (see :class:`ConnectionEngine`)::
+
+        connection = AsyncConnection(port=50001, engine=engine)
+
+    Since the connection drops are handled by the engine, the calling code only has to connect once, and disconnect
+    once finished::
+
+        connection.disconnect()
+
+    If the transmission data is sent by a different channel (see :class:`ControlChannel`), the connection can send
+    empty updates instead, only to receive the data::
+
+        connection = AsyncConnection(protocol=ConnectionProtocol.FRAMED, transmit=False, engine=engine)
+
+    In the `FRAMED` protocol, the transfers sent by the ROV over the multiplexed channels are assembled from their
+    chunks, and can be retrieved like from the :class:`Connection`::
+
+        channel, data = connection.receive(timeout=1)
+
+    .. note::
+
+        All connections exchange the transmission and the received memory segments.
+    """
+
+    def __init__(self, ip: str = "localhost", *, port: int = 50000,
+                 protocol: _ConnectionProtocol = _ConnectionProtocol.JSON, rate: _typing.Optional[float] = None,
+                 transmit: bool = True, engine: ConnectionEngine = None):
+        """
+        Standard constructor.
+
+        :param ip: Ip of the server to connect to
+        :param port: Port to connect to
+        :param protocol: Format of the transmission data sent to the server
+        :param rate: Number of exchanges per second, or None to exchange the data as fast as possible
+        :param transmit: Whether to send the transmission data, or empty updates (JSON and FRAMED protocols only)
+        :param engine: Engine to serve the connection, or None to create a new one
+        :raises: ValueError
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        if not transmit and protocol == _ConnectionProtocol.BINARY:
+            raise ValueError("Sending empty updates requires the JSON or the FRAMED protocol")
+
+        self._protocol = protocol
+        self._rate = rate
+        self._transmit = transmit
+        self._incoming = _mp.Queue() if protocol == _ConnectionProtocol.FRAMED else None
+        super().__init__(ip, port, engine)
+
+    def receive(self, timeout: _typing.Optional[float] = 0) -> _typing.Optional[_typing.Tuple[_Channel, bytes]]:
+        """
+        Method used to retrieve a transfer received over the multiplexed channels (`FRAMED` protocol only).
+
+        :param timeout: Maximum time to wait for a transfer (in seconds), or None to wait indefinitely
+        :raises: ValueError
+        :return: Channel and data of the oldest received transfer, or None if nothing was received in time
+        """
+        if self._incoming is None:
+            raise ValueError("The channels require the FRAMED protocol")
+        try:
+            return self._incoming.get(timeout != 0, timeout)
+        except _queue.Empty:
+            return None
+
+    async def serve(self):
+        """
+        Coroutine used to connect to the server, exchange the data, and reconnect when the connection drops.
+
+        Runs until cancelled by the engine. The delay between the attempts is reset once connected.
+        """
+        delay = _RECONNECT_DELAY
+
+        while True:
+            self.set_status(_ConnectionStatus.CONNECTING)
+            try:
+                reader, writer = await _asyncio.wait_for(_asyncio.open_connection(self._ip, self._port),
+                                                         _CONNECT_TIMEOUT)
+            except (_asyncio.TimeoutError, ConnectionError, OSError) as e:
+                _Log.error(f"Failed to connect to {self._ip}:{self._port} - {e}, retrying in {delay}s")
+                await _asyncio.sleep(delay)
+                delay = min(delay * 2, _RECONNECT_DELAY_MAX)
+                continue
+
+            _Log.info(f"Connected to {self._ip}:{self._port}")
+            self.set_status(_ConnectionStatus.CONNECTED)
+            delay = _RECONNECT_DELAY
+
+            try:
+                await self._communicate(reader, writer)
+            except (ConnectionError, OSError) as e:
+                _Log.error(f"An error occurred while communicating with the server - {e}")
+            finally:
+                writer.close()
+
+            _Log.info(f"Connection to {self._ip}:{self._port} lost, reconnecting in {delay}s")
+            self.set_status(_ConnectionStatus.CONNECTING)
+            await _asyncio.sleep(delay)
+
+    async def _communicate(self, reader: _asyncio.StreamReader, writer: _asyncio.StreamWriter):
+        """
+        Coroutine used to exchange the data with the server, until the connection is closed.
+
+        If the rate is set, each exchange starts at the next tick of a fixed-rate scheduler, and the timing statistics
+        of the ticks are logged once the communication stops.
+
+        The received data not matching the received segment's schema (unexpected keys or types) is logged and skipped,
+        so that it never stops the connection.
+
+        :param reader: Stream to receive the data from
+        :param writer: Stream to send the data to
+        :raises: ConnectionError, OSError
+        """
+        if self._protocol == _ConnectionProtocol.FRAMED:
+            buffer, body = _new_frame_buffer(_dm.transmission.layout.size, _FrameType.BINARY)
+        else:
+            buffer = body = bytearray(_dm.transmission.layout.size)
+        decoder = _FrameDecoder()
+        assembler = _ChunkAssembler()
+        scheduler = _Scheduler(self._rate) if self._rate else None
+
+        try:
+            while True:
+                if scheduler:
+                    await scheduler.wait_async()
+
+                await self._send(writer, buffer, body)
+
+                if self._protocol == _ConnectionProtocol.FRAMED:
+                    received = await self._receive_frames(reader, decoder, assembler)
+                else:
+                    received = await self._receive(reader)
+
+                # Exit if connection closed by server or the data couldn't be decoded
+                if received is None:
+                    break
+
+                # Only handle valid, non-empty data, skipping the data not matching the received segment's schema
+                for data in received:
+                    if data and isinstance(data, dict):
+                        _Log.debug(f"Received the following data - {data}")
+                        try:
+                            _dm.received.update(data)
+                            _dm.received_history.append(data)
+                        except (KeyError, ValueError, _struct.error) as e:
+                            _Log.error(f"Failed to store the following data: {data} - {e!r}")
+        finally:
+            if scheduler:
+                _Log.info(f"Communication timing statistics - {scheduler.stats()}")
+
+    async def _send(self, writer: _asyncio.StreamWriter, buffer: bytearray, body: memoryview):
+        """
+        Coroutine used to send the transmission data (or an empty update), waiting only if the stream's buffer is full.
+
+        The transport may keep a reference to the unsent data, so the pre-allocated buffer is copied before it's sent.
+
+        :param writer: Stream to send the data to
+        :param buffer: Pre-allocated buffer to send the binary data from
+        :param body: View of the buffer to write the binary data into
+        :raises: ConnectionError, OSError
+        """
+        if not self._transmit:
+            writer.write(b"{}" if self._protocol == _ConnectionProtocol.JSON
+                         else _encode_frame(b"{}", _FrameType.JSON))
+        elif self._protocol == _ConnectionProtocol.JSON:
+            data = _dm.transmission.get_all()
+            _Log.debug(f"Sending transmission data - {data}")
+            writer.write(bytes(_json.dumps(data), encoding="utf-8"))
+        else:
+            _dm.transmission.get_bytes(body)
+            writer.write(bytes(buffer))
+        await writer.drain()
+
+    async def _receive(self, reader: _asyncio.StreamReader) -> _typing.Optional[list]:
+        """
+        Coroutine used to receive a single chunk of data, expected to be a complete JSON dictionary.
+
+        :param reader: Stream to receive the data from
+        :raises: ConnectionError, OSError
+        :return: List of the received data, or None if the connection was closed or the data couldn't be decoded
+        """
+        data = await reader.read(_RECEIVE_SIZE)
+
+        if not data:
+            _Log.info("Connection closed by server")
+            return None
+
+        try:
+            return [_json.loads(data.decode("utf-8").strip())]
+        except (UnicodeError, _json.JSONDecodeError) as e:
+            _Log.debug(f"Failed to decode following data: {data} - {e}")
+            return None
+
+    async def _receive_frames(self, reader: _asyncio.StreamReader, decoder: _FrameDecoder,
+                              assembler: _ChunkAssembler) -> _typing.Optional[list]:
+        """
+        Coroutine used to receive the data until at least one data frame is complete, and decode the bodies of all
+        frames.
+
+        JSON bodies are decoded as dictionaries, binary bodies are decoded using the received segment's layout. Chunk
+        bodies are assembled into the transfers, which are passed to the `receive` method once complete.
+
+        :param reader: Stream to receive the data from
+        :param decoder: Decoder buffering the incomplete frames between the calls
+        :param assembler: Assembler buffering the incomplete transfers between the calls
+        :raises: ConnectionError, OSError
+        :return: List of the received data, or None if the connection was closed or the data couldn't be decoded
+        """
+        received = list()
+
+        try:
+            while not received:
+                data = await reader.read(_RECEIVE_SIZE)
+
+                if not data:
+                    _Log.info("Connection closed by server")
+                    return None
+
+                for frame_type, body in decoder.feed(data):
+                    if frame_type == _FrameType.CHUNK:
+                        transfer = assembler.feed(body)
+                        if transfer:
+                            self._incoming.put(transfer)
+                    elif frame_type == _FrameType.JSON:
+                        received.append(_json.loads(body.decode("utf-8")))
+                    else:
+                        received.append(dict(zip(_dm.received.schema, _dm.received.layout.unpack(body))))
+
+            return received
+        except (ValueError, _struct.error) as e:
+            _Log.debug(f"Failed to decode the received frames - {e}")
+            return None
@@ -0,0 +1,298 @@
+"""
+Metrics
+=======
+
+Module storing an implementation of the connection metrics - the round-trip times and the rate of the exchanges, and
+the liveness of the connection.
+
+The metrics are recorded by the communication process, and kept in shared memory so that any process (for example
+the GUI) can read them while the connection is running. The writes are marked with a sequence counter (like the data
+manager's segments in the `SEQLOCK` read mode), so the readers never see a mix of old and new values.
+"""
+import struct as _struct
+import time as _time
+from multiprocessing import shared_memory as _shm
+from .utils import METRICS_INTERVAL as _METRICS_INTERVAL
+from ..common import Log as _Log, Histogram as _Histogram, STRUCT_BYTE_ORDER as _BYTE_ORDER
+
+# Declare the sequence counter, odd while the metrics are being written
+_SEQUENCE = _struct.Struct(_BYTE_ORDER + "Q")
+
+# Declare the counters - the number of all exchanges, the start and the end (monotonic, in nanoseconds) of the last
+# completed interval, the last round-trip time (in nanoseconds), the liveness flag and the time of the last reply
+# (monotonic, in nanoseconds)
+_EXCHANGES, _INTERVAL_START, _INTERVAL_END, _LAST_RTT, _ALIVE, _LAST_REPLY = range(6)
+_COUNTERS = _struct.Struct(_BYTE_ORDER + "6q")
+_COUNTER = _struct.Struct(_BYTE_ORDER + "q")
+
+# Declare the offsets of the counters and the histograms, placed after the sequence counter
+_COUNTERS_OFFSET = _SEQUENCE.size
+_HISTOGRAMS_OFFSET = _COUNTERS_OFFSET + _COUNTERS.size
+
+# Declare the number of attempts to read consistent metrics, before reading them regardless (the writer was terminated
+# in the middle of a write)
+_SEQLOCK_RETRIES = 100
+
+
+class ConnectionMetrics:
+    """
+    Class representing the metrics of a connection, kept in the shared memory.
+
+    Two histograms of the round-trip times are kept - one of all exchanges, and one of the last completed interval (of
+    `METRICS_INTERVAL` seconds), which is used to calculate the current exchange rate and percentiles. The exchanges of
+    the interval in progress are recorded in the process' memory, and published once the interval completes.
+
+    The liveness flag is set with each reply of the server, and cleared once the connection is considered lost.
+
+    The metrics should only be recorded by a single process (and thread). Each write is marked with an odd sequence
+    counter, and the readers retry until the counter is even and unchanged. Only clearing the liveness flag (a single
+    value) is not marked, so that it can be done by a different thread.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create or fetch the shared memory object
+        * record - a method to record the round-trip time of an exchange
+        * heartbeat - a method to mark the connection as alive
+        * expire - a method to mark the connection as lost
+        * alive - a getter to check if the connection is alive
+        * get - a method to retrieve the metrics
+        * reset - a method to zero all metrics
+        * close - a method to release the shared memory in the current process
+        * unlink - a method to remove the shared memory once no longer needed
+        * _publish - a helper method to publish the interval in progress
+        * _snapshot - a helper method to copy the counters and the histograms
+        * _counter - a helper method to read a counter
+        * _set_counter - a helper method to write a counter
+        * _begin_write - a helper method to mark the start of a write
+        * _end_write - a helper method to mark the end of a write
+
+    Usage
+    -----
+
+    The metrics should be recorded by the process exchanging the data::
+
+        metrics.record(time.perf_counter_ns() - sent)
+
+    And can then be read from any process::
+
+        metrics.get()["rtt_us"]["p99"]
+
+    Once no longer needed, the metrics should be closed in each process, and removed::
+
+        metrics.close()
+        metrics.unlink()
+    """
+
+    def __init__(self, name: str):
+        """
+        Standard constructor.
+
+        Builds a shared memory object or fetches it if it already exists.
+
+        :param name: Name of the memory object
+        :raises: ValueError
+        """
+        self._name = name
+        size = _HISTOGRAMS_OFFSET + 2 * _Histogram.size()
+
+        # Create a shared memory object to store the metrics or fetch the existing one
+        try:
+            self._shm = _shm.SharedMemory(name, create=True, size=size)
+            _Log.info(f"Successfully created connection metrics \"{name}\"")
+        except FileExistsError:
+            self._shm = _shm.SharedMemory(name)
+
+        # Raise error early if the existing memory was created with a different layout
+        if self._shm.size < size:
+            raise ValueError(f"Shared memory \"{name}\" is too small for the metrics ({self._shm.size} < {size})")
+
+        self._buf = self._shm.buf
+        self._size = size
+        self._all = _Histogram(buffer=self._buf[_HISTOGRAMS_OFFSET:_HISTOGRAMS_OFFSET + _Histogram.size()])
+        self._interval = _Histogram(buffer=self._buf[_HISTOGRAMS_OFFSET + _Histogram.size():size])
+
+        # Initialise the interval in progress (in the process' memory)
+        self._current = _Histogram()
+        self._current_start = None
+
+    def record(self, rtt: int):
+        """
+        Method used to record the round-trip time of an exchange, publishing the interval if it's completed.
+
+        :param rtt: Round-trip time (in nanoseconds)
+        """
+        now = _time.monotonic_ns()
+        if self._current_start is None:
+            self._current_start = now
+
+        self._current.record(rtt)
+        sequence = self._begin_write()
+        try:
+            self._all.record(rtt)
+            self._set_counter(_EXCHANGES, self._counter(_EXCHANGES) + 1)
+            self._set_counter(_LAST_RTT, rtt)
+
+            if now - self._current_start >= _METRICS_INTERVAL * 1e9:
+                self._publish(now)
+        finally:
+            self._end_write(sequence)
+
+    def heartbeat(self):
+        """
+        Method used to mark the connection as alive, once a reply is received.
+        """
+        sequence = self._begin_write()
+        try:
+            self._set_counter(_LAST_REPLY, _time.monotonic_ns())
+            self._set_counter(_ALIVE, 1)
+        finally:
+            self._end_write(sequence)
+
+    def expire(self):
+        """
+        Method used to mark the connection as lost.
+        """
+        self._set_counter(_ALIVE, 0)
+
+    @property
+    def alive(self) -> bool:
+        """
+        Getter to check if the connection is alive (replied since it was last marked as lost).
+        """
+        return bool(self._counter(_ALIVE))
+
+    def get(self) -> dict:
+        """
+        Method used to retrieve the metrics.
+
+        The exchange rate is 0 if no interval completed within the last two intervals (the exchanges stalled).
+
+        :return: Dictionary of the liveness, the time since the last reply (in milliseconds, or None if nothing was
+            received), the number of exchanges, the exchange rate, the last round-trip time, and the round-trip time
+            summaries of the last interval and of all exchanges, in microseconds
+        """
+        for _ in range(_SEQLOCK_RETRIES):
+            sequence, = _SEQUENCE.unpack_from(self._buf)
+            if not sequence & 1:
+                counters, all_rtt, interval = self._snapshot()
+                if _SEQUENCE.unpack_from(self._buf)[0] == sequence:
+                    break
+
+            # Yield to the writer before retrying
+            _time.sleep(0)
+        else:
+            _Log.debug(f"Reading {self._name} metrics regardless of an incomplete write")
+            counters, all_rtt, interval = self._snapshot()
+
+        now = _time.monotonic_ns()
+        start, end = counters[_INTERVAL_START], counters[_INTERVAL_END]
+        recent = end > start and now - end < 2 * _METRICS_INTERVAL * 1e9
+        last_reply = counters[_LAST_REPLY]
+
+        return {
+            "alive": bool(counters[_ALIVE]),
+            "last_reply_ms": round((now - last_reply) / 1e6, 3) if last_reply else None,
+            "exchanges": counters[_EXCHANGES],
+            "exchanges_per_second": round(interval.count / (end - start) * 1e9, 1) if recent else 0,
+            "last_rtt_us": round(counters[_LAST_RTT] / 1000, 3),
+            "rtt_us": interval.summary(scale=1000),
+            "all_rtt_us": all_rtt.summary(scale=1000)
+        }
+
+    def reset(self):
+        """
+        Method used to zero all metrics (the interval in progress is only zeroed if reset by the recording process).
+        """
+        sequence = self._begin_write()
+        try:
+            _COUNTERS.pack_into(self._buf, _COUNTERS_OFFSET, *(0 for _ in range(_COUNTERS.size // _COUNTER.size)))
+            self._all.reset()
+            self._interval.reset()
+        finally:
+            self._end_write(sequence)
+        self._current.reset()
+        self._current_start = None
+
+    def close(self):
+        """
+        Method used to release the views of the shared memory and close it in the current process. The metrics can't be
+        used afterwards.
+        """
+        self._all.release()
+        self._interval.release()
+        self._shm.close()
+
+    def unlink(self):
+        """
+        Method used to remove the shared memory once no longer needed.
+
+        The processes which already opened the metrics can still access them, but opening the metrics with the same
+        name creates new, zeroed ones.
+        """
+        self._shm.unlink()
+
+    def _publish(self, now: int):
+        """
+        Helper method used to publish the interval in progress as the last completed interval, and start a new one.
+
+        Must be called within a write (see `_begin_write`).
+
+        :param now: End of the interval (monotonic, in nanoseconds)
+        """
+        self._interval.reset()
+        self._interval.merge(self._current)
+        self._set_counter(_INTERVAL_START, self._current_start)
+        self._set_counter(_INTERVAL_END, now)
+
+        self._current.reset()
+        self._current_start = now
+
+    def _snapshot(self) -> tuple:
+        """
+        Helper method used to copy the counters and the histograms out of the shared memory.
+
+        :return: Values of the counters, and copies of the histogram of all exchanges and of the last completed interval
+        """
+        counters = _COUNTERS.unpack_from(self._buf, _COUNTERS_OFFSET)
+        histograms = bytearray(self._buf[_HISTOGRAMS_OFFSET:self._size])
+        return (counters, _Histogram(buffer=histograms[:_Histogram.size()]),
+                _Histogram(buffer=histograms[_Histogram.size():]))
+
+    def _counter(self, index: int) -> int:
+        """
+        Helper method used to read a counter.
+
+        :param index: Index of the counter
+        :return: Value of the counter
+        """
+        return _COUNTER.unpack_from(self._buf, _COUNTERS_OFFSET + index * _COUNTER.size)[0]
+
+    def _set_counter(self, index: int, value: int):
+        """
+        Helper method used to write a counter.
+
+        :param index: Index of the counter
+        :param value: New value of the counter
+        """
+        _COUNTER.pack_into(self._buf, _COUNTERS_OFFSET + index * _COUNTER.size, value)
+
+    def _begin_write(self) -> int:
+        """
+        Helper method used to mark the start of a write, making the sequence counter odd.
+
+        :return: Value of the sequence counter during the write
+        """
+        sequence = _SEQUENCE.unpack_from(self._buf)[0] + 1 | 1
+        _SEQUENCE.pack_into(self._buf, 0, sequence)
+        return sequence
+
+    def _end_write(self, sequence: int):
+        """
+        Helper method used to mark the end of a write, making the sequence counter even.
+
+        :param sequence: Value of the sequence counter during the write
+        """
+        _SEQUENCE.pack_into(self._buf, 0, sequence + 1)
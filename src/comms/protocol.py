@@ -0,0 +1,376 @@
+"""
+Protocol
+========
+
+Module storing an implementation of the framed wire protocol used to exchange the data with the ROV.
+
+Each frame is a header (the size of the body and its type) followed by the body. This means the frames can be split out
+of the stream regardless of how the bytes were coalesced or split into the packets, and the bodies can be of any size.
+
+The transfers sent over the multiplexed channels (see `channels` module) are split into the chunk frames, each body
+being a header (the channel, the id of the transfer and whether it's the last chunk) followed by a part of the transfer.
+
+The control datagrams (see `datagram` module) are a header (the sender's session and a sequence number) followed by the
+values laid out as in the transmission segment. Each datagram is acknowledged by a header alone. The sequence numbers
+wrap around, and are compared using the serial number arithmetic.
+"""
+import collections as _collections
+import struct as _struct
+import typing as _typing
+from .utils import FrameType as _FrameType, Channel as _Channel, MAX_TRANSFER_SIZE as _MAX_TRANSFER_SIZE
+from ..common import Histogram as _Histogram
+
+# Declare the layout of the frame header - size of the body and its type
+FRAME_HEADER = _struct.Struct("<IB")
+
+# Declare the maximum size of a frame's body, to fail early on a corrupted stream instead of buffering it indefinitely
+MAX_FRAME_SIZE = 1 << 20
+
+# Declare the layout of the chunk header - channel of the transfer, id of the transfer (within the channel) and whether
+# the chunk is the last one of the transfer
+CHUNK_HEADER = _struct.Struct("<BIB")
+
+# Declare the layout of the datagram header - session of the sender and sequence number of the datagram
+DATAGRAM_HEADER = _struct.Struct("<II")
+
+# Declare the number of distinct sequence numbers (after which they wrap around)
+SEQUENCE_RANGE = 1 << 32
+
+
+def encode_frame(body: bytes, frame_type: _FrameType) -> bytes:
+    """
+    Function used to build a frame from its body.
+
+    :param body: Body of the frame
+    :param frame_type: Type of the body
+    :raises: ValueError
+    :return: Header followed by the body
+    """
+    if len(body) > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame body too large ({len(body)} > {MAX_FRAME_SIZE})")
+    return FRAME_HEADER.pack(len(body), frame_type.value) + body
+
+
+def is_newer(sequence: int, reference: int) -> bool:
+    """
+    Function used to check if a sequence number is newer than the reference, accounting for the wrapping around.
+
+    :param sequence: Sequence number to check
+    :param reference: Sequence number to compare to
+    :return: True if the sequence number is less than half of the range ahead of the reference, False otherwise
+    """
+    return 0 < (sequence - reference) % SEQUENCE_RANGE < SEQUENCE_RANGE // 2
+
+
+def new_frame_buffer(size: int, frame_type: _FrameType) -> _typing.Tuple[bytearray, memoryview]:
+    """
+    Function used to pre-allocate a frame of a fixed-size body, which can be re-used to send the bodies without copying.
+
+    :param size: Size of the body
+    :param frame_type: Type of the body
+    :raises: ValueError
+    :return: Whole frame (to send) and a view of its body (to write into)
+    """
+    if size > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame body too large ({size} > {MAX_FRAME_SIZE})")
+
+    frame = bytearray(FRAME_HEADER.size + size)
+    FRAME_HEADER.pack_into(frame, 0, size, frame_type.value)
+    return frame, memoryview(frame)[FRAME_HEADER.size:]
+
+
+class FrameDecoder:
+    """
+    Class representing an incremental decoder of the frames.
+
+    The received bytes are buffered until they form complete frames, so the frames can arrive in any number of chunks,
+    and a single chunk can contain any number of frames.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create the buffer
+        * pending - a getter to retrieve the number of buffered bytes not yet decoded
+        * feed - a method to buffer the received bytes and decode the complete frames
+
+    Usage
+    -----
+
+    The decoder should be fed with each received chunk of bytes::
+
+        decoder = FrameDecoder()
+        for frame_type, body in decoder.feed(sock.recv(4096)):
+            ...
+    """
+
+    def __init__(self, max_frame_size: int = MAX_FRAME_SIZE):
+        """
+        Standard constructor.
+
+        :param max_frame_size: Maximum size of a frame's body
+        """
+        self._max_frame_size = max_frame_size
+        self._buffer = bytearray()
+
+    @property
+    def pending(self) -> int:
+        """
+        Getter for the number of buffered bytes which don't form a complete frame yet.
+        """
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> _typing.List[_typing.Tuple[_FrameType, bytes]]:
+        """
+        Method used to buffer the received bytes, and decode all frames completed by them.
+
+        The decoded bytes are removed from the buffer at once, after all complete frames are split out.
+
+        :param data: Received bytes
+        :raises: ValueError
+        :return: List of types and bodies of the decoded frames, in the order they were received
+        """
+        self._buffer += data
+        view = memoryview(self._buffer)
+        frames = list()
+        offset = 0
+
+        try:
+            while len(view) - offset >= FRAME_HEADER.size:
+                size, frame_type = FRAME_HEADER.unpack_from(view, offset)
+                if size > self._max_frame_size:
+                    raise ValueError(f"Frame body too large ({size} > {self._max_frame_size}) - corrupted stream?")
+
+                start = offset + FRAME_HEADER.size
+                if len(view) < start + size:
+                    break
+                frames.append((_FrameType(frame_type), bytes(view[start:start + size])))
+                offset = start + size
+        finally:
+            view.release()
+
+        del self._buffer[:offset]
+        return frames
+
+
+class ChunkAssembler:
+    """
+    Class representing an assembler of the transfers received in chunks.
+
+    The chunks of each transfer are buffered until its last chunk arrives, so the chunks of the transfers of different
+    channels can be interleaved in any way.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create the buffers
+        * pending - a getter to retrieve the number of incomplete transfers
+        * feed - a method to buffer a received chunk, and assemble the transfer completed by it
+
+    Usage
+    -----
+
+    The assembler should be fed with the body of each received chunk frame::
+
+        transfer = assembler.feed(body)
+        if transfer:
+            channel, data = transfer
+    """
+
+    def __init__(self, max_transfer_size: int = _MAX_TRANSFER_SIZE):
+        """
+        Standard constructor.
+
+        :param max_transfer_size: Maximum size of a transfer
+        """
+        self._max_transfer_size = max_transfer_size
+        self._transfers = dict()
+
+    @property
+    def pending(self) -> int:
+        """
+        Getter for the number of transfers which didn't receive their last chunk yet.
+        """
+        return len(self._transfers)
+
+    def feed(self, body: bytes) -> _typing.Optional[_typing.Tuple[_Channel, bytes]]:
+        """
+        Method used to buffer a received chunk, and assemble the transfer if it's the last chunk.
+
+        :param body: Body of the chunk frame
+        :raises: ValueError, struct.error
+        :return: Channel and data of the completed transfer, or None if the transfer is incomplete
+        """
+        channel, transfer, last = CHUNK_HEADER.unpack_from(body)
+        key = _Channel(channel), transfer
+
+        buffer = self._transfers.setdefault(key, bytearray())
+        buffer += memoryview(body)[CHUNK_HEADER.size:]
+        if len(buffer) > self._max_transfer_size:
+            del self._transfers[key]
+            raise ValueError(f"Transfer too large (> {self._max_transfer_size}) - corrupted stream?")
+
+        if last:
+            del self._transfers[key]
+            return key[0], bytes(buffer)
+        return None
+
+
+class SequenceFilter:
+    """
+    Class representing a filter of the stale datagrams - the ones not newer than the last accepted datagram.
+
+    Since the control values are latest-value-wins, the datagrams delayed or re-ordered on the way are dropped rather
+    than applied. The filter starts over whenever the sender's session changes (for example when it restarts).
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create an empty filter
+        * dropped - a getter to retrieve the number of dropped datagrams
+        * accept - a method to check if a datagram should be applied
+
+    Usage
+    -----
+
+    The filter should be checked with each received datagram's header::
+
+        session, sequence = DATAGRAM_HEADER.unpack_from(datagram)
+        if sequence_filter.accept(session, sequence):
+            ...
+    """
+
+    def __init__(self):
+        """
+        Standard constructor.
+        """
+        self._session = None
+        self._sequence = None
+        self._dropped = 0
+
+    @property
+    def dropped(self) -> int:
+        """
+        Getter for the number of dropped (stale) datagrams.
+        """
+        return self._dropped
+
+    def accept(self, session: int, sequence: int) -> bool:
+        """
+        Method used to check if a datagram is newer than the last accepted one (of the same session).
+
+        :param session: Session of the sender
+        :param sequence: Sequence number of the datagram
+        :return: True if the datagram should be applied, False if it's stale
+        """
+        if session == self._session and not is_newer(sequence, self._sequence):
+            self._dropped += 1
+            return False
+
+        self._session, self._sequence = session, sequence
+        return True
+
+
+class AckWindow:
+    """
+    Class representing a window of the sent, not yet acknowledged datagrams.
+
+    The datagrams are not re-sent (the next datagram carries newer values anyway), the window is only used to measure
+    the round-trip times and count the lost datagrams. An acknowledgement of a datagram supersedes all older datagrams
+    still in the window, and a datagram which doesn't fit in the window is considered lost.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to create an empty window
+        * last_acknowledged - a getter to retrieve the time of the last acknowledgement
+        * sent - a method to add a sent datagram to the window
+        * acknowledge - a method to remove an acknowledged datagram (and the older ones) from the window
+        * stats - a method to retrieve the counts of the datagrams and the round-trip times
+
+    Usage
+    -----
+
+    The window should be updated with each sent datagram and each received acknowledgement::
+
+        window = AckWindow(16)
+        window.sent(sequence, time.perf_counter())
+        window.acknowledge(acknowledged_sequence, time.perf_counter())
+    """
+
+    def __init__(self, size: int):
+        """
+        Standard constructor.
+
+        :param size: Maximum number of datagrams waiting for the acknowledgement
+        :raises: ValueError
+        """
+        if size < 1:
+            raise ValueError(f"Window size must be positive, got {size}")
+
+        self._size = size
+        self._pending = _collections.OrderedDict()
+        self._rtt = _Histogram()
+        self._last_acknowledged = None
+        self._counts = dict.fromkeys(("sent", "acknowledged", "superseded", "lost", "unexpected"), 0)
+
+    @property
+    def last_acknowledged(self) -> _typing.Optional[float]:
+        """
+        Getter for the time of the last acknowledgement, or None if nothing was acknowledged yet.
+        """
+        return self._last_acknowledged
+
+    def sent(self, sequence: int, time: float):
+        """
+        Method used to add a sent datagram to the window, dropping (as lost) the oldest datagram if the window is full.
+
+        :param sequence: Sequence number of the datagram
+        :param time: Time the datagram was sent at (in seconds)
+        """
+        if len(self._pending) >= self._size:
+            self._pending.popitem(last=False)
+            self._counts["lost"] += 1
+
+        self._pending[sequence] = time
+        self._counts["sent"] += 1
+
+    def acknowledge(self, sequence: int, time: float) -> bool:
+        """
+        Method used to remove an acknowledged datagram from the window, superseding all older datagrams.
+
+        :param sequence: Sequence number of the acknowledged datagram
+        :param time: Time the acknowledgement was received at (in seconds)
+        :return: True if the datagram was in the window, False otherwise (duplicated or late acknowledgement)
+        """
+        if sequence not in self._pending:
+            self._counts["unexpected"] += 1
+            return False
+
+        # The datagrams are kept in the order they were sent, so all datagrams before the acknowledged one are older
+        while True:
+            pending, sent = self._pending.popitem(last=False)
+            if pending == sequence:
+                break
+            self._counts["superseded"] += 1
+
+        self._counts["acknowledged"] += 1
+        self._rtt.record((time - sent) * 1e9)
+        self._last_acknowledged = time
+        return True
+
+    def stats(self) -> dict:
+        """
+        Method used to retrieve the counts of the datagrams and the round-trip times.
+
+        :return: Dictionary of the counts, the number of datagrams in the window, and the round-trip time summary in
+            microseconds
+        """
+        return {**self._counts, "pending": len(self._pending), "rtt_us": self._rtt.summary(scale=1000)}
@@ -0,0 +1,446 @@
+"""
+Simulator
+=========
+
+Module storing an implementation of a local stand-in for the ROV's server, used to test and benchmark the communication
+without any hardware.
+
+The simulator replies to each received transmission data with the telemetry (the received segment's keys), in any of
+the connection protocols, and acknowledges the control channel's datagrams. The transfers received over the multiplexed
+channels are counted, and can be sent back over the same channels. The response latency and jitter, the lost
+packets, the disconnections and the rate of unsolicited telemetry can be configured to recreate the real conditions.
+
+The simulator can be started from the command line (use `--help` to list the options)::
+
+    python -m src.comms.simulator --latency 0.005 --jitter 0.002 --disconnect 0.001
+"""
+import argparse as _argparse
+import asyncio as _asyncio
+import json as _json
+import random as _random
+import struct as _struct
+import threading as _threading
+import time as _time
+import typing as _typing
+from .utils import ConnectionProtocol as _ConnectionProtocol, FrameType as _FrameType, SEQUENCE_KEY as _SEQUENCE_KEY
+from .protocol import FrameDecoder as _FrameDecoder, encode_frame as _encode_frame, \
+    DATAGRAM_HEADER as _DATAGRAM_HEADER, SequenceFilter as _SequenceFilter, ChunkAssembler as _ChunkAssembler
+from .channels import Multiplexer as _Multiplexer
+from ..common import data_manager as _dm
+from ..common import Log as _Log, Histogram as _Histogram, Scheduler as _Scheduler
+
+# Declare the additional delay (in seconds) of the replies lost over TCP - the minimum retransmission timeout
+_RETRANSMISSION_DELAY = 0.2
+
+# Declare the maximum number of bytes received at once
+_RECEIVE_SIZE = 4096
+
+
+class _ControlProtocol(_asyncio.DatagramProtocol):
+    """
+    Datagram protocol used to pass the received control datagrams to the simulator.
+    """
+
+    def __init__(self, simulator: "RovSimulator"):
+        """
+        Standard constructor.
+
+        :param simulator: Simulator handling the datagrams
+        """
+        self._simulator = simulator
+        self._transport = None
+
+    def connection_made(self, transport: _asyncio.DatagramTransport):
+        """
+        Method used to remember the transport to send the acknowledgements with.
+
+        :param transport: Transport of the control channel
+        """
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, address: tuple):
+        """
+        Method used to pass a received datagram to the simulator.
+
+        :param data: Received datagram
+        :param address: Address of the sender
+        """
+        self._simulator.handle_datagram(self._transport, data, address)
+
+
+class RovSimulator:
+    """
+    Simulator class used as a local stand-in for the ROV's server.
+
+    Each connection is served until the client disconnects (or a disconnection is injected). The received values are
+    applied to the simulator's copy of the transmission data, and each request is replied to with the telemetry (and
+    the echoed sequence number, if sent), after the configured latency and jitter. The lost replies are delayed by the
+    retransmission timeout (as they would be by TCP), while the lost control datagrams are dropped. With the loopback
+    enabled, the chunks of the received transfers are sent back after each reply, scheduled as by the connection.
+
+    Functions
+    ---------
+
+    The following list shortly summarises each function:
+
+        * __init__ - a constructor to validate and remember the configuration
+        * transmission - a getter to retrieve the last received transmission data
+        * stats - a method to retrieve the counts of the served connections, exchanges and injected faults
+        * start - a method to start serving in a separate thread
+        * stop - a method to stop serving (started in a separate thread)
+        * run - a method to serve in the current thread, for a fixed duration or until stopped
+        * handle_datagram - a method to apply and acknowledge a control datagram
+        * _serve - a private coroutine which runs the servers until stopped
+        * _handle - a private coroutine which serves a single connection
+        * _read - a private coroutine which receives the next requests in the configured protocol
+        * _push - a private coroutine which sends the unsolicited telemetry at a fixed rate
+        * _encode - a private method which encodes a reply in the configured protocol
+        * _delay - a private method which draws the delay of a reply
+
+    Usage
+    -----
+
+    The simulator can be started in the background of the tests::
+
+        simulator = RovSimulator(latency=0.01, disconnect=0.01)
+        simulator.start()
+        ...
+        simulator.stop()
+        print(simulator.stats())
+
+    Or served in a separate process for a fixed duration, to not compete with the tested code for the same thread::
+
+        stats = RovSimulator(protocol=ConnectionProtocol.FRAMED).run(duration=10)
+    """
+
+    def __init__(self, ip: str = "localhost", *, port: int = 50000,
+                 protocol: _ConnectionProtocol = _ConnectionProtocol.JSON, latency: float = 0.0, jitter: float = 0.0,
+                 loss: float = 0.0, disconnect: float = 0.0, telemetry_rate: float = 0.0,
+                 control_port: _typing.Optional[int] = None, loopback: bool = False,
+                 seed: _typing.Optional[int] = None):
+        """
+        Standard constructor.
+
+        :param ip: Ip to listen on
+        :param port: Port to listen on for the connections
+        :param protocol: Format of the transmission data sent by the connections
+        :param latency: Minimum delay of each reply (in seconds)
+        :param jitter: Maximum random delay added to each reply (in seconds)
+        :param loss: Probability of each reply (or control datagram) being lost
+        :param disconnect: Probability of disconnecting the client after each request
+        :param telemetry_rate: Number of unsolicited telemetry frames sent per second (FRAMED protocol only)
+        :param control_port: Port to listen on for the control datagrams, or None to not listen
+        :param loopback: Whether to send the received transfers back over the same channels (FRAMED protocol only)
+        :param seed: Seed of the random faults, or None to seed from the system
+        :raises: ValueError
+        """
+        if min(latency, jitter, telemetry_rate) < 0:
+            raise ValueError("Latency, jitter and telemetry rate must not be negative")
+        if not (0 <= loss <= 1 and 0 <= disconnect <= 1):
+            raise ValueError("Loss and disconnect must be probabilities between 0 and 1")
+        if (telemetry_rate or loopback) and protocol != _ConnectionProtocol.FRAMED:
+            raise ValueError("Unsolicited telemetry and loopback require the FRAMED protocol")
+
+        self._ip = ip
+        self._port = port
+        self._protocol = protocol
+        self._latency = latency
+        self._jitter = jitter
+        self._loss = loss
+        self._disconnect = disconnect
+        self._telemetry_rate = telemetry_rate
+        self._control_port = control_port
+        self._loopback = loopback
+        self._random = _random.Random(seed)
+
+        # Initialise the statistics, and the time of the last injected disconnection to measure the reconnection time
+        self._counts = dict.fromkeys(("connections", "exchanges", "lost", "disconnections", "telemetry", "transfers",
+                                      "transfer_bytes", "datagrams", "datagrams_lost", "datagrams_stale"), 0)
+        self._reconnections = _Histogram()
+        self._disconnected = None
+
+        # Initialise the simulated ROV's state
+        self._transmission = dict()
+        self._filter = _SequenceFilter()
+
+        # Initialise the constructs used to run the simulator in a separate thread
+        self._thread = None
+        self._ready = _threading.Event()
+        self._loop = None
+        self._stopped = None
+        self._writers = set()
+
+    @property
+    def transmission(self) -> dict:
+        """
+        Getter for the last received transmission data (combined from all connections and the control channel).
+        """
+        return dict(self._transmission)
+
+    def stats(self) -> dict:
+        """
+        Method used to retrieve the counts of the served connections, exchanges and injected faults.
+
+        :return: Dictionary of the counts, and the summary of the reconnection times (from each injected disconnection
+            to the next connection) in milliseconds
+        """
+        return {**self._counts, "reconnection_ms": self._reconnections.summary(scale=1e6)}
+
+    def start(self):
+        """
+        Method used to start serving in a separate thread, returning once the simulator is listening.
+        """
+        self._ready.clear()
+        self._thread = _threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        """
+        Method used to stop serving, and wait for the thread started with `start` to finish.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self, duration: _typing.Optional[float] = None) -> dict:
+        """
+        Method used to serve in the current thread, for a fixed duration or until stopped.
+
+        :param duration: Time to serve for (in seconds), or None to serve until stopped
+        :return: Dictionary of the statistics (see `stats`)
+        """
+        try:
+            _asyncio.run(self._serve(duration))
+        finally:
+            self._loop = None
+            self._ready.set()
+        return self.stats()
+
+    def handle_datagram(self, transport: _asyncio.DatagramTransport, data: bytes, address: tuple):
+        """
+        Method used to apply a control datagram's values (unless it's lost or stale), and acknowledge it after the
+        configured latency and jitter.
+
+        :param transport: Transport to send the acknowledgement with
+        :param data: Received datagram
+        :param address: Address of the sender
+        """
+        if len(data) != _DATAGRAM_HEADER.size + _dm.transmission.layout.size:
+            _Log.debug(f"Simulator ignoring malformed datagram from {address}")
+            return
+
+        self._counts["datagrams"] += 1
+        if self._random.random() < self._loss:
+            self._counts["datagrams_lost"] += 1
+            return
+
+        session, sequence = _DATAGRAM_HEADER.unpack_from(data)
+        if not self._filter.accept(session, sequence):
+            self._counts["datagrams_stale"] += 1
+            return
+
+        self._transmission.update(zip(_dm.transmission.schema,
+                                      _dm.transmission.layout.unpack_from(data, _DATAGRAM_HEADER.size)))
+        self._loop.call_later(self._delay(), transport.sendto, _DATAGRAM_HEADER.pack(session, sequence), address)
+
+    async def _serve(self, duration: _typing.Optional[float]):
+        """
+        Coroutine used to run the connections' server (and the control channel's endpoint) until stopped.
+
+        :param duration: Time to serve for (in seconds), or None to serve until stopped
+        """
+        self._loop = _asyncio.get_running_loop()
+        self._stopped = _asyncio.Event()
+
+        server = await _asyncio.start_server(self._handle, self._ip, self._port)
+        control = None
+        if self._control_port is not None:
+            control, _ = await self._loop.create_datagram_endpoint(lambda: _ControlProtocol(self),
+                                                                   local_addr=(self._ip, self._control_port))
+
+        _Log.info(f"Simulator listening on {self._ip}:{self._port}")
+        self._ready.set()
+
+        try:
+            await _asyncio.wait_for(self._stopped.wait(), duration)
+        except _asyncio.TimeoutError:
+            pass
+        finally:
+            server.close()
+            if control is not None:
+                control.close()
+            for writer in list(self._writers):
+                writer.transport.abort()
+            _Log.info(f"Simulator stopped - {self.stats()}")
+
+    async def _handle(self, reader: _asyncio.StreamReader, writer: _asyncio.StreamWriter):
+        """
+        Coroutine used to serve a single connection, until the client disconnects or a disconnection is injected.
+
+        :param reader: Stream to receive the requests from
+        :param writer: Stream to send the replies to
+        """
+        self._counts["connections"] += 1
+        if self._disconnected is not None:
+            self._reconnections.record((_time.perf_counter() - self._disconnected) * 1e9)
+            self._disconnected = None
+
+        self._writers.add(writer)
+        decoder = _FrameDecoder()
+        assembler = _ChunkAssembler()
+        multiplexer = _Multiplexer() if self._loopback else None
+        pusher = self._loop.create_task(self._push(writer)) if self._telemetry_rate else None
+
+        try:
+            while (requests := await self._read(reader, decoder, assembler, multiplexer)) is not None:
+                for request in requests:
+                    echoed = request.pop(_SEQUENCE_KEY, None)
+                    self._transmission.update(request)
+                    self._counts["exchanges"] += 1
+
+                    delay = self._delay()
+                    if self._random.random() < self._loss:
+                        self._counts["lost"] += 1
+                        delay += _RETRANSMISSION_DELAY
+                    if delay:
+                        await _asyncio.sleep(delay)
+
+                    if self._random.random() < self._disconnect:
+                        self._counts["disconnections"] += 1
+                        self._disconnected = _time.perf_counter()
+                        return
+
+                    reply = {"A_O": True, "A_I": True, "S_O": self._counts["exchanges"],
+                             "S_I": self._counts["telemetry"]}
+                    if echoed is not None:
+                        reply[_SEQUENCE_KEY] = echoed
+                    writer.write(self._encode(reply))
+                    if multiplexer is not None:
+                        writer.writelines(multiplexer.pop())
+                await writer.drain()
+
+        except (ConnectionError, OSError, ValueError, _struct.error) as e:
+            _Log.debug(f"Simulator closing the connection - {e}")
+        except _asyncio.CancelledError:
+            _Log.debug("Simulator closing the connection - stopped")
+        finally:
+            if pusher is not None:
+                pusher.cancel()
+            self._writers.discard(writer)
+            writer.transport.abort()
+
+    async def _read(self, reader: _asyncio.StreamReader, decoder: _FrameDecoder, assembler: _ChunkAssembler,
+                    multiplexer: _typing.Optional[_Multiplexer]) -> _typing.Optional[_typing.List[dict]]:
+        """
+        Coroutine used to receive the next requests in the configured protocol.
+
+        In the FRAMED protocol, the received transfers are counted (and queued to be sent back, if the loopback is
+        enabled) while receiving the requests.
+
+        :param reader: Stream to receive the requests from
+        :param decoder: Decoder buffering the incomplete frames between the calls (FRAMED protocol)
+        :param assembler: Assembler buffering the incomplete transfers between the calls (FRAMED protocol)
+        :param multiplexer: Multiplexer to queue the received transfers in, or None if the loopback is disabled
+        :raises: ConnectionError, OSError, ValueError, struct.error
+        :return: List of the received requests, or None if the connection was closed
+        """
+        if self._protocol == _ConnectionProtocol.BINARY:
+            try:
+                data = await reader.readexactly(_dm.transmission.layout.size)
+            except _asyncio.IncompleteReadError:
+                return None
+            return [dict(zip(_dm.transmission.schema, _dm.transmission.layout.unpack(data)))]
+
+        requests = list()
+        while not requests:
+            data = await reader.read(_RECEIVE_SIZE)
+            if not data:
+                return None
+            if self._protocol == _ConnectionProtocol.JSON:
+                return [_json.loads(data.decode("utf-8"))]
+
+            for frame_type, body in decoder.feed(data):
+                if frame_type == _FrameType.CHUNK:
+                    transfer = assembler.feed(body)
+                    if transfer:
+                        self._counts["transfers"] += 1
+                        self._counts["transfer_bytes"] += len(transfer[1])
+                        if multiplexer is not None:
+                            multiplexer.put(*transfer)
+                elif frame_type == _FrameType.JSON:
+                    requests.append(_json.loads(body.decode("utf-8")))
+                else:
+                    requests.append(dict(zip(_dm.transmission.schema, _dm.transmission.layout.unpack(body))))
+
+        return requests
+
+    async def _push(self, writer: _asyncio.StreamWriter):
+        """
+        Coroutine used to send the unsolicited telemetry frames at a fixed rate, until cancelled.
+
+        :param writer: Stream to send the frames to
+        """
+        scheduler = _Scheduler(self._telemetry_rate)
+        while True:
+            await scheduler.wait_async()
+            self._counts["telemetry"] += 1
+            writer.write(self._encode({"S_I": self._counts["telemetry"]}))
+
+    def _encode(self, reply: dict) -> bytes:
+        """
+        Method used to encode a reply in the configured protocol.
+
+        :param reply: Reply to encode
+        :return: JSON dictionary (JSON frame in the FRAMED protocol)
+        """
+        data = bytes(_json.dumps(reply), encoding="utf-8")
+        return _encode_frame(data, _FrameType.JSON) if self._protocol == _ConnectionProtocol.FRAMED else data
+
+    def _delay(self) -> float:
+        """
+        Method used to draw the delay of a reply - the latency with a random jitter.
+
+        :return: Delay (in seconds)
+        """
+        return self._latency + self._random.uniform(0, self._jitter) if self._jitter else self._latency
+
+
+def main(args: list = None) -> int:
+    """
+    Function used to run the simulator from the command line, until interrupted (or for a fixed duration).
+
+    :param args: Command line arguments (defaults to `sys.argv`)
+    :return: Exit code
+    """
+    parser = _argparse.ArgumentParser(description="Local stand-in for the ROV's server")
+    parser.add_argument("--ip", default="localhost", help="ip to listen on")
+    parser.add_argument("-p", "--port", type=int, default=50000, help="port to listen on")
+    parser.add_argument("--protocol", default=_ConnectionProtocol.JSON.name,
+                        choices=[protocol.name for protocol in _ConnectionProtocol])
+    parser.add_argument("--latency", type=float, default=0.0, help="minimum delay of the replies (in seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random delay added (in seconds)")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability of losing a reply or a datagram")
+    parser.add_argument("--disconnect", type=float, default=0.0, help="probability of disconnecting per request")
+    parser.add_argument("--telemetry-rate", type=float, default=0.0, help="unsolicited telemetry frames per second")
+    parser.add_argument("--control-port", type=int, help="port to listen on for the control datagrams")
+    parser.add_argument("--loopback", action="store_true", help="send the received transfers back")
+    parser.add_argument("--seed", type=int, help="seed of the random faults")
+    parser.add_argument("-d", "--duration", type=float, help="time to serve for (in seconds)")
+    args = parser.parse_args(args)
+
+    simulator = RovSimulator(args.ip, port=args.port, protocol=_ConnectionProtocol[args.protocol],
+                             latency=args.latency, jitter=args.jitter, loss=args.loss, disconnect=args.disconnect,
+                             telemetry_rate=args.telemetry_rate, control_port=args.control_port, loopback=args.loopback,
+                             seed=args.seed)
+    try:
+        print(_json.dumps(simulator.run(args.duration), indent=4))
+    except KeyboardInterrupt:
+        print(_json.dumps(simulator.stats(), indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -11,6 +11,43 @@ DEFAULT_STREAM_WIDTH = 640
 DEFAULT_STREAM_HEIGHT = 480
 STREAM_THREAD_DELAY = 0.01
 
+# Declare CONNECTION-related constructs - in the delta mode, how often (in seconds) to send all transmission data
+# (keyframe), and how long to wait for the changes before sending an empty update (keepalive)
+KEYFRAME_INTERVAL = 1.0
+KEEPALIVE_INTERVAL = 0.1
+
+# Declare CONNECTION WATCHDOG-related constructs - how long (in seconds) to wait for the server's reply before the
+# connection is considered lost (the transmission data is then zeroed and the connection re-established)
+HEARTBEAT_TIMEOUT = 0.1
+
+# Declare CONNECTION METRICS-related constructs - length (in seconds) of the intervals the exchange rate and the recent
+# round-trip times are calculated over, and the key of the sequence number sent to (and echoed by) the ROV
+METRICS_INTERVAL = 1.0
+SEQUENCE_KEY = "seq"
+
+# Declare ASYNC CONNECTION-related constructs - initial and maximum delay (in seconds) between the reconnection attempts
+# (doubled after each failed attempt), how long to wait for a connection to be established, and how long to wait for
+# the engine to confirm a disconnection
+RECONNECT_DELAY = 0.1
+RECONNECT_DELAY_MAX = 5.0
+CONNECT_TIMEOUT = 2.0
+DISCONNECT_TIMEOUT = 1.0
+
+# Declare CONTROL CHANNEL-related constructs - default port, rate (in Hz) of the control datagrams, maximum number of
+# datagrams waiting for the acknowledgement, and how long (in seconds) to wait for any acknowledgement before the
+# channel is considered disconnected
+CONTROL_PORT = 50100
+CONTROL_RATE = 50
+CONTROL_WINDOW = 16
+CONTROL_TIMEOUT = 0.5
+
+# Declare CHANNEL-related constructs - maximum size (in bytes) of a chunk of the transfers, how many bytes of the
+# telemetry and bulk channels can be sent with each exchange (the control channel is never limited), and the maximum
+# size of a received transfer
+CHANNEL_CHUNK_SIZE = 8192
+CHANNEL_BUDGET = 32768
+MAX_TRANSFER_SIZE = 1 << 24
+
 # TODO: Replace with real urls
 MAIN_STREAM_URL = "http://87.75.106.150:8080/mjpg/1/video.mjpg"
 TOP_STREAM_URL = "http://92.24.55.187/mjpg/1/video.mjpg"
@@ -31,3 +68,41 @@ class ConnectionStatus(_enum.Enum):
     CONNECTING = 0
     CONNECTED = 1
     DISCONNECTED = 2
+
+
+class ConnectionProtocol(_enum.Enum):
+    """
+    Enumeration for different formats of the data exchanged with the ROV.
+
+    JSON encodes the values as a dictionary, binary sends the values as they are laid out in the shared memory (see
+    the transmission segment's `layout`), without any conversions. Both expect a single JSON dictionary per received
+    chunk of data. Framed sends the binary values within frames of the framed protocol, and decodes the received frames
+    incrementally (see `protocol` module), independently of how the data was split into the packets.
+    """
+    JSON = 0
+    BINARY = 1
+    FRAMED = 2
+
+
+class FrameType(_enum.Enum):
+    """
+    Enumeration for different types of the bodies of the framed protocol's frames.
+
+    JSON bodies are UTF-8 encoded dictionaries, binary bodies are the values laid out as in the shared memory segments.
+    Chunk bodies are parts of the transfers sent over the multiplexed channels (see `channels` module).
+    """
+    JSON = 0
+    BINARY = 1
+    CHUNK = 2
+
+
+class Channel(_enum.IntEnum):
+    """
+    Enumeration for different channels multiplexed over the framed protocol, in the order of their priority.
+
+    Control transfers (for example commands) are always sent first, with the transmission data. Telemetry transfers are
+    sent before the bulk transfers (for example logs or stills), which are only sent once nothing else is waiting.
+    """
+    CONTROL = 0
+    TELEMETRY = 1
+    BULK = 2
@@ -11,9 +11,9 @@ The normalised values are then converted to the ranges expected by hardware and
 """
 from .utils import DrivingMode as _DrivingMode, normalise as _normalise, \
     NORM_IDLE as _IDLE, NORM_MAX as _MAX, NORM_MIN as _MIN
-from ..common import data_manager as _dm, CONTROL_DICT as _CONTROL_DICT, Log as _Log
+from ..common import data_manager as _dm, Log as _Log, Scheduler as _Scheduler
 import multiprocessing as _mp
-import time as _time
+import typing as _typing
 
 
 # Declare the hardware-specific max and min values
@@ -64,15 +64,28 @@ class ControlManager:
     -----
 
     After creating an instance of the class, `start` method will return a process ID of the started process.
+
+    By default, the values are re-calculated whenever the control data changes. To re-calculate them at a fixed rate
+    instead (for example to match the rate of the hardware), pass the rate in Hz::
+
+        manager = ControlManager(rate=50)
     """
 
-    def __init__(self):
+    def __init__(self, rate: _typing.Optional[float] = None):
         """
         Standard constructor.
+
+        :param rate: Number of updates per second, or None to update whenever the control data changes
+        :raises: ValueError
         """
         self._process = _mp.Process(target=self._update)
         self._mode = _DrivingMode.MANUAL
-        self._delay = 0.01
+
+        # Maximum time (in seconds) between the updates, if the control data doesn't change
+        self._timeout = 1
+
+        # Initialise the scheduler of the fixed-rate updates (if enabled)
+        self._scheduler = _Scheduler(rate) if rate else None
 
         # Initialise separate dictionaries for each type of control data
         self._manual_data = dict()
@@ -81,23 +94,26 @@ class ControlManager:
         # Initialise the data dictionary which will be used in conversion to the final, expected hardware values.
         self._data = dict()
 
+        # Remember the version of the last pulled control data, to only pull the changes
+        self._version = None
+
     def _pull(self):
         """
         Method used to fetch control data.
 
         Dispatches each 'manual_' and 'autonomous_' key, value pairs into corresponding dictionaries, and the 'mode' key
-        into a private field.
+        into a private field. Only the keys changed since the previous pull are dispatched (all keys on the first pull).
         """
         _Log.debug("Pulling data for the control model")
-        data = _dm.control.get_all()
+        data, self._version = _dm.control.get_changed(self._version)
 
-        for key in _CONTROL_DICT:
+        for key, value in data.items():
             if key.startswith("manual_"):
-                self._manual_data[key.replace("manual_", "")] = data[key]
+                self._manual_data[key.replace("manual_", "")] = value
             elif key.startswith("autonomous_"):
-                self._autonomous_data[key.replace("autonomous_", "")] = data[key]
+                self._autonomous_data[key.replace("autonomous_", "")] = value
             elif key == "mode":
-                self._mode = _DrivingMode(data[key])
+                self._mode = _DrivingMode(value)
             else:
                 raise KeyError(f"Unexpected key retrieved - {key}, must be either \"mode\" or prefixed with"
                                "\"manual_\" or \"autonomous_\"")
@@ -137,12 +153,18 @@ class ControlManager:
         Wrapper method used as a target for the process spawning.
 
         Refer to the class documentation for more information on how the process of updating the data works.
+
+        Blocks until the control data changes between the updates (but no longer than `_timeout` seconds), rather than
+        re-calculating the same values. If the rate is set, blocks until the next tick of the scheduler instead.
         """
         while True:
             self._pull()
             self._merge()
             self._push()
-            _time.sleep(self._delay)
+            if self._scheduler:
+                self._scheduler.wait()
+            else:
+                _dm.control.wait_for_change(self._version, self._timeout)
 
     def _convert(self) -> dict:
         """
@@ -71,7 +71,7 @@ def start() -> int:
     Log.info("Application stopped")
 
     # Cleanup the sockets and terminate the connection process
-    manager.references.connection.disconnect()
+    manager.references.connection.close()
 
     # Kill all child processes and exit the application
     _kill_processes(*processes_to_terminate)
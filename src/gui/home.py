@@ -9,11 +9,17 @@ from .utils import Screen, Colour, get_manager, new_camera_update_func
 from PySide2.QtCore import *
 from PySide2.QtWidgets import *
 from PySide2.QtGui import *
+import threading
+import time
 
 
 # Declare screen-specific clock intervals for the indicators
 HARDWARE_READINGS_INTERVAL = 3000
-CONNECTION_READINGS_INTERVAL = 1000
+
+# Declare the minimum interval between the connection indicators' updates (one frame), and the interval to update them
+# at while the received data doesn't change (in seconds)
+CONNECTION_UPDATE_INTERVAL = 1 / 60
+CONNECTION_IDLE_INTERVAL = 1
 
 # Declare the initial reading to display on the indicators
 DEFAULT_READING = "_"
@@ -179,6 +185,7 @@ class _Indicators(QHBoxLayout):
         * __init__ - a constructor to create all indicators and add them to the layout
         * hardware - getter for hardware indicators
         * connections - getter for connection indicators
+        * data - getter for shared memory indicators
 
     """
 
@@ -228,6 +235,8 @@ class _Indicators(QHBoxLayout):
             self._ard_i = _Indicator("Arduino I", "{}", "Reachable?")
             self._ard_o_status = _Indicator("Arduino O", "{}", "Status")
             self._ard_i_status = _Indicator("Arduino I", "{}", "Status")
+            self._rtt = _Indicator("Round trip", "{}ms", "p50 / p99")
+            self._exchanges = _Indicator("Exchanges", "{}", "Per second")
 
             # TODO: Access violation because there is no method in place at the moment to automatically scale things
             #  correctly, and leave them in a fixed width state
@@ -237,13 +246,16 @@ class _Indicators(QHBoxLayout):
                             font-size: 20px;
                         }""")
 
-            self.indicators = [self._pi, self._ard_o, self._ard_i, self._ard_o_status, self._ard_i_status]
+            self.indicators = [self._pi, self._ard_o, self._ard_i, self._ard_o_status, self._ard_i_status, self._rtt,
+                               self._exchanges]
 
         def update(self):
             """
             Method used to update connection indicators' values.
             """
-            pi_status = get_manager().references.connection.status.name
+            connection = get_manager().references.connection
+            pi_status = connection.status.name
+            stats = connection.stats()
             o_connection, i_connection = dm.received["A_O"], dm.received["A_I"]
             o_status, i_status = dm.received["S_O"], dm.received["S_I"]
 
@@ -252,6 +264,46 @@ class _Indicators(QHBoxLayout):
             self._ard_i.text = i_connection
             self._ard_o_status.text = o_status
             self._ard_i_status.text = i_status
+            self._rtt.text = f"{stats['rtt_us']['p50'] / 1000:.1f} / {stats['rtt_us']['p99'] / 1000:.1f}"
+            self._exchanges.text = stats["exchanges_per_second"]
+
+    class _DataIndicators:
+        """
+        Helper class used to bundle shared memory-related indicators.
+
+        Exposes update function to update the indicators correctly. The indicators are only displayed if the data
+        manager collects the access statistics.
+        """
+
+        def __init__(self):
+            """
+            Standard constructor.
+            """
+            self._operations = _Indicator("Memory", "{}", "Operations/s")
+            self._lock_wait = _Indicator("Lock wait", "{}us", "Mean")
+
+            # Remember the previous totals (time, operations, lock acquisitions and lock wait) to calculate the rates
+            self._previous = None
+
+            self.indicators = [self._operations, self._lock_wait] if dm.get_stats() else []
+
+        def update(self):
+            """
+            Method used to update shared memory indicators' values, since the previous update.
+            """
+            if not self.indicators:
+                return
+
+            totals = [stats["total"]["segment"] for stats in dm.get_stats().values()]
+            current = (time.monotonic(), sum(total["reads"] + total["writes"] for total in totals),
+                       sum(total["lock_acquisitions"] for total in totals),
+                       sum(total["lock_wait_total_ns"] for total in totals))
+
+            if self._previous:
+                elapsed, operations, acquisitions, wait = (now - then for now, then in zip(current, self._previous))
+                self._operations.text = round(operations / elapsed)
+                self._lock_wait.text = round(wait / acquisitions / 1000, 1) if acquisitions else 0
+            self._previous = current
 
     def __init__(self):
         """
@@ -262,8 +314,10 @@ class _Indicators(QHBoxLayout):
         super(_Indicators, self).__init__()
         self._hardware_indicators = self._HardwareIndicators()
         self._connection_indicators = self._ConnectionIndicators()
+        self._data_indicators = self._DataIndicators()
 
-        for indicator in self._hardware_indicators.indicators + self._connection_indicators.indicators:
+        for indicator in self._hardware_indicators.indicators + self._connection_indicators.indicators \
+                + self._data_indicators.indicators:
             self.addWidget(indicator)
 
     @property
@@ -280,11 +334,18 @@ class _Indicators(QHBoxLayout):
         """
         return self._connection_indicators
 
+    @property
+    def data(self) -> _DataIndicators:
+        """
+        Getter for shared memory indicators
+        """
+        return self._data_indicators
+
 
 class Home(Screen):
     """
-    Home screen used to display 3 main video streams and various indicators with the information about CPU, memory
-    and the connections' statuses.
+    Home screen used to display 3 main video streams and various indicators with the information about CPU, memory,
+    the connections' statuses and (if collected) the shared memory access statistics.
 
     Functions
     ---------
@@ -300,12 +361,17 @@ class Home(Screen):
         * _update_main_camera - helper function to display main camera's frame
         * _update_top_camera - helper function to display top camera's frame
         * _update_bottom_camera - helper function to display bottom camera's frame
+        * _update_connections - slot updating the connection indicators
+        * _watch_received - helper function to emit a signal whenever the received data changes (at most once per
+          frame)
 
     Usage
     -----
 
     This screen can be switched to as many times as needed.
     """
+    # Create a QT signal to update the connection indicators as soon as the received data changes
+    received_changed = Signal()
 
     def __init__(self):
         """
@@ -313,9 +379,8 @@ class Home(Screen):
         """
         super(Home, self).__init__()
 
-        # Clocks used to update the sensor readings and the connections
+        # Clock used to update the sensor readings
         self._hardware_readings_clock = QTimer()
-        self._connection_readings_clock = QTimer()
 
         # Basic layout consists of vertical box layout, within which there are two rows (cameras and indicators)
         self._layout = QVBoxLayout()
@@ -335,6 +400,11 @@ class Home(Screen):
         self._config()
         self.setLayout(self._layout)
 
+        # Start watching the received data changes, remembering if the last update wasn't handled yet
+        self._update_pending = threading.Event()
+        self._received_thread = threading.Thread(target=self._watch_received, daemon=True)
+        self._received_thread.start()
+
     def _config(self):
         """
         Standard configuration method.
@@ -357,8 +427,8 @@ class Home(Screen):
         # Connect the clock timers to the functions
         self._hardware_readings_clock.setInterval(HARDWARE_READINGS_INTERVAL)
         self._hardware_readings_clock.timeout.connect(self._indicators.hardware.update)
-        self._connection_readings_clock.setInterval(CONNECTION_READINGS_INTERVAL)
-        self._connection_readings_clock.timeout.connect(self._indicators.connections.update)
+        self._hardware_readings_clock.timeout.connect(self._indicators.data.update)
+        self.received_changed.connect(self._update_connections)
 
     def _set_style(self):
         """
@@ -383,30 +453,53 @@ class Home(Screen):
         functionalities. Currently the following are implemented:
 
             1. Display the menu bar (and the line break) as it should only be disabled in the loading screen.
-            2. Start the connection check clock
-            3. Start the hardware readings clock for indicators
-            4. Connect the stream slots to the functions emitting frame signals
+            2. Start the hardware readings clock for indicators
+            3. Connect the stream slots to the functions emitting frame signals
         """
         super().on_switch()
 
-        # Set/Start global items - connections checker and menu bar
+        # Set/Start global items - menu bar
         self.manager.bar.setVisible(True)
         self.manager.line_break.setVisible(True)
-        self.manager.references.connection_clock.start()
 
         # Initially update the readings
         self._indicators.hardware.update()
         self._indicators.connections.update()
+        self._indicators.data.update()
 
         # Start indicator clocks
         self._hardware_readings_clock.start()
-        self._connection_readings_clock.start()
 
         # Connect stream slots
         self.manager.references.main_camera.frame_received.connect(self._update_main_camera)
         self.manager.references.top_camera.frame_received.connect(self._update_top_camera)
         self.manager.references.bottom_camera.frame_received.connect(self._update_bottom_camera)
 
+    @Slot()
+    def _update_connections(self):
+        """
+        Slot used to update the connection indicators within the GUI thread.
+        """
+        self._update_pending.clear()
+        self._indicators.connections.update()
+
+    def _watch_received(self):
+        """
+        Helper method used to emit a signal whenever the received data changes.
+
+        Blocks in a background thread until the data is written, so no polling is needed. The writes are coalesced - the
+        signal is only emitted once the previous update was handled, and at most once per `CONNECTION_UPDATE_INTERVAL`.
+        If the data doesn't change for `CONNECTION_IDLE_INTERVAL` seconds (for example, while disconnected), the signal
+        is emitted anyway to update the connection status.
+        """
+        version = dm.received.version
+        while True:
+            version = dm.received.wait_for_change(version, CONNECTION_IDLE_INTERVAL)
+            if not self._update_pending.is_set():
+                self._update_pending.set()
+                self.received_changed.emit()
+            time.sleep(CONNECTION_UPDATE_INTERVAL)
+
     def on_exit(self):
         """
         Stop the clocks and disconnect the streams.
@@ -415,7 +508,6 @@ class Home(Screen):
 
         # Stop indicator clocks
         self._hardware_readings_clock.stop()
-        self._connection_readings_clock.stop()
 
         # Disconnect stream slots
         self.manager.references.main_camera.frame_received.disconnect(self._update_main_camera)
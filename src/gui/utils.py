@@ -20,21 +20,6 @@ SCREEN_WIDTH, SCREEN_HEIGHT = pyautogui.size()
 SLIDING_MENU_WIDTH = SCREEN_WIDTH // 8
 MENU_BAR_HEIGHT = SCREEN_HEIGHT // 12
 
-# Set the interval to check the connection status and reconnect on errors
-CONNECTION_CLOCK_INTERVAL = 1000
-
-
-def check_connection():
-    """
-    Function used to check the connection and reconnect if disconnected.
-    """
-    if _References.connection.status == comms.ConnectionStatus.DISCONNECTED:
-        _References.connection.connect()
-    elif _References.connection.status == comms.ConnectionStatus.CONNECTED:
-        if not _References.connection.connected:
-            _References.connection.reconnect()
-
-
 def get_manager() -> typing.Union[QMainWindow, None]:
     """
     Getter to find the screen manager and return it.
@@ -81,7 +66,6 @@ class _References:
     controller: control.Controller = None
     control_manager: control.ControlManager = None
     connection: comms.Connection = None
-    connection_clock: QTimer = None
     main_camera: comms.VideoStream = None
     top_camera: comms.VideoStream = None
     bottom_camera: comms.VideoStream = None
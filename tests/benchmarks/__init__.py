@@ -0,0 +1,8 @@
+"""
+Benchmarks
+==========
+
+Benchmarking tools, executed as modules rather than collected by pytest, for example::
+
+    python -m tests.benchmarks.data_manager_benchmark --help
+"""
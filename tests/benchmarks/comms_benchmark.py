@@ -0,0 +1,216 @@
+"""
+Communication benchmark
+=======================
+
+Module storing a load and soak benchmark of the communication stack, ran against the local ROV simulator.
+
+Each scenario starts the simulator in a separate process (with the given latency, jitter, loss and disconnection
+probability) and exchanges the data with it for a fixed duration, reconnecting whenever the simulator disconnects. The
+results are summarised as the sustained exchange rate, the round-trip times, the reconnection times (from each injected
+disconnection to the next accepted connection) and the CPU time used by the surface processes.
+
+The connections are re-established on their own (the `Connection` scenarios by the connection's watchdog), and the
+round-trip times of the `engine` scenario are not recorded.
+
+The framed `Connection` scenarios can optionally queue a bulk transfer before connecting (echoed back by the simulator),
+to measure the round-trip times of the exchanges while the channels are loaded.
+
+.. warning::
+
+    The benchmark writes to the real shared memory segments - do not run it alongside the application.
+"""
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import time
+import psutil
+from src.common import get_processes
+from src.comms import Connection, AsyncConnection, ConnectionEngine, ConnectionMetrics, ConnectionProtocol, \
+    RovSimulator, Channel
+
+# Declare the default parameters of the benchmark
+DEFAULT_DURATION = 5
+DEFAULT_PORT = 50400
+
+# Declare the connection options of each scenario, and whether it's served by the connection engine
+SCENARIOS = {
+    "json": (dict(protocol=ConnectionProtocol.JSON, echo=True), False),
+    "binary": (dict(protocol=ConnectionProtocol.BINARY), False),
+    "framed": (dict(protocol=ConnectionProtocol.FRAMED), False),
+    "delta": (dict(protocol=ConnectionProtocol.FRAMED, delta=True), False),
+    "engine": (dict(protocol=ConnectionProtocol.FRAMED), True),
+}
+
+
+def _simulate(options: dict, ready: mp.Event, stop: mp.Event, results: mp.Queue):
+    """
+    Function used as a target for the simulator's process.
+
+    :param options: Keyword arguments of the simulator
+    :param ready: Event set once the simulator is listening
+    :param stop: Event to stop the simulator
+    :param results: Queue to put the simulator's statistics into
+    """
+    logging.disable(logging.INFO)
+    simulator = RovSimulator(**options)
+    simulator.start()
+    ready.set()
+    stop.wait()
+    simulator.stop()
+    results.put(simulator.stats())
+
+
+def _cpu_time(excluded: int) -> float:
+    """
+    Function used to measure the CPU time used so far by the current process and its children (including the finished
+    ones), except the simulator.
+
+    :param excluded: Pid of the simulator's process
+    :return: CPU time (in seconds)
+    """
+    processes = get_processes(mp.current_process().pid)
+    times = processes[0].cpu_times()
+    total = times.children_user + times.children_system
+    for process in processes:
+        if process.pid != excluded:
+            try:
+                times = process.cpu_times()
+                total += times.user + times.system
+            except psutil.Error:
+                pass
+    return total
+
+
+def _loaded(scenario: str) -> bool:
+    """
+    Function used to check whether the bulk transfers can be sent in the scenario.
+
+    :param scenario: Name of the scenario (one of `SCENARIOS`)
+    :return: Whether the scenario uses the framed `Connection`
+    """
+    options, engine = SCENARIOS[scenario]
+    return not engine and options["protocol"] == ConnectionProtocol.FRAMED
+
+
+def _exchange(scenario: str, port: int, rate: float, duration: float, bulk: int):
+    """
+    Function used to exchange the data with the simulator for a fixed duration.
+
+    :param scenario: Name of the scenario (one of `SCENARIOS`)
+    :param port: Port of the simulator
+    :param rate: Number of exchanges per second, or None to exchange the data as fast as possible
+    :param duration: Duration of the benchmark (in seconds)
+    :param bulk: Size (in bytes) of the bulk transfer queued before connecting
+    :return: Metrics of the exchanges, or None if they're not recorded
+    """
+    options, engine = SCENARIOS[scenario]
+
+    if engine:
+        engine = ConnectionEngine()
+        connection = AsyncConnection(port=port, rate=rate, engine=engine, **options)
+        connection.connect()
+        time.sleep(duration)
+        engine.stop()
+        return None
+
+    connection = Connection(port=port, rate=rate, **options)
+    metrics = ConnectionMetrics(f"connection_{port}")
+    metrics.reset()
+    metrics.close()
+    if bulk:
+        connection.send(bytes(bulk), Channel.BULK)
+    connection.connect()
+    time.sleep(duration)
+
+    result = connection.stats()
+    connection.close()
+    return result
+
+
+def run(scenario: str, duration: float = DEFAULT_DURATION, port: int = DEFAULT_PORT, rate: float = None,
+        bulk: int = 0, **simulator: float) -> dict:
+    """
+    Function used to run a single scenario.
+
+    :param scenario: Name of the scenario (one of `SCENARIOS`)
+    :param duration: Duration of the benchmark (in seconds)
+    :param port: Port of the simulator
+    :param rate: Number of exchanges per second, or None to exchange the data as fast as possible
+    :param bulk: Size (in bytes) of the bulk transfer queued before connecting (ignored unless framed `Connection`)
+    :param simulator: Faults injected by the simulator (see :class:`RovSimulator`)
+    :return: Dictionary of the scenario's parameters and results
+    """
+    protocol = SCENARIOS[scenario][0]["protocol"]
+    bulk = bulk if _loaded(scenario) else 0
+    options = dict(port=port, protocol=protocol, loopback=bool(bulk), **simulator)
+    ready, stop, results = mp.Event(), mp.Event(), mp.Queue()
+    process = mp.Process(target=_simulate, args=(options, ready, stop, results))
+    process.start()
+    ready.wait()
+
+    start, cpu = time.perf_counter(), _cpu_time(process.pid)
+    metrics = _exchange(scenario, port, rate, duration, bulk)
+    elapsed, cpu = time.perf_counter() - start, _cpu_time(process.pid) - cpu
+
+    stop.set()
+    stats = results.get()
+    process.join()
+
+    return {
+        "scenario": scenario,
+        "duration": duration,
+        "rate": rate,
+        "bulk": bulk,
+        **simulator,
+        "exchanges": stats["exchanges"],
+        "exchanges_per_second": round(stats["exchanges"] / elapsed),
+        "transfer_bytes": stats["transfer_bytes"],
+        "rtt_us": metrics["all_rtt_us"] if metrics else None,
+        "disconnections": stats["disconnections"],
+        "reconnection_ms": stats["reconnection_ms"],
+        "cpu_percent": round(cpu / elapsed * 100, 1),
+    }
+
+
+def main(args: list = None) -> int:
+    """
+    Function used to run the benchmark from the command line, printing the results and optionally saving them as JSON.
+
+    :param args: Command line arguments (defaults to `sys.argv`)
+    :return: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Load and soak benchmark of the communication stack")
+    parser.add_argument("-d", "--duration", type=float, default=DEFAULT_DURATION, help="duration of each scenario")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help="port of the simulator")
+    parser.add_argument("-r", "--rate", type=float, help="exchanges per second (as fast as possible by default)")
+    parser.add_argument("-c", "--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.0, help="minimum delay of the replies (in seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random delay added (in seconds)")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability of losing a reply")
+    parser.add_argument("--disconnect", type=float, default=0.0, help="probability of disconnecting per exchange")
+    parser.add_argument("-b", "--bulk", type=int, default=0, help="size of the bulk transfer (framed scenarios only)")
+    parser.add_argument("-o", "--output", help="path to the JSON file to save the results in")
+    args = parser.parse_args(args)
+
+    results = list()
+    print(f"{'scenario':<9} {'exchanges/s':>12} {'p50 us':>9} {'p99 us':>9} {'disconnects':>12} "
+          f"{'reconnect p50 ms':>17} {'reconnect max ms':>17} {'cpu %':>7}")
+    for scenario in args.scenarios:
+        r = run(scenario, args.duration, args.port, args.rate, args.bulk, latency=args.latency, jitter=args.jitter,
+                loss=args.loss, disconnect=args.disconnect)
+        results.append(r)
+        rtt = r["rtt_us"] or {"p50": "-", "p99": "-"}
+        print(f"{scenario:<9} {r['exchanges_per_second']:>12} {rtt['p50']:>9} {rtt['p99']:>9} "
+              f"{r['disconnections']:>12} {r['reconnection_ms']['p50']:>17} {r['reconnection_ms']['max']:>17} "
+              f"{r['cpu_percent']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,248 @@
+"""
+Data manager benchmark
+======================
+
+Module storing a multi-process contention benchmark of the data manager's shared memory segments.
+
+Each scenario spawns a number of reader and writer processes, which access the same segment with a given pair of
+methods for a fixed duration. The latency of each operation and the time spent waiting for the segment's lock are
+recorded, and summarised as operations per second, latency percentiles and lock wait times.
+
+The debug logs are disabled in the benchmarking processes by default, since writing them dominates the cost of most
+methods - use `--debug-logs` to measure the methods with the logging overhead included.
+
+The benchmark accesses a separate set of (non-persisted) segments, which are removed once each scenario is finished,
+so it can run alongside the application.
+"""
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import sys
+import time
+import numpy as np
+from src.common import dm
+from src.common.stats import TimedLock
+
+# Declare the default parameters of the benchmark
+DEFAULT_READERS = 3
+DEFAULT_WRITERS = 1
+DEFAULT_DURATION = 2
+DEFAULT_SEGMENT = "transmission"
+
+# Declare the prefix of the names of the benchmarked segments
+SEGMENTS_PREFIX = "benchmark_"
+
+# Declare the pairs of read and write methods benchmarked against each other
+SCENARIOS = {
+    "item": ("getitem", "setitem"),
+    "attribute": ("getattr", "setattr"),
+    "accessor": ("accessor_get", "accessor_set"),
+    "all": ("get_all", "update"),
+    "many": ("get_many", "set_many"),
+    "changed": ("get_changed", "set_many"),
+}
+
+# Declare the percentiles reported for the latencies
+PERCENTILES = {"p50": 50, "p99": 99, "p999": 99.9}
+
+
+class _LockWaits:
+    """
+    Counters of the lock acquisitions of a single process, and the time spent waiting for them (see `TimedLock`).
+    """
+
+    def __init__(self):
+        """
+        Standard constructor.
+        """
+        self.acquisitions = 0
+        self.wait_total = 0
+        self.wait_max = 0
+
+    def count_lock(self, wait: int):
+        self.acquisitions += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+
+def _new_operation(segment, method: str, keys: list):
+    """
+    Function used to build an operation (function without arguments) executing given method on the segment.
+
+    The written values are derived from the segment's initial values, and change with each call.
+
+    :param segment: Shared memory segment
+    :param method: Name of the method
+    :param keys: Keys of the segment
+    :raises: ValueError
+    :return: Operation to benchmark
+    """
+    key = keys[0]
+    defaults = segment.get_all()
+    values = [{k: type(v)(i % 2) for k, v in defaults.items()} for i in range(2)]
+    counter = iter(range(sys.maxsize))
+    accessor = segment.accessor(key)
+    key_set = segment.key_set(keys[:len(keys) // 2 or 1])
+    version = [None]
+
+    def _get_changed():
+        _, version[0] = segment.get_changed(version[0])
+
+    operations = {
+        "getitem": lambda: segment[key],
+        "setitem": lambda: segment.__setitem__(key, values[next(counter) % 2][key]),
+        "getattr": lambda: getattr(segment, key),
+        "setattr": lambda: setattr(segment, key, values[next(counter) % 2][key]),
+        "accessor_get": accessor.get,
+        "accessor_set": lambda: accessor.set(values[next(counter) % 2][key]),
+        "get_all": segment.get_all,
+        "update": lambda: segment.update(values[next(counter) % 2]),
+        "get_many": lambda: segment.get_many(key_set),
+        "set_many": lambda: segment.set_many(values[next(counter) % 2]),
+        "get_changed": _get_changed,
+    }
+
+    if method not in operations:
+        raise ValueError(f"Unknown method - {method}")
+    return operations[method]
+
+
+def _work(segment_name: str, method: str, duration: float, debug_logs: bool, barrier: mp.Barrier,
+          results: mp.Queue):
+    """
+    Function used as a target for the reader and writer processes.
+
+    :param segment_name: Name of the segment to access
+    :param method: Name of the method to benchmark
+    :param duration: Duration of the benchmark (in seconds)
+    :param debug_logs: Whether to keep the debug logs enabled
+    :param barrier: Barrier synchronising the start of all processes
+    :param results: Queue to put the latencies and lock statistics into
+    """
+    if not debug_logs:
+        logging.disable(logging.DEBUG)
+
+    # Measure the waits for all locks of the segment - the main lock and the lock of each stripe
+    waits = _LockWaits()
+    segment = getattr(type(dm)(SEGMENTS_PREFIX, persistence_dir=None), segment_name)
+    segment._locks = tuple(TimedLock(lock, waits) for lock in segment._locks)
+    segment._lock = segment._locks[0]
+    operation = _new_operation(segment, method, list(segment.schema))
+    latencies = list()
+
+    barrier.wait()
+    end = time.perf_counter_ns() + int(duration * 1e9)
+    now = time.perf_counter_ns()
+    while now < end:
+        operation()
+        latencies.append(-now + (now := time.perf_counter_ns()))
+
+    results.put((method, np.array(latencies, dtype=np.int64), waits.acquisitions, waits.wait_total, waits.wait_max))
+
+
+def _summarise(role: str, method: str, processes: int, duration: float, samples: list) -> dict:
+    """
+    Function used to summarise the results of all processes using the same method.
+
+    :param role: Either "reader" or "writer"
+    :param method: Name of the method
+    :param processes: Number of processes
+    :param duration: Duration of the benchmark (in seconds)
+    :param samples: Collection of latencies, lock acquisitions, total and maximum lock waits of each process
+    :return: Dictionary of the results
+    """
+    latencies = np.concatenate([latency for latency, *_ in samples]) / 1000
+    acquisitions = sum(s[1] for s in samples)
+    return {
+        "role": role,
+        "method": method,
+        "processes": processes,
+        "operations": len(latencies),
+        "ops_per_second": round(len(latencies) / duration),
+        **{f"{name}_us": round(float(np.percentile(latencies, p)), 3) for name, p in PERCENTILES.items()},
+        "lock_acquisitions": acquisitions,
+        "lock_wait_total_us": round(sum(s[2] for s in samples) / 1000, 3),
+        "lock_wait_max_us": round(max(s[3] for s in samples) / 1000, 3),
+        "lock_wait_mean_us": round(sum(s[2] for s in samples) / 1000 / acquisitions, 3) if acquisitions else 0,
+    }
+
+
+def run(scenario: str, segment: str = DEFAULT_SEGMENT, readers: int = DEFAULT_READERS,
+        writers: int = DEFAULT_WRITERS, duration: float = DEFAULT_DURATION, debug_logs: bool = False) -> dict:
+    """
+    Function used to run a single scenario.
+
+    :param scenario: Name of the scenario (one of `SCENARIOS`)
+    :param segment: Name of the segment to access
+    :param readers: Number of reader processes
+    :param writers: Number of writer processes
+    :param duration: Duration of the benchmark (in seconds)
+    :param debug_logs: Whether to keep the debug logs enabled
+    :return: Dictionary of the scenario's parameters and the results of the readers and the writers
+    """
+    read_method, write_method = SCENARIOS[scenario]
+    barrier = mp.Barrier(readers + writers)
+    results = mp.Queue()
+    processes = [mp.Process(target=_work, args=(segment, read_method, duration, debug_logs, barrier, results))
+                 for _ in range(readers)]
+    processes += [mp.Process(target=_work, args=(segment, write_method, duration, debug_logs, barrier, results))
+                  for _ in range(writers)]
+
+    # Create the segments before starting the processes, and remove them once all processes are finished
+    segments = type(dm)(SEGMENTS_PREFIX, persistence_dir=None)
+    try:
+        for process in processes:
+            process.start()
+        samples = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        segments.unlink()
+
+    summaries = list()
+    for role, method, count in (("reader", read_method, readers), ("writer", write_method, writers)):
+        if count:
+            summaries.append(_summarise(role, method, count, duration, [s[1:] for s in samples if s[0] == method]))
+            samples = [s for s in samples if s[0] != method]
+
+    return {"scenario": scenario, "segment": segment, "duration": duration, "debug_logs": debug_logs,
+            "results": summaries}
+
+
+def main(args: list = None) -> int:
+    """
+    Function used to run the benchmark from the command line, printing the results and optionally saving them as JSON.
+
+    :param args: Command line arguments (defaults to `sys.argv`)
+    :return: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Multi-process contention benchmark of the data manager")
+    parser.add_argument("-r", "--readers", type=int, default=DEFAULT_READERS, help="number of reader processes")
+    parser.add_argument("-w", "--writers", type=int, default=DEFAULT_WRITERS, help="number of writer processes")
+    parser.add_argument("-d", "--duration", type=float, default=DEFAULT_DURATION, help="duration of each scenario")
+    parser.add_argument("-s", "--segment", default=DEFAULT_SEGMENT, choices=("transmission", "control", "received"))
+    parser.add_argument("-c", "--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--debug-logs", action="store_true", help="keep the debug logs enabled")
+    parser.add_argument("-o", "--output", help="path to the JSON file to save the results in")
+    args = parser.parse_args(args)
+
+    results = list()
+    print(f"{'scenario':<10} {'role':<7} {'method':<13} {'ops/s':>10} {'p50 us':>9} {'p99 us':>9} {'p999 us':>9} "
+          f"{'lock wait us':>13}")
+    for scenario in args.scenarios:
+        result = run(scenario, args.segment, args.readers, args.writers, args.duration, args.debug_logs)
+        results.append(result)
+        for r in result["results"]:
+            print(f"{scenario:<10} {r['role']:<7} {r['method']:<13} {r['ops_per_second']:>10} {r['p50_us']:>9} "
+                  f"{r['p99_us']:>9} {r['p999_us']:>9} {r['lock_wait_mean_us']:>13}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
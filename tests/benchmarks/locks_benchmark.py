@@ -0,0 +1,117 @@
+"""
+Locks benchmark
+===============
+
+Module storing a multi-process contention benchmark of the inter-process locks guarding the shared memory segments.
+
+Each scenario spawns a number of processes, which acquire and release the same named lock of a given type for a fixed
+duration. The latency of each round-trip (acquisition and release) is recorded, and summarised as round-trips per second
+and latency percentiles.
+"""
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import time
+import numpy as np
+from src.common import LockType
+from src.common.locks import new_lock, SEMAPHORES_SUPPORTED
+
+# Declare the default parameters of the benchmark
+DEFAULT_PROCESSES = 4
+DEFAULT_DURATION = 2
+
+# Declare the name of the benchmarked locks
+LOCK_NAME = "benchmark"
+
+# Declare the lock types benchmarked - the semaphore-based locks only if supported
+LOCK_TYPES = [LockType.FILE] + ([LockType.SEMAPHORE] if SEMAPHORES_SUPPORTED else [])
+
+# Declare the percentiles reported for the latencies
+PERCENTILES = {"p50": 50, "p99": 99, "p999": 99.9}
+
+
+def _work(lock_type: LockType, duration: float, barrier: mp.Barrier, results: mp.Queue):
+    """
+    Function used as a target for the contending processes.
+
+    :param lock_type: Type of the lock
+    :param duration: Duration of the benchmark (in seconds)
+    :param barrier: Barrier synchronising the start of all processes
+    :param results: Queue to put the latencies into
+    """
+    logging.disable(logging.INFO)
+    lock = new_lock(LOCK_NAME, lock_type)
+    latencies = list()
+
+    barrier.wait()
+    end = time.perf_counter_ns() + int(duration * 1e9)
+    now = time.perf_counter_ns()
+    while now < end:
+        lock.acquire()
+        lock.release()
+        latencies.append(-now + (now := time.perf_counter_ns()))
+
+    results.put(np.array(latencies, dtype=np.int64))
+
+
+def run(lock_type: LockType, processes: int = DEFAULT_PROCESSES, duration: float = DEFAULT_DURATION) -> dict:
+    """
+    Function used to run a single scenario.
+
+    :param lock_type: Type of the lock
+    :param processes: Number of contending processes
+    :param duration: Duration of the benchmark (in seconds)
+    :return: Dictionary of the scenario's parameters and results
+    """
+    barrier, results = mp.Barrier(processes), mp.Queue()
+    workers = [mp.Process(target=_work, args=(lock_type, duration, barrier, results)) for _ in range(processes)]
+
+    for worker in workers:
+        worker.start()
+    latencies = np.concatenate([results.get() for _ in workers]) / 1000
+    for worker in workers:
+        worker.join()
+    new_lock(LOCK_NAME, lock_type).unlink()
+
+    return {
+        "lock_type": lock_type.name,
+        "processes": processes,
+        "duration": duration,
+        "round_trips": len(latencies),
+        "round_trips_per_second": round(len(latencies) / duration),
+        "mean_us": round(float(latencies.mean()), 3),
+        **{f"{name}_us": round(float(np.percentile(latencies, p)), 3) for name, p in PERCENTILES.items()},
+    }
+
+
+def main(args: list = None) -> int:
+    """
+    Function used to run the benchmark from the command line, printing the results and optionally saving them as JSON.
+
+    :param args: Command line arguments (defaults to `sys.argv`)
+    :return: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Multi-process contention benchmark of the inter-process locks")
+    parser.add_argument("-p", "--processes", type=int, default=DEFAULT_PROCESSES, help="number of processes")
+    parser.add_argument("-d", "--duration", type=float, default=DEFAULT_DURATION, help="duration of each scenario")
+    parser.add_argument("-o", "--output", help="path to the JSON file to save the results in")
+    args = parser.parse_args(args)
+
+    results = list()
+    print(f"{'lock':<10} {'round-trips/s':>14} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'p999 us':>9}")
+    for lock_type in LOCK_TYPES:
+        r = run(lock_type, args.processes, args.duration)
+        results.append(r)
+        print(f"{r['lock_type']:<10} {r['round_trips_per_second']:>14} {r['mean_us']:>9} {r['p50_us']:>9} "
+              f"{r['p99_us']:>9} {r['p999_us']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,199 @@
+"""
+Connection related tests.
+
+The tests are first reconfiguring the loggers to use the local assets folder instead of the production environment.
+"""
+import os
+import time
+import socket
+import struct
+import pytest
+from .utils import TESTS_ASSETS_LOG_DIR, get_log_files, replace_segments, wait_for
+from src.common import Log, dm
+from src.comms import Connection, ConnectionProtocol, RovSimulator, Channel, CHANNEL_BUDGET
+
+# Declare the port of the test simulator
+PORT = 50341
+
+
+def test_reconnect():
+    """
+    Test that the communication process is kept between the connections, and is only terminated once closed.
+    """
+    simulator = RovSimulator(port=PORT, protocol=ConnectionProtocol.FRAMED)
+    simulator.start()
+    connection = Connection(port=PORT, protocol=ConnectionProtocol.FRAMED)
+    try:
+        connection.connect()
+        assert wait_for(lambda: simulator.stats()["exchanges"] > 0 and connection.connected)
+        process = connection._process.pid
+
+        connection.reconnect()
+        assert wait_for(lambda: simulator.stats()["connections"] == 2 and connection.connected)
+        exchanges = simulator.stats()["exchanges"]
+        assert wait_for(lambda: simulator.stats()["exchanges"] > exchanges)
+        assert connection._process.pid == process
+        assert wait_for(lambda: connection.stats()["alive"])
+        assert connection.stats()["last_reply_ms"] < 1000
+
+        connection.disconnect()
+        assert not connection.connected
+        assert connection._process.is_alive()
+    finally:
+        connection.close()
+        simulator.stop()
+
+    assert not connection._process.is_alive()
+
+
+def test_reconnect_loop():
+    """
+    Test that the watchdog never drops the connections while they are being established, by reconnecting repeatedly.
+    """
+    simulator = RovSimulator(port=PORT)
+    simulator.start()
+    connection = Connection(port=PORT)
+    try:
+        connection.connect()
+        assert wait_for(lambda: connection.connected)
+        for connections in range(2, 22):
+            connection.reconnect()
+            assert wait_for(lambda: simulator.stats()["connections"] == connections and connection.connected)
+        time.sleep(0.3)
+        assert simulator.stats()["connections"] == 21
+    finally:
+        connection.close()
+        simulator.stop()
+
+
+def test_reset():
+    """
+    Test that the connection is re-established once reset by the server (shutting down the reset socket fails).
+    """
+    with socket.socket() as server:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("localhost", PORT))
+        server.listen()
+        server.settimeout(5)
+        connection = Connection(port=PORT)
+        try:
+            connection.connect()
+            client, _ = server.accept()
+            client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            client.close()
+
+            client, _ = server.accept()
+            client.close()
+        finally:
+            connection.close()
+
+
+def test_invalid_data():
+    """
+    Test that the received data not matching the received segment's schema is skipped, without stopping the connection.
+    """
+    with socket.socket() as server:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(("localhost", PORT))
+        server.listen()
+        server.settimeout(5)
+        connection = Connection(port=PORT)
+        try:
+            connection.connect()
+            client, _ = server.accept()
+            with client:
+                for reply in (b'{"unknown": 1}', b'{"S_I": 1.5}', b'{"S_I": 5}'):
+                    assert client.recv(4096)
+                    client.sendall(reply)
+                assert wait_for(lambda: dm.received["S_I"] == 5)
+                assert client.recv(4096)
+                assert connection.connected
+
+                # The connection wasn't re-established
+                server.settimeout(0.1)
+                with pytest.raises(socket.timeout):
+                    server.accept()
+        finally:
+            connection.close()
+
+
+def test_watchdog():
+    """
+    Test that the transmission data is zeroed once the server doesn't reply within the heartbeat timeout, and that the
+    connection is re-established without any calls.
+    """
+    simulator = RovSimulator(port=PORT, latency=0.3)
+    simulator.start()
+    connection = Connection(port=PORT, heartbeat_timeout=0.1)
+    try:
+        dm.transmission["T_HFP"] = 1600
+        connection.connect()
+        assert wait_for(lambda: simulator.stats()["exchanges"] > 0)
+        assert simulator.transmission["T_HFP"] == 1600
+        assert wait_for(lambda: simulator.stats()["connections"] >= 2)
+        assert dm.transmission["T_HFP"] == 0
+        assert not connection.stats()["alive"]
+    finally:
+        connection.close()
+        simulator.stop()
+
+    with pytest.raises(ValueError):
+        Connection(heartbeat_timeout=0)
+
+
+def test_channels():
+    """
+    Test that the transfers are sent and received over the channels alongside the exchanges, the control transfers
+    before the bulk ones.
+    """
+    simulator = RovSimulator(port=PORT, protocol=ConnectionProtocol.FRAMED, loopback=True)
+    simulator.start()
+    connection = Connection(port=PORT, protocol=ConnectionProtocol.FRAMED)
+    try:
+        data = bytes(range(256)) * 1000
+        connection.send(data)
+        connection.send(b"stop", Channel.CONTROL)
+        connection.connect()
+
+        assert connection.receive(timeout=5) == (Channel.CONTROL, b"stop")
+        assert connection.receive(timeout=5) == (Channel.BULK, data)
+        assert connection.receive() is None
+        assert simulator.stats()["exchanges"] > len(data) // CHANNEL_BUDGET
+    finally:
+        connection.close()
+        simulator.stop()
+
+    connection = Connection(port=PORT)
+    try:
+        with pytest.raises(ValueError):
+            connection.send(b"")
+    finally:
+        connection.close()
+
+
+@pytest.fixture(autouse=True)
+def segments(monkeypatch):
+    """
+    PyTest fixture replacing the data manager's segments with the test segments, and removing them once the test is
+    finished.
+    """
+    segments = replace_segments(dm, monkeypatch)
+    yield segments
+    segments.unlink()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def config():
+    """
+    PyTest fixture for the configuration function - used to execute config before any test is ran.
+
+    `scope` parameter is used to share fixture instance across the module session, whereas `autouse` ensures all tests
+    in session use the fixture automatically.
+    """
+
+    # Remove all log files from the assets folder.
+    for log_file in get_log_files(TESTS_ASSETS_LOG_DIR):
+        os.remove(log_file)
+
+    # Reconfigure the logger to use a separate folder (instead of the real logs)
+    Log.reconfigure(log_directory=TESTS_ASSETS_LOG_DIR)
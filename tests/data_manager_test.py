@@ -0,0 +1,447 @@
+"""
+Data manager related tests.
+
+The tests are first reconfiguring the loggers to use the local assets folder instead of the production environment.
+"""
+import os
+import time
+import logging
+import struct
+import threading
+import multiprocessing
+import pytest
+from .utils import TESTS_ASSETS_LOG_DIR, get_log_files, replace_segments
+from src.common import Log, dm, CONTROL_DICT, TRANSMISSION_DICT, ReadMode
+from src.common.locks import new_lock
+
+# Declare the initial values of the sequence-locked test segment, the number of writes made by its writer process, and
+# the keys written
+SEQLOCK_DATA = {f"key_{i}": 0 for i in range(16)}
+SEQLOCK_WRITES = 5000
+SEQLOCK_KEYS = tuple(SEQLOCK_DATA)[::2]
+
+
+def _new_seqlock_segment():
+    """
+    Helper function used to create (or open) the sequence-locked test segment.
+
+    :return: Test segment
+    """
+    return type(dm.received)("test_seqlock", SEQLOCK_DATA, new_lock("test_seqlock_lock"), ReadMode.SEQLOCK)
+
+
+def _write_seqlock_segment():
+    """
+    Helper function used as a target for the writer process, writing the same counter into every other key.
+
+    The written keys aren't adjacent, so each write is made in multiple steps, which the readers could interleave with.
+    The debug logs are disabled, so that the writes aren't dominated by the logging.
+    """
+    logging.disable(logging.DEBUG)
+    segment = _new_seqlock_segment()
+    for i in range(1, SEQLOCK_WRITES + 1):
+        segment.set_many(dict.fromkeys(SEQLOCK_KEYS, i))
+
+
+def _hold_seqlock_segment(held: multiprocessing.Event, value: int, terminate: bool):
+    """
+    Helper function used as a target for the holding process, writing into the segment by hand while holding its lock.
+
+    The first key is written, then all keys are written after a delay - or the process is terminated in the middle of
+    the write, leaving the sequence counter odd.
+
+    :param held: Event set once the write started
+    :param value: Value to write into all keys
+    :param terminate: Whether to terminate in the middle of the write
+    """
+    segment = _new_seqlock_segment()
+    offset = segment._stamps_offset - segment._sequences.size
+    segment._lock.acquire()
+
+    sequence, = struct.unpack_from("<Q", segment._buf, offset)
+    struct.pack_into("<Q", segment._buf, offset, sequence + 1)
+    key_offset, item, *_ = segment._lookup["key_0"]
+    item.pack_into(segment._buf, key_offset, value)
+    held.set()
+    time.sleep(0.2)
+    if terminate:
+        os._exit(0)
+
+    segment._struct.pack_into(segment._buf, segment._offset, *(value for _ in SEQLOCK_DATA))
+    struct.pack_into("<Q", segment._buf, offset, sequence + 2)
+    segment._lock.release()
+
+
+def test_float_precision():
+    """
+    Test that the float values are stored without losing precision.
+    """
+    dm.control["manual_yaw"] = 0.123
+    assert dm.control["manual_yaw"] == 0.123
+
+
+def test_invalid_type():
+    """
+    Test that writing a value not matching the schema raises an error, without writing any of the values.
+    """
+    with pytest.raises(ValueError):
+        dm.transmission["T_HFP"] = 1.5
+
+    # None of the values is written if any of them is invalid
+    data, version = dm.control.get_all(), dm.control.version
+    with pytest.raises(ValueError):
+        dm.control.update({"mode": 2, "manual_yaw": 0.5, "autonomous_yaw": "invalid"})
+    assert dm.control.get_all() == data
+    assert dm.control.version == version
+
+
+def test_invalid_key():
+    """
+    Test that accessing an unregistered key raises an error.
+    """
+    with pytest.raises(KeyError):
+        _ = dm.transmission["unknown"]
+    with pytest.raises(KeyError):
+        dm.control.update({"unknown": 0})
+
+
+def test_get_all():
+    """
+    Test that all values are retrieved at once, in the order they were registered in.
+    """
+    dm.control.update({"mode": 1, "manual_surge": -0.5})
+    data = dm.control.get_all()
+
+    assert list(data) == list(CONTROL_DICT)
+    assert data["mode"] == 1
+    assert data["manual_surge"] == -0.5
+
+
+def test_accessors():
+    """
+    Test that the values can be accessed as attributes and via pre-compiled accessors.
+    """
+    accessor = dm.transmission.accessor("T_VFP")
+    assert dm.transmission.accessor("T_VFP") is accessor
+
+    dm.transmission.T_VFP = 1200
+    assert accessor.get() == dm.transmission["T_VFP"] == 1200
+    accessor.set(1700)
+    assert dm.transmission.T_VFP == 1700
+
+    with pytest.raises(AttributeError):
+        _ = dm.transmission.unknown
+    with pytest.raises(KeyError):
+        dm.transmission.accessor("unknown")
+
+
+def test_many():
+    """
+    Test that multiple values are read and written at once, including via pre-compiled key sets.
+    """
+    dm.transmission.set_many({"T_M": 5, "T_HFP": 1100, "T_HFS": 1900})
+    assert dm.transmission.get_many(["T_HFS", "T_M", "T_HFP"]) == {"T_HFP": 1100, "T_HFS": 1900, "T_M": 5}
+
+    key_set = dm.transmission.key_set(("T_HFS", "T_HFP"))
+    assert key_set.keys == ("T_HFP", "T_HFS")
+    assert dm.transmission.get_many(key_set) == {"T_HFP": 1100, "T_HFS": 1900}
+
+    with pytest.raises(KeyError):
+        dm.transmission.set_many({"T_HFP": 1100, "unknown": 0})
+
+
+def test_version():
+    """
+    Test that each write increments the version, and that waiting for changes times out without writes.
+    """
+    version = dm.received.version
+    assert dm.received.wait_for_change(version, timeout=0.01) == version
+
+    dm.received.update({"S_O": 1, "S_I": 2})
+    assert dm.received.version == version + 1
+    assert dm.received.wait_for_change(version, timeout=0.01) == version + 1
+
+
+def test_wait_for_change():
+    """
+    Test that waiting for changes is interrupted by a write in a different thread.
+    """
+    version = dm.received.version
+    timer = threading.Timer(0.05, dm.received.__setitem__, ("S_O", 3))
+    timer.start()
+
+    assert dm.received.wait_for_change(version, timeout=5) == version + 1
+    assert dm.received["S_O"] == 3
+    timer.join()
+
+
+def test_get_changed():
+    """
+    Test that only the values changed since the given version are retrieved.
+    """
+    data, version = dm.control.get_changed(None)
+    assert data == dm.control.get_all()
+    assert dm.control.get_changed(version) == ({}, version)
+
+    dm.control.update({"manual_sway": 0.25, "autonomous_heave": -1.0})
+    updated = dm.control.version
+    dm.control["mode"] = 2
+    changed = {"mode": 2, "manual_sway": 0.25, "autonomous_heave": -1.0}
+    assert dm.control.get_changed(version) == (changed, dm.control.version)
+    assert dm.control.get_changed(updated) == ({"mode": 2}, dm.control.version)
+
+
+def test_stripes():
+    """
+    Test that the control segment's stripes are versioned separately, and that their writers don't overwrite each other.
+    """
+    mode, manual, autonomous = dm.control.version
+    dm.control.update({"manual_yaw": 0.5, "autonomous_yaw": 0.5})
+    assert dm.control.version == (mode, manual + 1, autonomous + 1)
+    dm.control["mode"] = 1
+    assert dm.control.version == (mode + 1, manual + 1, autonomous + 1)
+
+    def _write(prefix: str):
+        for i in range(100):
+            dm.control.update({prefix + "yaw": float(i), prefix + "pitch": float(-i)})
+
+    writers = [threading.Thread(target=_write, args=(prefix,)) for prefix in ("manual_", "autonomous_")]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert dm.control.get_many(["manual_yaw", "manual_pitch", "autonomous_yaw", "autonomous_pitch"]) == \
+        {"manual_yaw": 99.0, "manual_pitch": -99.0, "autonomous_yaw": 99.0, "autonomous_pitch": -99.0}
+
+    version = dm.control.version
+    timer = threading.Timer(0.05, dm.control.__setitem__, ("autonomous_roll", 0.5))
+    timer.start()
+    assert dm.control.wait_for_change(version, timeout=5) == (version[0], version[1], version[2] + 1)
+    timer.join()
+
+
+def test_seqlock_processes(seqlock_segment):
+    """
+    Test that the sequence-locked snapshots read while a different process writes the segment are never torn.
+    """
+    writer = multiprocessing.Process(target=_write_seqlock_segment)
+    writer.start()
+
+    logging.disable(logging.DEBUG)
+    try:
+        snapshots, last = 0, 0
+        while writer.is_alive():
+            data = seqlock_segment.get_all()
+            values = {data[key] for key in SEQLOCK_KEYS}
+            assert len(values) == 1
+            value = values.pop()
+            assert value >= last
+            snapshots, last = snapshots + 1, value
+    finally:
+        logging.disable(logging.NOTSET)
+        writer.join()
+
+    assert snapshots
+    assert seqlock_segment.get_many(SEQLOCK_KEYS) == dict.fromkeys(SEQLOCK_KEYS, SEQLOCK_WRITES)
+
+
+@pytest.mark.parametrize("terminate", (False, True))
+def test_seqlock_fallback(seqlock_segment, terminate):
+    """
+    Test that the reads falling back to the locked reads wait for the write in progress, and repair the sequence counter
+    if the writer was terminated in the middle of the write.
+    """
+    held = multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold_seqlock_segment, args=(held, 7, terminate))
+    holder.start()
+    assert held.wait(5)
+
+    start = time.monotonic()
+    data = seqlock_segment.get_all()
+    assert time.monotonic() - start > 0.1
+    holder.join()
+
+    assert data == (dict(SEQLOCK_DATA, key_0=7) if terminate else dict.fromkeys(SEQLOCK_DATA, 7))
+    version = seqlock_segment.version
+    seqlock_segment["key_1"] = 1
+    assert seqlock_segment.version == version + 1
+    assert seqlock_segment["key_1"] == 1
+
+
+def _abandon_double_buffer_write(value: int):
+    """
+    Helper function used as a target for the process terminated in the middle of a write into the double-buffered
+    transmission segment, after writing the value into the back frame's "T_HFS" key.
+
+    :param value: Value to write
+    """
+    segment = dm.transmission
+    offset = segment._stamps_offset - segment._sequences.size
+    segment._lock.acquire()
+
+    sequence, = struct.unpack_from("<Q", segment._buf, offset)
+    struct.pack_into("<Q", segment._buf, offset, sequence + 1)
+    key_offset, item, *_ = segment._lookup["T_HFS"]
+    item.pack_into(segment._buf, key_offset + segment._frames[(sequence >> 1) + 1 & 1], value)
+    os._exit(0)
+
+
+def test_double_buffer():
+    """
+    Test that the double-buffered segment keeps the values of partial writes, and its snapshots are never torn.
+    """
+    dm.transmission.set_many({"T_HFP": 1000, "T_HFS": 1000})
+    dm.transmission["T_HFP"] = 1001
+    assert dm.transmission.get_many(["T_HFP", "T_HFS"]) == {"T_HFP": 1001, "T_HFS": 1000}
+
+    def _write():
+        for i in range(200):
+            dm.transmission.set_many({key: value + i % 2 for key, value in TRANSMISSION_DICT.items()})
+
+    # Reset the partial writes, so that the snapshots read before the writer's first write are consistent as well
+    dm.transmission.set_many(TRANSMISSION_DICT)
+    writer = threading.Thread(target=_write)
+    writer.start()
+    while writer.is_alive():
+        data = dm.transmission.get_all()
+        assert len({data[key] - value for key, value in TRANSMISSION_DICT.items()}) == 1
+    writer.join()
+
+
+def test_double_buffer_abandoned_write():
+    """
+    Test that the write abandoned by a terminated writer never reaches the double-buffered segment's readers, or the
+    next writes.
+    """
+    dm.transmission.set_many({"T_HFP": 1000, "T_HFS": 1000})
+    writer = multiprocessing.Process(target=_abandon_double_buffer_write, args=(1999,))
+    writer.start()
+    writer.join()
+
+    assert dm.transmission.get_many(["T_HFP", "T_HFS"]) == {"T_HFP": 1000, "T_HFS": 1000}
+    version = dm.transmission.version
+    dm.transmission["T_HFP"] = 1001
+    assert dm.transmission.get_many(["T_HFP", "T_HFS"]) == {"T_HFP": 1001, "T_HFS": 1000}
+    assert dm.transmission.version > version
+
+
+def test_get_bytes():
+    """
+    Test that the snapshot is copied in the segment's binary layout, and that the buffer is re-used.
+    """
+    dm.transmission.update({"T_HFP": 1500, "M_C": -1})
+    buffer = bytearray(dm.transmission.layout.size + 8)
+    view = dm.transmission.get_bytes(buffer)
+
+    assert view.obj is buffer
+    assert dm.transmission.layout.unpack(view) == tuple(dm.transmission.get_all().values())
+    assert bytes(dm.transmission.get_bytes()) == bytes(view)
+
+    with pytest.raises(ValueError):
+        dm.transmission.get_bytes(bytearray(dm.transmission.layout.size - 1))
+
+
+def test_stats():
+    """
+    Test that the reads, writes, transferred bytes and lock acquisitions are counted only if the statistics are enabled.
+    """
+    assert dm.transmission.stats is None
+    assert dm.dump_stats() == "{}"
+
+    memory = type(dm.received)("test_stats", {"a": 0, "b": 0.0, "c": False}, new_lock("test_stats_lock"),
+                               ReadMode.SEQLOCK, stats=True)
+    try:
+        memory.stats.reset()
+        memory.update({"a": 1, "b": 0.5})
+        memory.accessor("c").get()
+        memory.get_all()
+
+        stats = memory.stats.get()
+        assert stats["processes"][os.getpid()] == stats["total"]
+        assert stats["total"]["segment"]["reads"] == 2
+        assert stats["total"]["segment"]["writes"] == 1
+        assert stats["total"]["segment"]["bytes_read"] == 8 + 8 + 1 + 1
+        assert stats["total"]["segment"]["bytes_written"] == 8 + 8
+        assert stats["total"]["segment"]["lock_acquisitions"] == 1
+        assert stats["total"]["keys"]["c"] == {"reads": 2, "writes": 0, "bytes_read": 2, "bytes_written": 0}
+    finally:
+        memory.unlink()
+
+
+def test_persistence(tmp_path):
+    """
+    Test that the persisted data is restored from the file, unless the layout of the data changes.
+    """
+    lock = new_lock("test_persistence_lock")
+    memory = type(dm.received)("test_persistence", {"a": 0, "b": 0.0}, lock, persistence_dir=str(tmp_path))
+    memory.update({"a": 5, "b": 0.5})
+    assert len(os.listdir(tmp_path)) == 1
+
+    restored = type(dm.received)("test_persistence", {"a": 0, "b": 0.0}, lock, persistence_dir=str(tmp_path))
+    assert restored.get_all() == {"a": 5, "b": 0.5}
+    assert restored.version == memory.version
+
+    changed = type(dm.received)("test_persistence", {"a": 0, "b": 0.0, "c": 0}, lock, persistence_dir=str(tmp_path))
+    assert changed.get_all() == {"a": 0, "b": 0.0, "c": 0}
+    assert len(os.listdir(tmp_path)) == 2
+
+    memory.unlink()
+    changed.unlink()
+    assert not os.listdir(tmp_path)
+
+
+def test_history():
+    """
+    Test that the history keeps the most recent records, filling in the missing values from the previous records.
+    """
+    history = dm.received_history
+    head = history.head
+    for i in range(history.capacity + 10):
+        history.append({"S_O": i} if i % 2 else {"S_O": i, "S_I": i}, timestamp=i)
+
+    records = history.window(3)
+    assert history.head == head + history.capacity + 10
+    assert list(records["timestamp"]) == [history.capacity + 7, history.capacity + 8, history.capacity + 9]
+    assert list(records["S_O"]) == [history.capacity + 7, history.capacity + 8, history.capacity + 9]
+    assert list(records["S_I"]) == [history.capacity + 6, history.capacity + 8, history.capacity + 8]
+    assert len(history.window(history.capacity * 2)) == history.capacity
+
+
+@pytest.fixture
+def seqlock_segment():
+    """
+    PyTest fixture creating the sequence-locked test segment with its initial values, and removing it once the test is
+    finished.
+    """
+    segment = _new_seqlock_segment()
+    segment.update(SEQLOCK_DATA)
+    yield segment
+    segment.unlink()
+
+
+@pytest.fixture(autouse=True)
+def segments(monkeypatch):
+    """
+    PyTest fixture replacing the data manager's segments with the test segments, and removing them once the test is
+    finished.
+    """
+    segments = replace_segments(dm, monkeypatch)
+    yield segments
+    segments.unlink()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def config():
+    """
+    PyTest fixture for the configuration function - used to execute config before any test is ran.
+
+    `scope` parameter is used to share fixture instance across the module session, whereas `autouse` ensures all tests
+    in session use the fixture automatically.
+    """
+
+    # Remove all log files from the assets folder.
+    for log_file in get_log_files(TESTS_ASSETS_LOG_DIR):
+        os.remove(log_file)
+
+    # Reconfigure the logger to use a separate folder (instead of the real logs)
+    Log.reconfigure(log_directory=TESTS_ASSETS_LOG_DIR)
@@ -0,0 +1,242 @@
+"""
+Connection engine related tests.
+
+The tests are first reconfiguring the loggers to use the local assets folder instead of the production environment.
+"""
+import os
+import asyncio
+import socket
+import threading
+import time
+import pytest
+from .utils import TESTS_ASSETS_LOG_DIR, get_log_files, replace_segments, wait_for
+from src.common import Log, dm
+from src.comms import AsyncConnection, ConnectionEngine, ConnectionStatus, ConnectionProtocol, ControlChannel, \
+    FrameType, Channel
+from src.comms.protocol import DATAGRAM_HEADER, CHUNK_HEADER, FrameDecoder, SequenceFilter, encode_frame
+
+# Declare the port of the test server
+PORT = 50321
+
+
+def _serve(server: socket.socket, value: int, exchanges: int):
+    """
+    Helper function used as a target for the test server's thread - replies to a number of exchanges and disconnects.
+
+    :param server: Listening socket
+    :param value: Value of the "S_I" key to reply with
+    :param exchanges: Number of replies to send before closing the connection
+    """
+    client, _ = server.accept()
+    with client:
+        for _ in range(exchanges):
+            if not client.recv(4096):
+                break
+            client.sendall(f'{{"S_I": {value}}}'.encode())
+
+
+def _acknowledge(server: socket.socket, received: list):
+    """
+    Helper function used as a target for the test control server's thread - applies and acknowledges the datagrams.
+
+    :param server: Bound UDP socket
+    :param received: List to append the applied values to
+    """
+    sequence_filter = SequenceFilter()
+    while True:
+        datagram, address = server.recvfrom(4096)
+        session, sequence = DATAGRAM_HEADER.unpack_from(datagram)
+        if sequence_filter.accept(session, sequence):
+            received.append(dm.transmission.layout.unpack_from(datagram, DATAGRAM_HEADER.size))
+            server.sendto(DATAGRAM_HEADER.pack(session, sequence), address)
+
+
+def test_reconnect(server):
+    """
+    Test that the connection keeps retrying until the server is available, and reconnects once the server disconnects.
+    """
+    engine = ConnectionEngine()
+    connection = AsyncConnection(port=PORT, engine=engine)
+    try:
+        connection.connect()
+        assert wait_for(lambda: connection.status == ConnectionStatus.CONNECTING)
+
+        server.listen()
+        threading.Thread(target=_serve, args=(server, 1, 3), daemon=True).start()
+        assert wait_for(lambda: dm.received["S_I"] == 1)
+
+        threading.Thread(target=_serve, args=(server, 2, 1000), daemon=True).start()
+        assert wait_for(lambda: dm.received["S_I"] == 2)
+        assert connection.status == ConnectionStatus.CONNECTED and connection.connected
+
+        connection.disconnect()
+        assert connection.status == ConnectionStatus.DISCONNECTED
+        assert engine.alive
+    finally:
+        engine.stop()
+
+
+def test_invalid_data(server):
+    """
+    Test that the received data not matching the received segment's schema is skipped, without stopping the connection.
+    """
+    engine = ConnectionEngine()
+    connection = AsyncConnection(port=PORT, engine=engine)
+    server.listen()
+    try:
+        connection.connect()
+        client, _ = server.accept()
+        with client:
+            for reply in (b'{"unknown": 1}', b'{"S_I": 1.5}', b'{"S_I": 5}'):
+                assert client.recv(4096)
+                client.sendall(reply)
+            assert wait_for(lambda: dm.received["S_I"] == 5)
+            assert connection.status == ConnectionStatus.CONNECTED
+    finally:
+        engine.stop()
+
+
+def test_chunked_reply(server):
+    """
+    Test that the chunks received alongside the data are assembled into a transfer, instead of being stored as the data.
+    """
+    engine = ConnectionEngine()
+    connection = AsyncConnection(port=PORT, protocol=ConnectionProtocol.FRAMED, engine=engine)
+    data = bytes(range(256)) * 10
+    server.listen()
+    try:
+        connection.connect()
+        client, _ = server.accept()
+        with client:
+            for value, chunk, last in ((1, data[:1000], False), (2, data[1000:], True)):
+                assert client.recv(4096)
+                client.sendall(encode_frame(CHUNK_HEADER.pack(Channel.BULK, 0, last) + chunk, FrameType.CHUNK)
+                               + encode_frame(f'{{"S_I": {value}}}'.encode(), FrameType.JSON))
+            assert wait_for(lambda: dm.received["S_I"] == 2)
+            assert connection.receive(timeout=5) == (Channel.BULK, data)
+            assert connection.status == ConnectionStatus.CONNECTED
+    finally:
+        engine.stop()
+
+    with pytest.raises(ValueError):
+        AsyncConnection().receive()
+
+
+def test_control_channel(server):
+    """
+    Test that the control datagrams are sent alongside the connection (which only sends empty updates), and that the
+    channel is connected once the datagrams are acknowledged.
+    """
+    engine = ConnectionEngine()
+    connection = AsyncConnection(port=PORT, protocol=ConnectionProtocol.FRAMED, transmit=False, engine=engine)
+    channel = ControlChannel(port=PORT, rate=100, engine=engine)
+    received = list()
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as control_server:
+        control_server.bind(("localhost", PORT))
+        server.listen()
+        try:
+            dm.transmission["T_HFP"] = 1600
+            connection.connect()
+            channel.connect()
+
+            client, _ = server.accept()
+            with client:
+                assert FrameDecoder().feed(client.recv(4096)) == [(FrameType.JSON, b"{}")]
+
+            time.sleep(0.1)
+            assert channel.status == ConnectionStatus.CONNECTING
+
+            threading.Thread(target=_acknowledge, args=(control_server, received), daemon=True).start()
+            assert wait_for(lambda: channel.status == ConnectionStatus.CONNECTED)
+            assert received[-1][0] == 1600
+
+            channel.disconnect()
+            assert channel.status == ConnectionStatus.DISCONNECTED
+        finally:
+            engine.stop()
+
+
+def test_control_channel_backoff(monkeypatch):
+    """
+    Test that the control channel is re-opened after exponentially increasing delays, reset once the ROV acknowledged
+    any datagram.
+    """
+    channel = ControlChannel(port=PORT)
+    acknowledged = iter((False, False, False, True, False, False))
+    delays = list()
+
+    async def _communicate(_, __, window):
+        if next(acknowledged):
+            window.sent(1, time.perf_counter())
+            window.acknowledge(1, time.perf_counter())
+        raise OSError("Test error")
+
+    async def _sleep(delay):
+        delays.append(delay)
+        if len(delays) == 6:
+            raise RuntimeError("Test finished")
+
+    monkeypatch.setattr(channel, "_communicate", _communicate)
+    monkeypatch.setattr(asyncio, "sleep", _sleep)
+    with pytest.raises(RuntimeError):
+        asyncio.run(channel.serve())
+
+    assert delays == [0.1, 0.2, 0.4, 0.1, 0.2, 0.4]
+
+
+def test_register():
+    """
+    Test that the connections can't be added to a running engine.
+    """
+    engine = ConnectionEngine()
+    AsyncConnection(port=PORT, engine=engine).connect()
+    try:
+        with pytest.raises(ValueError):
+            AsyncConnection(port=PORT + 1, engine=engine)
+        with pytest.raises(ValueError):
+            AsyncConnection(rate=0)
+        with pytest.raises(ValueError):
+            AsyncConnection(protocol=ConnectionProtocol.BINARY, transmit=False)
+    finally:
+        engine.stop()
+
+
+@pytest.fixture
+def server():
+    """
+    PyTest fixture creating the (not yet listening) test server socket.
+    """
+    server = socket.socket()
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(("localhost", PORT))
+    yield server
+    server.close()
+
+
+@pytest.fixture(autouse=True)
+def segments(monkeypatch):
+    """
+    PyTest fixture replacing the data manager's segments with the test segments, and removing them once the test is
+    finished.
+    """
+    segments = replace_segments(dm, monkeypatch)
+    yield segments
+    segments.unlink()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def config():
+    """
+    PyTest fixture for the configuration function - used to execute config before any test is ran.
+
+    `scope` parameter is used to share fixture instance across the module session, whereas `autouse` ensures all tests
+    in session use the fixture automatically.
+    """
+
+    # Remove all log files from the assets folder.
+    for log_file in get_log_files(TESTS_ASSETS_LOG_DIR):
+        os.remove(log_file)
+
+    # Reconfigure the logger to use a separate folder (instead of the real logs)
+    Log.reconfigure(log_directory=TESTS_ASSETS_LOG_DIR)
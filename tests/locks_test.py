@@ -0,0 +1,204 @@
+"""
+Inter-process lock related tests.
+
+The tests are first reconfiguring the loggers to use the local assets folder instead of the production environment.
+"""
+import os
+import time
+import multiprocessing
+import pytest
+from .utils import TESTS_ASSETS_LOG_DIR, get_log_files
+from src.common import Log, LockType
+from src.common.locks import new_lock, SEMAPHORES_SUPPORTED, _OWNER_CHECK_INTERVAL, _UNOWNED_TIMEOUT, _OWNER
+
+# Declare the name of the test lock
+NAME = "test_lock"
+
+# Declare the lock types to test - the semaphore-based locks only if supported
+SEMAPHORE_LOCK_TYPE = pytest.param(LockType.SEMAPHORE, marks=pytest.mark.skipif(
+    not SEMAPHORES_SUPPORTED, reason="named semaphores are not supported"))
+LOCK_TYPES = [LockType.FILE, SEMAPHORE_LOCK_TYPE]
+
+
+def _increment(lock_type: LockType, counter: multiprocessing.RawValue, count: int):
+    """
+    Helper function used as a target for the incrementing processes, yielding between reading and writing the counter.
+
+    :param lock_type: Type of the lock
+    :param counter: Counter shared by the processes
+    :param count: Number of increments
+    """
+    lock = new_lock(NAME, lock_type)
+    for _ in range(count):
+        lock.acquire()
+        value = counter.value
+        time.sleep(0)
+        counter.value = value + 1
+        lock.release()
+
+
+def _hold(lock_type: LockType, acquired: multiprocessing.Event, duration: float, terminate: bool,
+          released: multiprocessing.RawValue):
+    """
+    Helper function used as a target for the holding process.
+
+    :param lock_type: Type of the lock
+    :param acquired: Event set once the lock is acquired
+    :param duration: How long to hold the lock (in seconds)
+    :param terminate: Whether to terminate without releasing the lock
+    :param released: Flag set right before the lock is released
+    """
+    lock = new_lock(NAME, lock_type)
+    lock.acquire()
+    acquired.set()
+    time.sleep(duration)
+    if terminate:
+        os._exit(0)
+    released.value = True
+    lock.release()
+
+
+def _abandon(lock_type: LockType, released: bool):
+    """
+    Helper function used as a target for the process terminated while the lock is held without a recorded holder.
+
+    :param lock_type: Type of the lock
+    :param released: Whether to terminate right before releasing the lock (or right after acquiring it)
+    """
+    lock = new_lock(NAME, lock_type)
+    if released:
+        lock.acquire()
+        _OWNER.pack_into(lock._owner, 0, 0)
+    else:
+        lock._semaphore.acquire()
+    os._exit(0)
+
+
+def _start_holder(lock_type: LockType, duration: float, terminate: bool = False) -> tuple:
+    """
+    Helper function used to start the holding process and wait until it acquires the lock.
+
+    :param lock_type: Type of the lock
+    :param duration: How long to hold the lock (in seconds)
+    :param terminate: Whether to terminate without releasing the lock
+    :return: The process and its released flag
+    """
+    acquired, released = multiprocessing.Event(), multiprocessing.RawValue("b", False)
+    process = multiprocessing.Process(target=_hold, args=(lock_type, acquired, duration, terminate, released))
+    process.start()
+    assert acquired.wait(5)
+    return process, released
+
+
+@pytest.mark.parametrize("lock_type", LOCK_TYPES)
+def test_mutual_exclusion(lock_type):
+    """
+    Test that no increments are lost when multiple processes increment a counter under the lock.
+    """
+    counter, count = multiprocessing.RawValue("q", 0), 200
+    processes = [multiprocessing.Process(target=_increment, args=(lock_type, counter, count)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert counter.value == count * len(processes)
+
+
+@pytest.mark.parametrize("lock_type", LOCK_TYPES)
+def test_slow_holder(lock_type):
+    """
+    Test that a running holder keeps the lock, however long it holds it for.
+    """
+    process, released = _start_holder(lock_type, _OWNER_CHECK_INTERVAL * 5)
+    lock = new_lock(NAME, lock_type)
+    lock.acquire()
+    try:
+        assert released.value
+    finally:
+        lock.release()
+        if process.pid:
+            process.join()
+
+
+@pytest.mark.parametrize("lock_type", LOCK_TYPES)
+def test_terminated_holder(lock_type):
+    """
+    Test that the lock is taken over once its holder is terminated without releasing it.
+    """
+    process, released = _start_holder(lock_type, 0, terminate=True)
+    process.join()
+
+    lock = new_lock(NAME, lock_type)
+    start = time.monotonic()
+    lock.acquire()
+    lock.release()
+
+    assert not released.value
+    assert time.monotonic() - start < _OWNER_CHECK_INTERVAL * 5
+
+
+@pytest.mark.parametrize("lock_type", [SEMAPHORE_LOCK_TYPE])
+@pytest.mark.parametrize("released", [False, True])
+def test_unowned_holder(lock_type, released):
+    """
+    Test that the lock is taken over once its holder is terminated between acquiring the semaphore and recording itself,
+    or between clearing the record and releasing the semaphore.
+    """
+    process = multiprocessing.Process(target=_abandon, args=(lock_type, released))
+    process.start()
+    process.join()
+
+    lock = new_lock(NAME, lock_type)
+    assert not lock.owner
+    start = time.monotonic()
+    lock.acquire()
+    lock.release()
+
+    assert _UNOWNED_TIMEOUT <= time.monotonic() - start < _UNOWNED_TIMEOUT + _OWNER_CHECK_INTERVAL * 5
+
+
+@pytest.mark.parametrize("lock_type", LOCK_TYPES)
+def test_unlink(lock_type):
+    """
+    Test that a lock opened after the held lock is removed is a new, free lock.
+    """
+    counter = multiprocessing.RawValue("q", 0)
+    process = multiprocessing.Process(target=_increment, args=(lock_type, counter, 1))
+    lock = new_lock(NAME, lock_type)
+    lock.acquire()
+    try:
+        lock.unlink()
+        process.start()
+        process.join(_OWNER_CHECK_INTERVAL * 5)
+        assert counter.value == 1
+    finally:
+        lock.release()
+        if process.pid:
+            process.join()
+
+
+@pytest.fixture(autouse=True)
+def unlink(lock_type):
+    """
+    PyTest fixture removing the test lock once the test is finished.
+    """
+    yield
+    new_lock(NAME, lock_type).unlink()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def config():
+    """
+    PyTest fixture for the configuration function - used to execute config before any test is ran.
+
+    `scope` parameter is used to share fixture instance across the module session, whereas `autouse` ensures all tests
+    in session use the fixture automatically.
+    """
+
+    # Remove all log files from the assets folder.
+    for log_file in get_log_files(TESTS_ASSETS_LOG_DIR):
+        os.remove(log_file)
+
+    # Reconfigure the logger to use a separate folder (instead of the real logs)
+    Log.reconfigure(log_directory=TESTS_ASSETS_LOG_DIR)
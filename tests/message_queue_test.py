@@ -0,0 +1,141 @@
+"""
+Message queue related tests.
+
+The tests are first reconfiguring the loggers to use the local assets folder instead of the production environment.
+"""
+import os
+import time
+import multiprocessing
+import pytest
+from .utils import TESTS_ASSETS_LOG_DIR, get_log_files
+from src.common import Log, MessageQueue
+from src.common.locks import new_lock
+
+# Declare the initial values and the capacity of the test queue
+DATA = {"button": 0, "pressed": False, "value": 0.0}
+CAPACITY = 8
+
+# Declare the name of the lock serialising the producers of the test queue
+LOCK_NAME = "test_queue"
+
+
+def _produce(count: int, producer: int = 0, locked: bool = False):
+    """
+    Helper function used as a target for the producer processes.
+
+    :param count: Number of records to push
+    :param producer: Index of the producer, stored in each record's "value"
+    :param locked: Whether to serialise the producers with the named lock
+    """
+    queue = MessageQueue("test_queue", DATA, CAPACITY, lock=new_lock(LOCK_NAME) if locked else None)
+    index = 0
+    while index < count:
+        index += queue.push_many({"button": i, "value": float(producer)} for i in range(index, count))
+
+
+def test_push_pop(queue):
+    """
+    Test that the records are popped in order, with the missing values filled in from the initial values.
+    """
+    assert queue.pop() is None
+    assert queue.push({"button": 1, "pressed": True})
+    assert queue.push_many([{"button": 2, "value": 0.5}, {"button": 3}]) == 2
+    assert len(queue) == 3
+
+    assert queue.pop() == {"button": 1, "pressed": True, "value": 0.0}
+    assert queue.pop_many() == [{"button": 2, "pressed": False, "value": 0.5},
+                                {"button": 3, "pressed": False, "value": 0.0}]
+    assert not len(queue)
+
+
+def test_full(queue):
+    """
+    Test that the records are rejected once the queue is full, and that the queue keeps working after wrapping around.
+    """
+    assert queue.push_many({"button": i} for i in range(CAPACITY + 3)) == CAPACITY
+    assert not queue.push({"button": CAPACITY})
+
+    assert [record["button"] for record in queue.pop_many(5)] == [0, 1, 2, 3, 4]
+    assert queue.push_many({"button": i} for i in range(CAPACITY, CAPACITY + 5)) == 5
+    assert [record["button"] for record in queue.pop_many()] == list(range(5, CAPACITY + 5))
+
+
+def test_invalid(queue):
+    """
+    Test that pushing unregistered keys or values not matching the schema raises an error, without losing the records
+    pushed before.
+    """
+    with pytest.raises(KeyError):
+        queue.push({"unknown": 0})
+    with pytest.raises(ValueError):
+        queue.push_many([{"button": 1}, {"button": 1.5}])
+
+    assert queue.pop_many() == [{"button": 1, "pressed": False, "value": 0.0}]
+
+
+def test_processes(queue):
+    """
+    Test that no records are lost or re-ordered when streamed from a different process.
+    """
+    count = CAPACITY * 100
+    producer = multiprocessing.Process(target=_produce, args=(count,))
+    producer.start()
+
+    records = list()
+    while len(records) < count:
+        records += queue.pop_many()
+    producer.join()
+
+    assert [record["button"] for record in records] == list(range(count))
+
+
+def test_producers(queue):
+    """
+    Test that no records are lost or re-ordered when streamed from multiple processes at once, serialised with a lock.
+    """
+    count, producers = CAPACITY * 25, 4
+    processes = [multiprocessing.Process(target=_produce, args=(count, producer, True))
+                 for producer in range(producers)]
+    for process in processes:
+        process.start()
+
+    records = list()
+    deadline = time.monotonic() + 10
+    try:
+        while len(records) < count * producers and time.monotonic() < deadline:
+            records += queue.pop_many()
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+        new_lock(LOCK_NAME).unlink()
+
+    for producer in range(producers):
+        assert [r["button"] for r in records if r["value"] == producer] == list(range(count))
+
+
+@pytest.fixture
+def queue():
+    """
+    PyTest fixture creating the test queue, and draining it once the test is finished.
+    """
+    queue = MessageQueue("test_queue", DATA, CAPACITY)
+    yield queue
+    queue.pop_many()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def config():
+    """
+    PyTest fixture for the configuration function - used to execute config before any test is ran.
+
+    `scope` parameter is used to share fixture instance across the module session, whereas `autouse` ensures all tests
+    in session use the fixture automatically.
+    """
+
+    # Remove all log files from the assets folder.
+    for log_file in get_log_files(TESTS_ASSETS_LOG_DIR):
+        os.remove(log_file)
+
+    # Reconfigure the logger to use a separate folder (instead of the real logs)
+    Log.reconfigure(log_directory=TESTS_ASSETS_LOG_DIR)
@@ -0,0 +1,112 @@
+"""
+Connection metrics related tests.
+
+The tests are first reconfiguring the loggers to use the local assets folder instead of the production environment.
+"""
+import os
+import time
+import multiprocessing
+import pytest
+from .utils import TESTS_ASSETS_LOG_DIR, get_log_files
+from src.common import Log
+from src.comms import ConnectionMetrics, METRICS_INTERVAL
+
+
+def _record(count: int):
+    """
+    Helper function used as a target for the recording process.
+
+    :param count: Number of exchanges to record
+    """
+    metrics = ConnectionMetrics("test_metrics")
+    for rtt in range(count):
+        metrics.record(rtt)
+    metrics.close()
+
+
+def test_intervals(metrics, reader):
+    """
+    Test that the exchanges are visible to other instances, and the rate is only calculated over complete intervals.
+    """
+    for rtt in (1000000, 2000000, 3000000):
+        metrics.record(rtt)
+
+    stats = reader.get()
+    assert (stats["exchanges"], stats["last_rtt_us"], stats["exchanges_per_second"]) == (3, 3000, 0)
+    assert stats["all_rtt_us"]["p50"] == pytest.approx(2000, rel=0.125)
+    assert not stats["rtt_us"]["count"]
+
+    time.sleep(METRICS_INTERVAL)
+    metrics.record(4000000)
+
+    stats = reader.get()
+    assert stats["rtt_us"]["count"] == 4
+    assert 3 < stats["exchanges_per_second"] <= 4
+
+
+def test_liveness(metrics, reader):
+    """
+    Test that the liveness is visible to other instances, and the time since the last reply is measured.
+    """
+    assert not reader.alive and reader.get()["last_reply_ms"] is None
+
+    metrics.heartbeat()
+    time.sleep(0.01)
+    assert reader.alive and reader.get()["last_reply_ms"] >= 10
+
+    metrics.expire()
+    assert not reader.get()["alive"]
+
+
+def test_consistency(metrics, reader):
+    """
+    Test that the metrics read while another process records them are consistent - each read either includes an exchange
+    in all metrics, or in none of them.
+    """
+    count = 20000
+    process = multiprocessing.Process(target=_record, args=(count,))
+    process.start()
+
+    stats = reader.get()
+    while stats["exchanges"] < count:
+        assert stats["all_rtt_us"]["count"] == stats["exchanges"]
+        stats = reader.get()
+    process.join()
+
+
+@pytest.fixture
+def metrics():
+    """
+    PyTest fixture creating the test metrics, and removing them once the test is finished.
+    """
+    metrics = ConnectionMetrics("test_metrics")
+    yield metrics
+    metrics.close()
+    metrics.unlink()
+
+
+@pytest.fixture
+def reader(metrics):
+    """
+    PyTest fixture opening another instance of the test metrics, and closing it once the test is finished.
+    """
+    reader = ConnectionMetrics("test_metrics")
+    yield reader
+    reader.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def config():
+    """
+    PyTest fixture for the configuration function - used to execute config before any test is ran.
+
+    `scope` parameter is used to share fixture instance across the module session, whereas `autouse` ensures all tests
+    in session use the fixture automatically.
+    """
+
+    # Remove all log files from the assets folder.
+    for log_file in get_log_files(TESTS_ASSETS_LOG_DIR):
+        os.remove(log_file)
+
+    # Reconfigure the logger to use a separate folder (instead of the real logs)
+    Log.reconfigure(log_directory=TESTS_ASSETS_LOG_DIR)
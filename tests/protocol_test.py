@@ -0,0 +1,115 @@
+"""
+Framed protocol related tests.
+"""
+import pytest
+from src.comms import FrameType, Channel, Multiplexer
+from src.comms.protocol import FrameDecoder, encode_frame, new_frame_buffer, FRAME_HEADER, SequenceFilter, AckWindow, \
+    SEQUENCE_RANGE, ChunkAssembler, CHUNK_HEADER
+
+
+def test_split_and_coalesced():
+    """
+    Test that the frames are decoded regardless of how the bytes are split into the chunks.
+    """
+    stream = encode_frame(b'{"S_O": 1}', FrameType.JSON) + encode_frame(b"", FrameType.BINARY) \
+        + encode_frame(bytes(range(256)) * 100, FrameType.BINARY)
+
+    decoder = FrameDecoder()
+    frames = list()
+    for i in range(0, len(stream), 7):
+        frames += decoder.feed(stream[i:i + 7])
+
+    assert frames == [(FrameType.JSON, b'{"S_O": 1}'), (FrameType.BINARY, b""),
+                      (FrameType.BINARY, bytes(range(256)) * 100)]
+    assert not decoder.pending
+    assert FrameDecoder().feed(stream) == frames
+
+
+def test_frame_buffer():
+    """
+    Test that the pre-allocated frame is updated by writing into its body.
+    """
+    frame, body = new_frame_buffer(4, FrameType.BINARY)
+    body[:] = b"\x01\x02\x03\x04"
+
+    assert FrameDecoder().feed(frame) == [(FrameType.BINARY, b"\x01\x02\x03\x04")]
+
+
+def test_invalid():
+    """
+    Test that the corrupted streams are rejected instead of buffered indefinitely.
+    """
+    with pytest.raises(ValueError):
+        FrameDecoder(max_frame_size=10).feed(FRAME_HEADER.pack(11, FrameType.JSON.value))
+    with pytest.raises(ValueError):
+        FrameDecoder().feed(FRAME_HEADER.pack(0, 255))
+
+
+def test_sequence_filter():
+    """
+    Test that the stale datagrams are dropped, including across the wrap around, and that a new session starts over.
+    """
+    sequence_filter = SequenceFilter()
+
+    assert sequence_filter.accept(1, SEQUENCE_RANGE - 2)
+    assert sequence_filter.accept(1, 1)
+    assert not sequence_filter.accept(1, SEQUENCE_RANGE - 1)
+    assert not sequence_filter.accept(1, 1)
+    assert sequence_filter.accept(2, 0)
+    assert sequence_filter.dropped == 2
+
+
+def test_ack_window():
+    """
+    Test that an acknowledgement supersedes the older datagrams, and that the datagrams not fitting the window are lost.
+    """
+    window = AckWindow(4)
+    for sequence in range(1, 7):
+        window.sent(sequence, sequence)
+
+    assert window.acknowledge(5, 5.5)
+    assert not window.acknowledge(1, 6)
+    assert window.last_acknowledged == 5.5
+
+    stats = window.stats()
+    assert (stats["sent"], stats["lost"], stats["superseded"], stats["acknowledged"], stats["unexpected"],
+            stats["pending"]) == (6, 2, 2, 1, 1, 1)
+    assert stats["rtt_us"]["count"] == 1
+
+
+def test_multiplexer():
+    """
+    Test that the control transfers are always sent whole, the other channels fill the budget in the order of priority,
+    and the partially sent transfers are sent again from the start once rewound.
+    """
+    multiplexer = Multiplexer(chunk_size=4, budget=6)
+    multiplexer.put(Channel.BULK, b"bulk-data")
+    multiplexer.put(Channel.TELEMETRY, b"tele")
+    multiplexer.put(Channel.CONTROL, b"control")
+
+    decoder, assembler = FrameDecoder(), ChunkAssembler()
+    frames = decoder.feed(b"".join(multiplexer.pop()))
+    assert [body[CHUNK_HEADER.size:] for _, body in frames] == [b"cont", b"rol", b"tele", b"bu"]
+    assert [assembler.feed(body) for _, body in frames] == [None, (Channel.CONTROL, b"control"),
+                                                            (Channel.TELEMETRY, b"tele"), None]
+
+    multiplexer.rewind()
+    assert multiplexer.pending == len(b"bulk-data")
+    assembler = ChunkAssembler()
+    transfers = [assembler.feed(body) for _, body in decoder.feed(b"".join(multiplexer.pop() + multiplexer.pop()))]
+    assert transfers == [None, None, (Channel.BULK, b"bulk-data")]
+    assert multiplexer.stats()["BULK"]["sent"] == 1 and not multiplexer.pending
+
+
+def test_chunk_assembler():
+    """
+    Test that the interleaved transfers are assembled, and the transfers larger than the limit are rejected.
+    """
+    assembler = ChunkAssembler(max_transfer_size=8)
+    assert assembler.feed(CHUNK_HEADER.pack(Channel.BULK, 1, False) + b"ab") is None
+    assert assembler.feed(CHUNK_HEADER.pack(Channel.TELEMETRY, 1, True) + b"cd") == (Channel.TELEMETRY, b"cd")
+    assert assembler.feed(CHUNK_HEADER.pack(Channel.BULK, 1, True) + b"ef") == (Channel.BULK, b"abef")
+
+    with pytest.raises(ValueError):
+        assembler.feed(CHUNK_HEADER.pack(Channel.BULK, 2, False) + bytes(9))
+    assert not assembler.pending
@@ -0,0 +1,79 @@
+"""
+Scheduler and histogram related tests.
+"""
+import time
+import pytest
+from src.common import Histogram, Scheduler
+
+
+def test_histogram():
+    """
+    Test that the percentiles are within the precision of the histogram, and that the histograms are merged.
+    """
+    histogram = Histogram()
+    for value in range(1, 10001):
+        histogram.record(value)
+
+    assert histogram.count == 10000
+    assert histogram.max == 10000
+    for percentile in (50, 90, 99):
+        assert percentile * 100 <= histogram.percentile(percentile) <= percentile * 100 * 1.125
+
+    other = Histogram()
+    other.record(50000)
+    histogram.merge(other)
+    assert histogram.percentile(100) == 50000
+    assert sum(histogram.buckets().values()) == 10001
+
+    histogram.reset()
+    assert histogram.summary() == {"count": 0, "mean": 0, "max": 0, "p50": 0, "p90": 0, "p99": 0, "p999": 0}
+    with pytest.raises(ValueError):
+        histogram.merge(Histogram(precision=5))
+
+
+def test_histogram_buffer():
+    """
+    Test that a histogram kept in a provided buffer is visible to another histogram using the same buffer.
+    """
+    buffer = bytearray(Histogram.size())
+    histogram = Histogram(buffer=buffer)
+    histogram.record(1000)
+
+    assert Histogram(buffer=buffer).summary() == histogram.summary()
+    with pytest.raises(ValueError):
+        Histogram(buffer=bytearray(Histogram.size() - 1))
+
+
+def test_rate():
+    """
+    Test that the ticks don't drift, regardless of the time spent within the iterations.
+    """
+    scheduler = Scheduler(100)
+    scheduler.wait()
+    start = time.perf_counter()
+    for i in range(50):
+        time.sleep(0.002 * (i % 3))
+        scheduler.wait()
+
+    assert 0.49 <= time.perf_counter() - start < 0.55
+    assert scheduler.stats()["ticks"] == 51
+
+
+def test_overrun():
+    """
+    Test that the missed ticks are skipped rather than ran in a burst, and the schedule stays in phase.
+    """
+    scheduler = Scheduler(100)
+    scheduler.wait()
+    first = scheduler._deadline
+    time.sleep(0.035)
+    scheduler.wait()
+    scheduler.wait()
+
+    ticks = (scheduler._deadline - first) / scheduler.period
+    assert ticks == pytest.approx(round(ticks), abs=1e-6)
+    assert scheduler.stats()["overruns"] == 1
+    assert scheduler.stats()["missed"] >= 2
+
+    with pytest.raises(ValueError):
+        Scheduler(0)
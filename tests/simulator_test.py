@@ -0,0 +1,132 @@
+"""
+ROV simulator related tests.
+
+The tests are first reconfiguring the loggers to use the local assets folder instead of the production environment.
+"""
+import json
+import os
+import socket
+import time
+import pytest
+from .utils import TESTS_ASSETS_LOG_DIR, get_log_files, replace_segments
+from src.common import Log, dm
+from src.comms import RovSimulator, ConnectionProtocol, FrameType, SEQUENCE_KEY
+from src.comms.protocol import DATAGRAM_HEADER, FrameDecoder, encode_frame
+
+# Declare the port of the test simulator
+PORT = 50331
+
+
+def test_exchange():
+    """
+    Test that the requests are applied, and replied to with the telemetry and the echoed sequence number after the
+    latency.
+    """
+    simulator = RovSimulator(port=PORT, latency=0.02)
+    simulator.start()
+    try:
+        with socket.create_connection(("localhost", PORT)) as client:
+            start = time.perf_counter()
+            client.sendall(json.dumps({"T_HFP": 1600, SEQUENCE_KEY: 7}).encode())
+            reply = json.loads(client.recv(4096))
+
+            assert time.perf_counter() - start >= 0.02
+            assert reply[SEQUENCE_KEY] == 7 and reply["S_O"] == 1
+            assert simulator.transmission == {"T_HFP": 1600}
+    finally:
+        simulator.stop()
+
+    with pytest.raises(ValueError):
+        RovSimulator(loss=2)
+    with pytest.raises(ValueError):
+        RovSimulator(telemetry_rate=10)
+
+
+def test_faults():
+    """
+    Test that the injected disconnections are measured until the client reconnects, and that the lost replies are
+    delayed by the retransmission.
+    """
+    simulator = RovSimulator(port=PORT, protocol=ConnectionProtocol.FRAMED, disconnect=1)
+    simulator.start()
+    try:
+        with socket.create_connection(("localhost", PORT)) as client:
+            client.sendall(encode_frame(b"{}", FrameType.JSON))
+            assert client.recv(4096) == b""
+
+        with socket.create_connection(("localhost", PORT)):
+            time.sleep(0.05)
+    finally:
+        simulator.stop()
+
+    stats = simulator.stats()
+    assert stats["connections"] == 2 and stats["disconnections"] == 1
+    assert stats["reconnection_ms"]["count"] == 1
+
+    simulator = RovSimulator(port=PORT, loss=1)
+    simulator.start()
+    try:
+        with socket.create_connection(("localhost", PORT)) as client:
+            start = time.perf_counter()
+            client.sendall(b"{}")
+            assert json.loads(client.recv(4096))["S_O"] == 1
+            assert time.perf_counter() - start >= 0.2
+    finally:
+        simulator.stop()
+
+
+def test_telemetry():
+    """
+    Test that the unsolicited telemetry is sent at the given rate, and that the control datagrams are acknowledged.
+    """
+    simulator = RovSimulator(port=PORT, protocol=ConnectionProtocol.FRAMED, telemetry_rate=50, control_port=PORT)
+    simulator.start()
+    try:
+        with socket.create_connection(("localhost", PORT)) as client:
+            decoder, frames = FrameDecoder(), list()
+            while len(frames) < 5:
+                frames.extend(decoder.feed(client.recv(4096)))
+            assert frames[:2] == [(FrameType.JSON, b'{"S_I": 1}'), (FrameType.JSON, b'{"S_I": 2}')]
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as control:
+            control.settimeout(1)
+            body = dm.transmission.layout.pack(*(1 if key == "T_HFP" else 0 for key in dm.transmission.schema))
+            control.sendto(DATAGRAM_HEADER.pack(1, 2) + body, ("localhost", PORT))
+            assert control.recv(4096) == DATAGRAM_HEADER.pack(1, 2)
+
+            control.sendto(DATAGRAM_HEADER.pack(1, 1) + body, ("localhost", PORT))
+            with pytest.raises(socket.timeout):
+                control.recv(4096)
+    finally:
+        simulator.stop()
+
+    assert simulator.transmission["T_HFP"] == 1
+    assert simulator.stats()["datagrams_stale"] == 1
+
+
+@pytest.fixture(autouse=True)
+def segments(monkeypatch):
+    """
+    PyTest fixture replacing the data manager's segments with the test segments, and removing them once the test is
+    finished.
+    """
+    segments = replace_segments(dm, monkeypatch)
+    yield segments
+    segments.unlink()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def config():
+    """
+    PyTest fixture for the configuration function - used to execute config before any test is ran.
+
+    `scope` parameter is used to share fixture instance across the module session, whereas `autouse` ensures all tests
+    in session use the fixture automatically.
+    """
+
+    # Remove all log files from the assets folder.
+    for log_file in get_log_files(TESTS_ASSETS_LOG_DIR):
+        os.remove(log_file)
+
+    # Reconfigure the logger to use a separate folder (instead of the real logs)
+    Log.reconfigure(log_directory=TESTS_ASSETS_LOG_DIR)
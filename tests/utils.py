@@ -5,6 +5,7 @@ Test utils
 Standard utils module storing common to the package classes, functions, constants, and other objects.
 """
 import os as _os
+import time as _time
 
 # Declare some root-level directories
 ROOT_DIR = _os.path.normpath(_os.path.join(_os.path.dirname(__file__), ".."))
@@ -15,6 +16,10 @@ TESTS_ASSETS_DIR = _os.path.join(TESTS_DIR, "assets")
 TESTS_ASSETS_LOG_DIR = _os.path.join(TESTS_ASSETS_DIR, "log")
 TESTS_ASSETS_VISION_DIR = _os.path.join(TESTS_ASSETS_DIR, "vision")
 
+# Declare the prefix of the names of the test segments, and the data manager's attributes replaced with them
+TESTS_SEGMENTS_PREFIX = "test_"
+TESTS_SEGMENTS = ("_transmission", "_control", "_received", "_received_history")
+
 
 def get_log_files(directory: str) -> set:
     """
@@ -28,3 +33,34 @@ def get_log_files(directory: str) -> set:
         if file.endswith(".log"):
             files.add(_os.path.join(directory, file))
     return files
+
+
+def replace_segments(data_manager, monkeypatch):
+    """
+    Helper function used to replace the data manager's segments with separate test segments, so that the tests never
+    modify the segments of a running application (or the data left by each other).
+
+    :param data_manager: Data manager to replace the segments of
+    :param monkeypatch: PyTest fixture used to restore the original segments once the test is finished
+    :return: Data manager of the test segments, which should be unlinked once the test is finished
+    """
+    segments = type(data_manager)(TESTS_SEGMENTS_PREFIX, persistence_dir=None)
+    for segment in TESTS_SEGMENTS:
+        monkeypatch.setattr(data_manager, segment, getattr(segments, segment))
+    return segments
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    """
+    Helper function used to wait until the condition is met.
+
+    :param condition: Function returning True once the condition is met
+    :param timeout: Maximum time to wait (in seconds)
+    :return: Whether the condition was met
+    """
+    deadline = _time.monotonic() + timeout
+    while not condition():
+        if _time.monotonic() > deadline:
+            return False
+        _time.sleep(0.01)
+    return True